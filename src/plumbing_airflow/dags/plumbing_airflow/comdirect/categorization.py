@@ -1,5 +1,10 @@
 """
 # Comdirect Transaction Categorization DAG
+
+Categorizes the transactions not categorized yet, streamed in chunks of
+`CATEGORIZATION_CHUNK_SIZE` and saved after each chunk so progress survives failures.
+A run stops after `CATEGORIZATION_MAX_PER_RUN` transactions, the rest of the
+backlog is left to the next runs.
 """
 
 import logging
@@ -14,12 +19,17 @@ from plumbing_core.processors.categorization import (
     CategorizedBankTransaction,
     categorize_transaction,
     CATEGORIZED_BANK_TRANSACTION_DDL,
+    CATEGORIZED_BANK_TRANSACTION_INDEXES,
 )
 from plumbing_core.destinations.turso import (
-    get_transactions_to_categorize,
+    TursoSession,
+    iter_transactions_to_categorize,
+    migrate_table,
     write_account_transactions_categorized,
 )
 from plumbing_airflow.shared.dag_config import (
+    CATEGORIZATION_CHUNK_SIZE,
+    CATEGORIZATION_MAX_PER_RUN,
     TRANSACTION_ASSET,
     get_default_dag_args,
     get_comdirect_tags,
@@ -50,20 +60,11 @@ def comdirect_categorization():
             f"Received asset event to categorize {last_row_count} transactions"
         )
 
-        # Get data step
-        db_config = get_database_config(db_type="turso")
-        transactions = get_transactions_to_categorize(config=db_config)
-        # well, just to be sure
-        if not transactions:
-            logging.info("No transactions to categorize")
-            raise AirflowSkipException
-
         ai_config = PydanticAIConfig()
         agent = get_comdirect_transaction_categorization_agent(
             config=ai_config, output_type=CategorizedBankTransaction
         )
 
-        # Process data step
         logfire.configure(
             send_to_logfire="if-token-present",  # only send to logfire if token is present in env
             service_name="plumbing-airflow",
@@ -73,24 +74,70 @@ def comdirect_categorization():
             capture_all=True
         )  # and the http requests made to the model providers
 
-        logging.info(f"Starting categorization for {len(transactions)} transactions")
-        categorized_transactions = []
-        for transaction in transactions:
-            res = categorize_transaction(agent=agent, transaction=transaction)
-            if res:
-                categorized_transactions.append(res)
+        db_config = get_database_config(db_type="turso")
+        transaction_count = 0
+        written_count = 0
+
+        with TursoSession(db_config) as session:
+            # Indexes of the lookup of categorized transactions, the source table
+            # is migrated by the data DAG
+            migrate_table(
+                config=db_config,
+                table_name="account_transactions__categorized",
+                ddl=CATEGORIZED_BANK_TRANSACTION_DDL,
+                indexes=CATEGORIZED_BANK_TRANSACTION_INDEXES,
+                session=session,
+            )
+
+            # Get data step, chunk by chunk until the backlog or the cap is reached
+            for transactions in iter_transactions_to_categorize(
+                config=db_config,
+                chunk_size=CATEGORIZATION_CHUNK_SIZE,
+                session=session,
+            ):
+                transactions = transactions[
+                    : CATEGORIZATION_MAX_PER_RUN - transaction_count
+                ]
+                transaction_count += len(transactions)
+
+                # Process data step
+                logging.info(
+                    f"Starting categorization for {len(transactions)} transactions"
+                )
+                categorized_transactions = []
+                for transaction in transactions:
+                    res = categorize_transaction(agent=agent, transaction=transaction)
+                    if res:
+                        categorized_transactions.append(res)
+
+                logging.info(
+                    f"Finished categorization for {len(categorized_transactions)} transactions"
+                )
+
+                # Save data step
+                write_result = write_account_transactions_categorized(
+                    categorized_transactions=categorized_transactions,
+                    config=db_config,
+                    ddl=CATEGORIZED_BANK_TRANSACTION_DDL,
+                    write_strategy="upsert",
+                    session=session,
+                )
+                written_count += write_result.written
+                logging.info(f"Inserted {write_result.written} records")
+
+                if transaction_count >= CATEGORIZATION_MAX_PER_RUN:
+                    logging.info(
+                        f"Reached {CATEGORIZATION_MAX_PER_RUN} transactions for this "
+                        "run, leaving the rest for the next run"
+                    )
+                    break
 
-        logging.info(
-            f"Finished categorization for {len(categorized_transactions)} transactions"
-        )
+        # well, just to be sure
+        if transaction_count == 0:
+            logging.info("No transactions to categorize")
+            raise AirflowSkipException
 
-        # Save data step
-        inserted_count = write_account_transactions_categorized(
-            categorized_transactions=categorized_transactions,
-            config=db_config,
-            ddl=CATEGORIZED_BANK_TRANSACTION_DDL,
-        )
-        logging.info(f"Inserted {inserted_count} records")
+        logging.info(f"Categorized {written_count} of {transaction_count} transactions")
 
     categorize()
 
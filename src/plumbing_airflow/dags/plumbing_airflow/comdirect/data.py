@@ -6,9 +6,10 @@ Regularly fetches and stores Comdirect account balances and transaction data (bo
 ## Overview
 
 This DAG performs comprehensive data extraction from Comdirect banking API:
-1. Retrieves current account balances for all accounts
-2. Fetches booked transactions (incremental updates based on last booking date)
-3. Fetches not-booked/pending transactions (full refresh)
+1. Retrieves current account balances for all accounts and detects which of them changed
+2. Fetches booked and not-booked/pending transactions of each account in one request sequence (`transactionState=BOTH`)
+3. Stores booked transactions incrementally based on last booking date (first-time backfills streamed in batches)
+   and refreshes the not-booked transactions of each account in full
 4. Stores all data in SQLite database tables synced to its remote
 
 ## Schedule
@@ -18,15 +19,18 @@ This DAG performs comprehensive data extraction from Comdirect banking API:
 
 ## Tasks
 
-- `get_account_balances_data`: Fetches current balances and returns account IDs
-- `get_account_transactions_data_booked`: Incremental sync of booked transactions
-- `get_account_transactions_data_not_booked`: Full refresh of pending transactions
+- `migrate_tables`: Migrates the tables to their current DDL and declared indexes, once per run before any other task touches them
+- `get_account_balances_data`: Fetches current balances and returns the IDs of accounts whose balance changed
+- `get_account_transactions_data`: Fetches booked and pending transactions from each account's watermark, incremental sync of booked and full refresh of pending transactions
 
 ## Database Tables
 
-- `account_balances`: Current account balance snapshots
+- `account_balances__history`: Account balances as change events, valid from `valid_from` until `valid_to` (NULL while current)
+- `account_balances`: Current account balance snapshots. **Deprecated** in favour of `account_balances__history`,
+  still written for one more release so its readers can move over, then no longer written
 - `account_transactions__booked`: Confirmed/settled transactions
 - `account_transactions__not_booked`: Pending/unconfirmed transactions
+- `sync_state`: Per-account watermark and last run stats of the incremental sync
 
 ## Requirements
 
@@ -36,26 +40,38 @@ This DAG performs comprehensive data extraction from Comdirect banking API:
 
 ## Data Flow
 
-1. **Balance Extraction**: Fetches all account balances and stores them
-2. **Transaction Sync**: For each account, performs incremental sync of booked transactions
-3. **Pending Transactions**: Refreshes all pending transactions across accounts
+1. **Balance Extraction**: Fetches all account balances, compares them against the current history rows and appends the changed ones.
+   Only accounts with a changed balance or available cash amount, or not backfilled yet, are synced further,
+   runs whose logical date falls on every `FORCE_CHECK_EVERY_HOURS`th hour sync all accounts as a safety net
+2. **Transaction Sync**: Fetches all accounts concurrently, splits the rows by booking status, then performs incremental sync of booked transactions
+3. **Pending Transactions**: Refreshes the pending transactions of each account from the same fetch
 """
 
-from airflow.sdk import dag, task, Metadata
+from airflow.sdk import dag, task, get_current_context, Metadata
 
 from plumbing_core.sources.comdirect import (
     AccountBalance,
-    get_accounts_balances,
     AccountTransaction,
-    get_transaction_data_paginated,
+    get_accounts_balances,
+    get_transactions_for_accounts,
+    iter_booked_transactions,
+    iter_transaction_pages,
+    make_client,
+    split_transactions_by_booking_status,
+    COMDIRECT_INDEXES,
     COMDIRECT_SCHEMAS,
 )
 from plumbing_core.destinations.turso import (
     TursoConfig,
+    TursoSession,
     write_account_balances,
+    write_account_balances_history,
     write_account_transactions_booked,
+    write_account_transactions_booked_batched,
     write_account_transactions_not_booked,
-    get_max_date_string,
+    get_changed_account_ids,
+    get_watermarks,
+    migrate_table,
 )
 from plumbing_airflow.shared.dag_config import (
     get_default_dag_args,
@@ -65,6 +81,7 @@ from plumbing_airflow.shared.dag_config import (
     get_auth_token,
     create_access_token,
     DEFAULT_TRANSACTION_DATE,
+    FORCE_CHECK_EVERY_HOURS,
     TRANSACTION_ASSET,
 )
 
@@ -77,6 +94,22 @@ from typing import Dict, Any, List
 def comdirect_data():
     """Regularly fetches and inserts comdirect account balance and account transaction data into db"""
 
+    @task
+    def migrate_tables() -> None:
+        """Brings existing tables to their typed DDL and declared indexes"""
+
+        db_config: TursoConfig = get_database_config(db_type="turso")
+
+        with TursoSession(db_config) as session:
+            for table_name, ddl in COMDIRECT_SCHEMAS.items():
+                migrate_table(
+                    config=db_config,
+                    table_name=table_name,
+                    ddl=ddl,
+                    indexes=COMDIRECT_INDEXES.get(table_name),
+                    session=session,
+                )
+
     @task
     def get_account_balances_data(
         access_token_json: Dict[str, Any],
@@ -90,110 +123,186 @@ def comdirect_data():
             cfg=cfg, bearer_access_token=access_token.bearer_access_token
         )
 
-        logging.info("Loading to sqlite")
-        db_config: TursoConfig = get_database_config(db_type="turso")
-        record_count = write_account_balances(
-            balances=account_balances,
-            config=db_config,
-            ddl=COMDIRECT_SCHEMAS["account_balances"],
-        )
-        logging.info(f"Loaded {record_count} records")
-
-        return [account.account_id for account in account_balances]
-
-    @task(outlets=[TRANSACTION_ASSET])
-    def get_account_transactions_data_booked(
-        access_token_json: Dict[str, Any], account_ids: List[str]
-    ) -> None:
-        """Gets account transactions data"""
-
-        access_token = create_access_token(access_token_json)
-        cfg = get_api_config(use_env_file=True)
         db_config: TursoConfig = get_database_config(db_type="turso")
-        table_name = "account_transactions__booked"
-        counts = list()  # holds the counts of records loaded for each account
+        balances_table_name = "account_balances__history"
 
-        for account_id in account_ids:
-            # Set default from when to fetch transactions
-            last_transaction_date = DEFAULT_TRANSACTION_DATE
-
-            # Step 1: Get max date from existing transactions table
-            logging.info(f"Getting max date for account: '{account_id}'")
-            max_date = get_max_date_string(
+        with TursoSession(db_config) as session:
+            # Compare against the current history rows before they are closed
+            changed_account_ids = get_changed_account_ids(
                 config=db_config,
-                table_name=table_name,
-                date_field="booking_date",
-                filter_condition=f"account_id = '{account_id}'",
+                balances=account_balances,
+                table_name=balances_table_name,
+                session=session,
             )
-            if max_date:
-                logging.info("Found existing max date")
-                last_transaction_date = pendulum.parse(max_date).date()
 
-            # Step 2: Get and save booked transactions
-            logging.info(f"Getting data from date: '{last_transaction_date}'")
-            transactions: list[AccountTransaction] = get_transaction_data_paginated(
-                cfg=cfg,
-                account_id=account_id,
-                bearer_access_token=access_token.bearer_access_token,
-                last_transaction_date=last_transaction_date,
-                transaction_state="BOOKED",
+            # Accounts without a watermark have not been backfilled yet, retry
+            # them until a backfill succeeds even when their balance is unchanged
+            watermarks = get_watermarks(
+                config=db_config,
+                account_ids=[account.account_id for account in account_balances],
+                table_name="account_transactions__booked",
+                session=session,
+            )
+            changed_account_ids += [
+                account_id
+                for account_id, watermark in watermarks.items()
+                if not watermark and account_id not in changed_account_ids
+            ]
+
+            logging.info("Loading to sqlite")
+            write_result = write_account_balances_history(
+                balances=account_balances,
+                config=db_config,
+                ddl=COMDIRECT_SCHEMAS[balances_table_name],
+                table_name=balances_table_name,
+                session=session,
             )
+            logging.info(f"Loaded {write_result.written} records")
 
-            record_count = write_account_transactions_booked(
-                transactions=transactions,
-                account_id=account_id,
+            # Deprecated snapshot table, kept up to date for one more release
+            write_result = write_account_balances(
+                balances=account_balances,
                 config=db_config,
-                ddl=COMDIRECT_SCHEMAS[table_name],
+                ddl=COMDIRECT_SCHEMAS["account_balances"],
+                write_strategy="upsert",
+                session=session,
+            )
+            logging.info(
+                f"Loaded {write_result.written} records to deprecated snapshot table"
             )
-            logging.info(f"Loaded {record_count} records to booked transactions table")
-            counts.append(record_count)
 
-        logging.info("All done")
-        yield Metadata(asset=TRANSACTION_ASSET, extra={"row_count": sum(counts)})
+        # Pending transactions can change without moving the balance, check all
+        # accounts regularly so nothing is missed for long. The run's date keeps
+        # the decision stable for retries and backfilled runs
+        context = get_current_context()
+        run_date = (
+            context.get("logical_date")
+            or context.get("data_interval_start")
+            or pendulum.now("UTC")
+        )
+        run_hour = pendulum.instance(run_date).in_timezone("UTC").hour
+        if run_hour % FORCE_CHECK_EVERY_HOURS == 0:
+            logging.info("Forced check, syncing transactions of all accounts")
+            return [account.account_id for account in account_balances]
 
-    @task
-    def get_account_transactions_data_not_booked(
+        return changed_account_ids
+
+    @task(outlets=[TRANSACTION_ASSET])
+    def get_account_transactions_data(
         access_token_json: Dict[str, Any], account_ids: List[str]
     ) -> None:
-        """Gets account transactions data"""
+        """Gets booked and not-booked account transactions data in one fetch"""
 
         access_token = create_access_token(access_token_json)
         cfg = get_api_config(use_env_file=True)
         db_config: TursoConfig = get_database_config(db_type="turso")
-        table_name = "account_transactions__not_booked"
-
-        for account_id in account_ids:
-            last_transaction_date = DEFAULT_TRANSACTION_DATE
-
-            logging.info(f"Getting data for account: '{account_id}'")
-            transactions: list[AccountTransaction] = get_transaction_data_paginated(
-                cfg=cfg,
-                account_id=account_id,
-                bearer_access_token=access_token.bearer_access_token,
-                last_transaction_date=last_transaction_date,
-                transaction_state="NOTBOOKED",
-            )
-
-            record_count = write_account_transactions_not_booked(
+        booked_table_name = "account_transactions__booked"
+        not_booked_table_name = "account_transactions__not_booked"
+        counts = list()  # holds the counts of records inserted for each account
+
+        def write_not_booked(
+            account_id: str,
+            transactions: List[AccountTransaction],
+            session: TursoSession,
+        ) -> None:
+            write_result = write_account_transactions_not_booked(
                 transactions=transactions,
                 account_id=account_id,
                 config=db_config,
-                table_name=table_name,
-                delete_keys=["account_id"],
-                ddl=COMDIRECT_SCHEMAS[table_name],
+                table_name=not_booked_table_name,
+                ddl=COMDIRECT_SCHEMAS[not_booked_table_name],
+                session=session,
             )
             logging.info(
-                f"Loaded {record_count} records to not-booked transactions table"
+                f"Loaded {write_result.written} records to not-booked transactions table"
             )
 
+        # One connection and one pull/push with the remote for the whole run
+        with TursoSession(db_config) as session:
+            # Watermarks of all accounts in one lookup against the sync state table
+            watermarks = get_watermarks(
+                config=db_config,
+                account_ids=account_ids,
+                table_name=booked_table_name,
+                session=session,
+            )
+
+            # Step 1: Accounts without a watermark backfill their whole history,
+            # stream it page by page into committed batches to bound memory
+            backfill_account_ids = [
+                account_id
+                for account_id in account_ids
+                if not watermarks.get(account_id)
+            ]
+            with make_client(cfg) as http_client:
+                for account_id in backfill_account_ids:
+                    logging.info(
+                        f"Backfilling account '{account_id}' from "
+                        f"'{DEFAULT_TRANSACTION_DATE}'"
+                    )
+                    pages = iter_transaction_pages(
+                        cfg=cfg,
+                        account_id=account_id,
+                        bearer_access_token=access_token.bearer_access_token,
+                        last_transaction_date=DEFAULT_TRANSACTION_DATE,
+                        transaction_state="BOTH",
+                        http_client=http_client,
+                    )
+                    not_booked: List[AccountTransaction] = list()
+                    write_result = write_account_transactions_booked_batched(
+                        transactions=iter_booked_transactions(pages, not_booked),
+                        account_id=account_id,
+                        config=db_config,
+                        ddl=COMDIRECT_SCHEMAS[booked_table_name],
+                        write_strategy="upsert",
+                        session=session,
+                    )
+                    logging.info(
+                        f"Loaded {write_result.written} records to booked transactions table"
+                    )
+                    counts.append(write_result.inserted)
+                    write_not_booked(account_id, not_booked, session)
+
+            # Step 2: Fetch the other accounts from their watermarks concurrently,
+            # pending transactions carry no booking date and are always included
+            last_transaction_dates = {
+                account_id: pendulum.parse(watermarks[account_id]).date()
+                for account_id in account_ids
+                if account_id not in backfill_account_ids
+            }
+            logging.info(f"Getting data from dates: '{last_transaction_dates}'")
+            transactions_by_account = get_transactions_for_accounts(
+                cfg=cfg,
+                bearer_access_token=access_token.bearer_access_token,
+                last_transaction_dates=last_transaction_dates,
+                transaction_state="BOTH",
+            )
+
+            # Step 3: Split by booking status and save them one account after
+            # another on the shared connection
+            for account_id, transactions in transactions_by_account.items():
+                booked, not_booked = split_transactions_by_booking_status(transactions)
+                write_result = write_account_transactions_booked(
+                    transactions=booked,
+                    account_id=account_id,
+                    config=db_config,
+                    ddl=COMDIRECT_SCHEMAS[booked_table_name],
+                    write_strategy="upsert",
+                    session=session,
+                )
+                logging.info(
+                    f"Loaded {write_result.written} records to booked transactions table"
+                )
+                counts.append(write_result.inserted)
+                write_not_booked(account_id, not_booked, session)
+
         logging.info("All done")
+        yield Metadata(asset=TRANSACTION_ASSET, extra={"row_count": sum(counts)})
 
     access_token = get_auth_token()
     account_ids = get_account_balances_data(access_token)
-    get_account_transactions_data_booked(
-        access_token_json=access_token, account_ids=account_ids
-    )
-    get_account_transactions_data_not_booked(
+    migrate_tables() >> account_ids
+    get_account_transactions_data(
         access_token_json=access_token, account_ids=account_ids
     )
 
@@ -16,6 +16,9 @@ from plumbing_core.destinations.sqlite import SQLiteConfig
 DEFAULT_START_DATE = datetime(2025, 4, 1)
 COMDIRECT_ACCESS_TOKEN_KEY = "comdirect_access_token"
 DEFAULT_TRANSACTION_DATE = Date(2025, 1, 1)
+FORCE_CHECK_EVERY_HOURS = 6
+CATEGORIZATION_CHUNK_SIZE = 100
+CATEGORIZATION_MAX_PER_RUN = 1000
 TRANSACTION_ASSET = Asset(
     "comdirect_transactions__booked", extra={"source": "comdirect"}
 )
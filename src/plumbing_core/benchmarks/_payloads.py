@@ -0,0 +1,47 @@
+"""Synthetic Comdirect API payloads shared by the benchmark scripts"""
+
+import pendulum
+
+
+def make_transaction_payload(i: int, booking_status: str = "BOOKED") -> dict:
+    """Builds a raw transaction payload as returned by the Comdirect API"""
+
+    booking_date = pendulum.date(2025, 1, 1).add(days=i % 365).to_date_string()
+
+    return {
+        "reference": f"REF{i:010d}",
+        "bookingStatus": booking_status,
+        "bookingDate": booking_date,
+        "amount": {"value": f"{-(i % 500) - 0.99:.2f}", "unit": "EUR"},
+        "remitter": {"holderName": f"Remitter {i % 50}"},
+        "deptor": None,
+        "creditor": None,
+        "valutaDate": booking_date,
+        "directDebitCreditorId": None,
+        "directDebitMandateId": None,
+        "endToEndReference": f"E2E{i}",
+        "newTransaction": False,
+        "remittanceInfo": f"01Payment   number {i}     for services",
+        "transactionType": {"key": "DIRECT_DEBIT", "text": "Lastschrift"},
+    }
+
+
+def make_balance_payload(i: int) -> dict:
+    """Builds a raw account balance payload as returned by the Comdirect API"""
+
+    return {
+        "account": {
+            "accountId": f"ACCOUNT{i:04d}",
+            "accountDisplayId": f"{1000000 + i}",
+            "currency": "EUR",
+            "clientId": "CLIENT",
+            "accountType": {"key": "CA", "text": "Girokonto"},
+            "iban": f"DE0000000000000{i:04d}",
+            "bic": "COBADEHD001",
+            "creditLimit": {"value": "0", "unit": "EUR"},
+        },
+        "balance": {"value": f"{1000 + i}.00", "unit": "EUR"},
+        "balanceEUR": {"value": f"{1000 + i}.00", "unit": "EUR"},
+        "availableCashAmount": {"value": f"{1000 + i}.00", "unit": "EUR"},
+        "availableCashAmountEUR": {"value": f"{1000 + i}.00", "unit": "EUR"},
+    }
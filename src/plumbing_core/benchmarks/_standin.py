@@ -0,0 +1,201 @@
+"""Recorded-response stand-in for the Comdirect banking API"""
+
+import asyncio
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+from _payloads import make_balance_payload, make_transaction_payload
+
+TRANSACTIONS_PATH = re.compile(
+    r"/api/banking/v1/accounts/(?P<account_id>[^/]+)/transactions"
+)
+BALANCES_PATH = "/api/banking/clients/user/v2/accounts/balances"
+TOKEN_PATH = "/oauth/token"
+DEFAULT_PAGING_COUNT = 20
+
+
+class RecordedComdirectAPI:
+    """Serves recorded balances and transactions, honouring paging and date params"""
+
+    def __init__(
+        self,
+        account_count: int = 1,
+        transactions_per_account: int = 1_000,
+        latency_seconds: float = 0.0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.balances = [make_balance_payload(i) for i in range(account_count)]
+        # The API returns the newest transactions first
+        self.transactions = sorted(
+            [make_transaction_payload(i) for i in range(transactions_per_account)],
+            key=lambda transaction: transaction["bookingDate"],
+            reverse=True,
+        )
+        self.requests = 0
+        self.rows_served = 0
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.rows_served = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle_with_latency)
+
+    def async_transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.ahandle_with_latency)
+
+    def handle_with_latency(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self.latency_seconds)
+        return self.handle(request)
+
+    async def ahandle_with_latency(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency_seconds)
+        return self.handle(request)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+
+        if request.url.path == TOKEN_PATH:
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": "token",
+                    "token_type": "bearer",
+                    "refresh_token": "refresh",
+                    "expires_in": 599,
+                    "scope": "TWO_FACTOR",
+                    "kdnr": "1",
+                    "bpid": "1",
+                    "kontaktId": 1,
+                },
+            )
+
+        if request.url.path == BALANCES_PATH:
+            return httpx.Response(200, json={"values": self.balances})
+
+        if TRANSACTIONS_PATH.fullmatch(request.url.path):
+            params = request.url.params
+            first = int(params.get("paging-first", 0))
+            count = int(params.get("paging-count", DEFAULT_PAGING_COUNT))
+            min_date = params.get("min-bookingDate")
+            max_date = params.get("max-bookingDate")
+
+            matching = [
+                transaction
+                for transaction in self.transactions
+                if (not min_date or transaction["bookingDate"] >= min_date)
+                and (not max_date or transaction["bookingDate"] <= max_date)
+            ]
+            values = matching[first : first + count]
+            self.rows_served += len(values)
+
+            return httpx.Response(
+                200,
+                json={
+                    "paging": {"index": first, "matches": len(matching)},
+                    "values": values,
+                },
+            )
+
+        return httpx.Response(404)
+
+
+def make_standin_client_factory(api: RecordedComdirectAPI):
+    """Drop-in replacement for `make_client` that talks to the stand-in"""
+
+    def make_client(cfg) -> httpx.Client:
+        return httpx.Client(
+            base_url=str(cfg.base_url),
+            headers={"Accept": "application/json", "Content-Type": "application/json"},
+            transport=api.transport(),
+        )
+
+    return make_client
+
+
+class _TLSStandinServer(ThreadingHTTPServer):
+    """HTTPS server that counts the TLS handshakes it completes"""
+
+    daemon_threads = True
+
+    def __init__(self, api: RecordedComdirectAPI, ssl_context: ssl.SSLContext):
+        super().__init__(("127.0.0.1", 0), _TLSStandinHandler)
+        self.api = api
+        self.ssl_context = ssl_context
+        self.handshakes = 0
+
+    def get_request(self):
+        sock, address = super().get_request()
+        # Wrapping an accepted socket performs the server side of the handshake
+        tls_sock = self.ssl_context.wrap_socket(sock, server_side=True)
+        self.handshakes += 1
+        return tls_sock, address
+
+
+class _TLSStandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Keep-alive responses otherwise stall on Nagle's algorithm and delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        request = httpx.Request(
+            method=self.command,
+            url=f"https://localhost{self.path}",
+            headers=dict(self.headers),
+            content=self.rfile.read(length) if length else b"",
+        )
+        response = self.server.api.handle(request)
+
+        self.send_response(response.status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response.content)))
+        self.end_headers()
+        self.wfile.write(response.content)
+
+    do_GET = do_POST = do_PATCH = _respond
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@contextmanager
+def serve_over_tls(api: RecordedComdirectAPI):
+    """Serves the stand-in over HTTPS on localhost with a throwaway certificate
+
+    Yields the server and a client SSL context that trusts its certificate.
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = Path(tmp) / "cert.pem", Path(tmp) / "key.pem"
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-keyout", str(key), "-out", str(cert), "-days", "1",
+                "-subj", "/CN=localhost",
+                "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            ],
+            check=True,
+            capture_output=True,
+        )  # fmt: skip
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert, key)
+        client_context = ssl.create_default_context(cafile=str(cert))
+
+        server = _TLSStandinServer(api, server_context)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server, client_context
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+
+import httpx
+import pendulum
+
+from _standin import RecordedComdirectAPI, make_standin_client_factory
+
+from plumbing_core.sources.comdirect import (
+    APIConfig,
+    AsyncComdirectClient,
+    get_transaction_data_paginated,
+)
+from plumbing_core.sources.comdirect import helpers
+
+ACCOUNT_COUNT = 6
+LATENCY_SECONDS = 0.05
+PAGE_SIZE = 100
+
+
+def main() -> None:
+    """Compares wall-clock time of serial and concurrent per-account fetching"""
+    logging.basicConfig(level=logging.WARNING)
+
+    api = RecordedComdirectAPI(
+        account_count=ACCOUNT_COUNT,
+        transactions_per_account=1_000,
+        latency_seconds=LATENCY_SECONDS,
+    )
+    helpers.make_client = make_standin_client_factory(api)
+    cfg = APIConfig(client_id="id", client_secret="secret", username="u", password="p")
+
+    newest = pendulum.parse(api.transactions[0]["bookingDate"]).date()
+    account_ids = [f"ACCOUNT{i:04d}" for i in range(ACCOUNT_COUNT)]
+    # Spread the watermarks so accounts need different numbers of pages
+    last_transaction_dates = {
+        account_id: newest.subtract(days=10 * (i + 1))
+        for i, account_id in enumerate(account_ids)
+    }
+
+    start = time.perf_counter()
+    for account_id in account_ids:
+        get_transaction_data_paginated(
+            cfg=cfg,
+            account_id=account_id,
+            bearer_access_token="Bearer x",
+            last_transaction_date=last_transaction_dates[account_id],
+            transaction_state="BOOKED",
+            page_size=PAGE_SIZE,
+        )
+    serial_seconds = time.perf_counter() - start
+
+    # Slowest single account on its own
+    start = time.perf_counter()
+    get_transaction_data_paginated(
+        cfg=cfg,
+        account_id=account_ids[-1],
+        bearer_access_token="Bearer x",
+        last_transaction_date=last_transaction_dates[account_ids[-1]],
+        transaction_state="BOOKED",
+        page_size=PAGE_SIZE,
+    )
+    slowest_seconds = time.perf_counter() - start
+
+    async def fetch_all():
+        http_client = httpx.AsyncClient(
+            base_url=str(cfg.base_url), transport=api.async_transport()
+        )
+        async with AsyncComdirectClient(
+            cfg=cfg,
+            bearer_access_token="Bearer x",
+            max_concurrency=ACCOUNT_COUNT,
+            http_client=http_client,
+        ) as client:
+            await client.get_transactions_for_accounts(
+                last_transaction_dates, transaction_state="BOOKED", page_size=PAGE_SIZE
+            )
+        await http_client.aclose()
+
+    start = time.perf_counter()
+    asyncio.run(fetch_all())
+    concurrent_seconds = time.perf_counter() - start
+
+    print(f"Serial, {ACCOUNT_COUNT} accounts:      {serial_seconds:.2f}s")
+    print(f"Concurrent, {ACCOUNT_COUNT} accounts:  {concurrent_seconds:.2f}s")
+    print(f"Slowest single account: {slowest_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
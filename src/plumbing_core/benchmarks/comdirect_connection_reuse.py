@@ -0,0 +1,106 @@
+import logging
+import time
+
+import httpx
+import pendulum
+
+from _standin import RecordedComdirectAPI, serve_over_tls
+
+from plumbing_core.sources.comdirect import (
+    AccessToken,
+    APIConfig,
+    get_accounts_balances,
+    get_transaction_data_paginated,
+    refresh_token,
+)
+from plumbing_core.sources.comdirect import helpers
+
+ACCOUNT_COUNT = 6
+PAGE_SIZE = 100
+
+
+def _dag_run(cfg, token, account_ids, newest, http_client=None) -> None:
+    """The API calls of one refresh and data DAG run, without the Airflow tasks"""
+
+    token = refresh_token(cfg=cfg, token=token, http_client=http_client)
+    get_accounts_balances(
+        cfg=cfg,
+        bearer_access_token=token.bearer_access_token,
+        http_client=http_client,
+    )
+    for i, account_id in enumerate(account_ids):
+        for transaction_state in ["BOOKED", "NOTBOOKED"]:
+            get_transaction_data_paginated(
+                cfg=cfg,
+                account_id=account_id,
+                bearer_access_token=token.bearer_access_token,
+                last_transaction_date=newest.subtract(days=10 * (i + 1)),
+                transaction_state=transaction_state,
+                page_size=PAGE_SIZE,
+                http_client=http_client,
+            )
+
+
+def main() -> None:
+    """Compares TLS handshakes per run with a client per call and a shared client"""
+    logging.basicConfig(level=logging.WARNING)
+
+    api = RecordedComdirectAPI(
+        account_count=ACCOUNT_COUNT, transactions_per_account=500
+    )
+    newest = pendulum.parse(api.transactions[0]["bookingDate"]).date()
+    account_ids = [f"ACCOUNT{i:04d}" for i in range(ACCOUNT_COUNT)]
+    token = AccessToken(
+        access_token="token",
+        token_type="bearer",
+        refresh_token="refresh",
+        expires_in=599,
+        scope="TWO_FACTOR",
+        kdnr="1",
+        bpid="1",
+        kontaktId=1,
+    )
+
+    with serve_over_tls(api) as (server, ssl_context):
+        cfg = APIConfig(
+            base_url=f"https://localhost:{server.server_address[1]}",
+            client_id="id",
+            client_secret="secret",
+            username="u",
+            password="p",
+        )
+
+        # Same settings as `make_client`, trusting the throwaway certificate
+        def make_client(cfg) -> httpx.Client:
+            return httpx.Client(
+                base_url=str(cfg.base_url),
+                headers=helpers.HTTP_HEADERS,
+                limits=helpers.HTTP_LIMITS,
+                timeout=helpers.HTTP_TIMEOUT,
+                verify=ssl_context,
+            )
+
+        helpers.make_client = make_client
+
+        server.handshakes, api.requests = 0, 0
+        start = time.perf_counter()
+        _dag_run(cfg, token, account_ids, newest)
+        per_call_seconds = time.perf_counter() - start
+        per_call_handshakes, requests = server.handshakes, api.requests
+
+        server.handshakes, api.requests = 0, 0
+        start = time.perf_counter()
+        with make_client(cfg) as http_client:
+            _dag_run(cfg, token, account_ids, newest, http_client=http_client)
+        shared_seconds = time.perf_counter() - start
+        shared_handshakes = server.handshakes
+
+    print(f"Requests per run:   {requests}")
+    print(
+        f"Client per call:    {per_call_handshakes} handshakes, {per_call_seconds:.2f}s"
+    )
+    print(f"Shared client:      {shared_handshakes} handshakes, {shared_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
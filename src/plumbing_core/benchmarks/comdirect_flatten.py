@@ -0,0 +1,78 @@
+import logging
+import time
+from typing import Any
+
+from _payloads import make_transaction_payload
+
+from plumbing_core.sources.comdirect import AccountTransaction
+from plumbing_core.sources.comdirect.constants import ACCOUNT_TRANSACTION_FIELD_PATHS
+from plumbing_core.sources.comdirect.types import _flatten_account_transaction
+
+PAYLOAD_COUNT = 100_000
+
+logger = logging.getLogger(__name__)
+
+
+def _legacy_make_flat(
+    acct: dict[str, Any], field_paths: dict[str, list[str]]
+) -> dict[str, Any]:
+    """Previous flattener: walks every path key by key"""
+
+    return {
+        field: _legacy_extract_from_path(acct, path)
+        for field, path in field_paths.items()
+    }
+
+
+def _legacy_extract_from_path(data: dict[str, Any], path: list[str]) -> Any:
+    """Previous path walk, formatting the payload on every miss"""
+
+    for p in path:
+        try:
+            data = data[p]
+        except KeyError:
+            logger.debug(
+                f"Could not traverse path due to key error. Did not find '{p}' for '{path}' in data: '{data}'"
+            )
+            return None
+        except TypeError:
+            logger.debug(
+                f"Could not traverse path due to value error. Found 'None' at '{p}' for '{path}' in data: '{data}'"
+            )
+            return None
+
+    return data
+
+
+def _time_per_record(flatten, payloads) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        flatten(payload)
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+
+def main() -> None:
+    """Compares the per-record flatten cost on synthetic transaction payloads"""
+    logging.basicConfig(level=logging.WARNING)
+
+    payloads = [make_transaction_payload(i) for i in range(PAYLOAD_COUNT)]
+
+    legacy_us = _time_per_record(
+        lambda payload: _legacy_make_flat(payload, ACCOUNT_TRANSACTION_FIELD_PATHS),
+        payloads,
+    )
+    compiled_us = _time_per_record(_flatten_account_transaction, payloads)
+
+    start = time.perf_counter()
+    for payload in payloads:
+        AccountTransaction(**payload)
+    validate_us = (time.perf_counter() - start) / PAYLOAD_COUNT * 1e6
+
+    print(f"Flatten {PAYLOAD_COUNT:,} payloads, per record:")
+    print(f"  path walk:        {legacy_us:.2f} µs")
+    print(f"  compiled:         {compiled_us:.2f} µs ({legacy_us / compiled_us:.1f}x)")
+    print(f"  full validation:  {validate_us:.2f} µs (with compiled flatten)")
+
+
+if __name__ == "__main__":
+    main()
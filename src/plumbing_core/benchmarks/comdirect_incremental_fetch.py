@@ -0,0 +1,89 @@
+import json
+import logging
+
+import pendulum
+
+from _standin import RecordedComdirectAPI, make_standin_client_factory
+
+from plumbing_core.sources.comdirect import APIConfig, AccountTransaction
+from plumbing_core.sources.comdirect import data, helpers
+from plumbing_core.sources.comdirect.helpers import (
+    get_client_request_id,
+    get_request_url,
+    get_session_id,
+)
+
+HISTORY_ROWS = 5_000
+ACCOUNT_ID = "ACCOUNT0000"
+
+
+def _legacy_paginated(cfg, account_id, bearer_access_token, last_transaction_date):
+    """Previous pagination: API default page size, stop once a page is fully older"""
+
+    pagination_index = 0
+    result = []
+    http_client = helpers.make_client(cfg=cfg)
+    try:
+        url = get_request_url(
+            http_client.base_url, f"api/banking/v1/accounts/{account_id}/transactions"
+        )
+        while True:
+            headers = {
+                "Authorization": bearer_access_token,
+                "x-http-request-info": json.dumps(
+                    {"clientRequestId": get_client_request_id(get_session_id())}
+                ),
+            }
+            params = {"transactionState": "BOOKED", "paging-first": pagination_index}
+            response = http_client.get(url=url, params=params, headers=headers)
+            if not response.json()["values"]:
+                break
+            res = [AccountTransaction(**t) for t in response.json()["values"]]
+            result.extend(res)
+            booking_dates = [t.booking_date for t in res if t.booking_date]
+            if not booking_dates:
+                break
+            pagination_index += len(res)
+            if max(booking_dates) < last_transaction_date:
+                break
+        return result
+    finally:
+        http_client.close()
+
+
+def main() -> None:
+    """Compares pages fetched and rows parsed per incremental run"""
+    logging.basicConfig(level=logging.WARNING)
+
+    api = RecordedComdirectAPI(transactions_per_account=HISTORY_ROWS)
+    helpers.make_client = make_standin_client_factory(api)
+    cfg = APIConfig(client_id="id", client_secret="secret", username="u", password="p")
+
+    newest = pendulum.parse(api.transactions[0]["bookingDate"]).date()
+    print(
+        f"{'days since watermark':>21} {'pages before':>13} {'rows before':>12} {'pages after':>12} {'rows after':>11}"
+    )
+    for days in [0, 2, 14, 60]:
+        watermark = newest.subtract(days=days)
+
+        api.reset_counters()
+        legacy_rows = len(_legacy_paginated(cfg, ACCOUNT_ID, "Bearer x", watermark))
+        legacy_pages = api.requests
+
+        api.reset_counters()
+        rows = len(
+            data.get_transaction_data_paginated(
+                cfg=cfg,
+                account_id=ACCOUNT_ID,
+                bearer_access_token="Bearer x",
+                last_transaction_date=watermark,
+                transaction_state="BOOKED",
+            )
+        )
+        pages = api.requests
+
+        print(f"{days:>21} {legacy_pages:>13} {legacy_rows:>12} {pages:>12} {rows:>11}")
+
+
+if __name__ == "__main__":
+    main()
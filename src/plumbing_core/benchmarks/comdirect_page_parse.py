@@ -0,0 +1,93 @@
+import json
+import logging
+import time
+
+import pendulum
+
+from _payloads import make_transaction_payload
+
+from plumbing_core.sources.comdirect import AccountTransaction, validate_transactions
+from plumbing_core.sources.comdirect import helpers
+from plumbing_core.sources.comdirect.types import _parse_date
+
+PAGE_SIZE = 500
+PAGE_COUNT = 100
+
+
+def _legacy_parse(body: bytes) -> list[AccountTransaction]:
+    """Previous page parse: the body decoded once per use, one model per row"""
+
+    values = json.loads(body)["values"]
+    json.loads(body)["values"]  # logged the record count
+    [t["bookingDate"] for t in json.loads(body)["values"] if t.get("bookingDate")]
+    return [AccountTransaction(**transaction) for transaction in values]
+
+
+def _parse(body: bytes, trusted: bool = False) -> list[AccountTransaction]:
+    return validate_transactions(helpers.decode_json(body)["values"], trusted=trusted)
+
+
+def _time(parse, bodies) -> float:
+    start = time.perf_counter()
+    for body in bodies:
+        parse(body)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Compares parse throughput of large transaction pages"""
+    logging.basicConfig(level=logging.WARNING)
+
+    bodies = [
+        json.dumps(
+            {
+                "values": [
+                    make_transaction_payload(page * PAGE_SIZE + i)
+                    for i in range(PAGE_SIZE)
+                ]
+            }
+        ).encode()
+        for page in range(PAGE_COUNT)
+    ]
+    rows = PAGE_SIZE * PAGE_COUNT
+
+    legacy_seconds = _time(_legacy_parse, bodies)
+    bulk_seconds = _time(_parse, bodies)
+    trusted_seconds = _time(lambda body: _parse(body, trusted=True), bodies)
+
+    print(f"{PAGE_COUNT} pages of {PAGE_SIZE} transactions, rows per second:")
+    print(f"  decode per use, model per row: {rows / legacy_seconds:>9,.0f}")
+    print(
+        f"  decode once, TypeAdapter:      {rows / bulk_seconds:>9,.0f} "
+        f"({legacy_seconds / bulk_seconds:.1f}x)"
+    )
+    print(
+        f"  trusted, model_construct:      {rows / trusted_seconds:>9,.0f} "
+        f"({legacy_seconds / trusted_seconds:.1f}x)"
+    )
+    print(f"  orjson installed: {helpers.orjson is not None}")
+
+    dates = [
+        transaction["bookingDate"]
+        for body in bodies
+        for transaction in json.loads(body)["values"]
+    ]
+    _parse_date.cache_clear()
+    start = time.perf_counter()
+    for date in dates:
+        pendulum.parse(date).date()
+    pendulum_us = (time.perf_counter() - start) / len(dates) * 1e6
+    start = time.perf_counter()
+    for date in dates:
+        _parse_date(date)
+    cached_us = (time.perf_counter() - start) / len(dates) * 1e6
+
+    print(f"{len(dates):,} booking dates ({len(set(dates))} distinct), per date:")
+    print(f"  pendulum.parse:        {pendulum_us:.2f} µs")
+    print(
+        f"  fromisoformat, cached: {cached_us:.2f} µs ({pendulum_us / cached_us:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import logging
+import tempfile
+import time
+import tracemalloc
+from itertools import chain
+from pathlib import Path
+
+import pendulum
+
+from _standin import RecordedComdirectAPI, make_standin_client_factory
+
+from plumbing_core.destinations.turso import (
+    TursoConfig,
+    write_account_transactions_booked,
+    write_account_transactions_booked_batched,
+)
+from plumbing_core.sources.comdirect import (
+    APIConfig,
+    COMDIRECT_SCHEMAS,
+    get_transaction_data_paginated,
+    iter_transaction_pages,
+)
+from plumbing_core.sources.comdirect import helpers
+
+HISTORY_ROWS = 20_000
+BATCH_SIZE = 1_000
+ACCOUNT_ID = "ACCOUNT0000"
+TABLE_NAME = "account_transactions__booked"
+
+
+def _collect_then_write(cfg, db_config, since) -> None:
+    """Previous backfill: the whole history in one list, written in one go"""
+
+    transactions = get_transaction_data_paginated(
+        cfg=cfg,
+        account_id=ACCOUNT_ID,
+        bearer_access_token="Bearer x",
+        last_transaction_date=since,
+        transaction_state="BOOKED",
+    )
+    write_account_transactions_booked(
+        transactions=transactions,
+        account_id=ACCOUNT_ID,
+        config=db_config,
+        ddl=COMDIRECT_SCHEMAS[TABLE_NAME],
+        write_strategy="upsert",
+    )
+
+
+def _stream(cfg, db_config, since) -> None:
+    """Current backfill: pages streamed into batches committed as they fill"""
+
+    pages = iter_transaction_pages(
+        cfg=cfg,
+        account_id=ACCOUNT_ID,
+        bearer_access_token="Bearer x",
+        last_transaction_date=since,
+        transaction_state="BOOKED",
+    )
+    write_account_transactions_booked_batched(
+        transactions=chain.from_iterable(pages),
+        account_id=ACCOUNT_ID,
+        config=db_config,
+        ddl=COMDIRECT_SCHEMAS[TABLE_NAME],
+        write_strategy="upsert",
+        batch_size=BATCH_SIZE,
+    )
+
+
+def _measure(backfill, cfg, since) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_config = TursoConfig(db_path=Path(tmp) / "backfill.db")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        backfill(cfg, db_config, since)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return peak / 1024**2, seconds
+
+
+def main() -> None:
+    """Compares peak Python memory of a first-time backfill, as the DAG writes it"""
+    logging.basicConfig(level=logging.WARNING)
+
+    api = RecordedComdirectAPI(transactions_per_account=HISTORY_ROWS)
+    helpers.make_client = make_standin_client_factory(api)
+    cfg = APIConfig(client_id="id", client_secret="secret", username="u", password="p")
+    since = pendulum.date(2000, 1, 1)
+
+    collect_mb, collect_seconds = _measure(_collect_then_write, cfg, since)
+    stream_mb, stream_seconds = _measure(_stream, cfg, since)
+
+    print(f"Backfill of {HISTORY_ROWS:,} transactions, peak traced memory:")
+    print(f"  collect, then write:     {collect_mb:6.1f} MiB ({collect_seconds:.1f}s)")
+    print(
+        f"  stream, batches of {BATCH_SIZE}: {stream_mb:6.1f} MiB ({stream_seconds:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
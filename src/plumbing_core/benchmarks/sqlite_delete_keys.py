@@ -0,0 +1,85 @@
+import logging
+import time
+
+import duckdb
+import pyarrow as pa
+
+from plumbing_core.destinations.sqlite.writers import _delete_and_insert
+
+TABLE_NAME = "account_transactions__not_booked"
+DELETE_KEYS = ["account_id", "reference"]
+KEY_COUNTS = [100, 10_000, 100_000]
+
+
+def _make_table(key_count: int) -> pa.Table:
+    return pa.table(
+        {
+            "account_id": ["ACCOUNT"] * key_count,
+            "reference": [f"REF'{i:08d}" for i in range(key_count)],
+            "amount__value": [-1.0] * key_count,
+        }
+    )
+
+
+def _legacy_delete(conn, data: pa.Table, table_name: str) -> None:
+    """Previous delete+insert: one OR-ed condition per row of the input"""
+
+    delete_conditions = []
+    for row in data.to_pylist():
+        conditions = []
+        for key in DELETE_KEYS:
+            value = row[key]
+            if value is None:
+                conditions.append(f"{key} IS NULL")
+            elif isinstance(value, str):
+                escaped_value = str(value).replace("'", "''")
+                conditions.append(f"{key} = '{escaped_value}'")
+            else:
+                conditions.append(f"{key} = {value}")
+        delete_conditions.append(f"({' AND '.join(conditions)})")
+
+    where_clause = " OR ".join(delete_conditions)
+    conn.execute(f"DELETE FROM sqlite_db.{table_name} WHERE {where_clause}")
+    conn.execute(f"INSERT INTO sqlite_db.{table_name} FROM data")
+
+
+def _semi_join_delete(conn, data: pa.Table, table_name: str) -> None:
+    """Current delete+insert: semi-join against the scanned Arrow table"""
+
+    _delete_and_insert(
+        conn=conn, data=data, table_name=table_name, delete_keys=DELETE_KEYS
+    )
+
+
+def _time_delete(delete, data: pa.Table) -> float:
+    # The 'sqlite' extension is not needed to compare the query shapes, an
+    # in-memory database attached under the same name stands in for the file
+    with duckdb.connect() as conn:
+        conn.execute("ATTACH ':memory:' AS sqlite_db")
+        conn.execute(f"CREATE TABLE sqlite_db.{TABLE_NAME} AS FROM data")
+        conn.execute(f"INSERT INTO sqlite_db.{TABLE_NAME} FROM data")
+
+        start = time.perf_counter()
+        delete(conn, data, TABLE_NAME)
+        elapsed = time.perf_counter() - start
+
+        row_count = conn.execute(f"SELECT COUNT(*) FROM sqlite_db.{TABLE_NAME}")
+        assert row_count.fetchone()[0] == len(data)
+
+        return elapsed
+
+
+def main() -> None:
+    """Compares the OR-chain and the semi-join delete+insert of the DuckDB writer"""
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'keys':>8} {'or-chain s':>11} {'semi-join s':>12} {'speedup':>8}")
+    for key_count in KEY_COUNTS:
+        data = _make_table(key_count)
+        before = _time_delete(_legacy_delete, data)
+        after = _time_delete(_semi_join_delete, data)
+        print(f"{key_count:>8} {before:>11.3f} {after:>12.3f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
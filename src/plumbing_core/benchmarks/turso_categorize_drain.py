@@ -0,0 +1,120 @@
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from _payloads import make_transaction_payload
+
+from plumbing_core.destinations.turso import (
+    TursoConfig,
+    TursoSession,
+    iter_transactions_to_categorize,
+)
+from plumbing_core.destinations.turso.writers import _bulk_insert, _serialize_rows
+from plumbing_core.sources.comdirect import AccountTransaction, COMDIRECT_SCHEMAS
+
+SOURCE_TABLE_NAME = "account_transactions__booked"
+CATEGORIZATION_TABLE_NAME = "account_transactions__categorized"
+ROW_COUNTS = [2_000, 5_000, 10_000]
+CHUNK_SIZE = 100
+
+
+def _setup(config: TursoConfig, row_count: int) -> None:
+    transactions = [
+        AccountTransaction(**make_transaction_payload(i)).model_copy(
+            update={"account_id": "ACCOUNT"}
+        )
+        for i in range(row_count)
+    ]
+    columns, rows = _serialize_rows(transactions)
+    with TursoSession(config) as session:
+        conn = session.conn
+        for table_name in [SOURCE_TABLE_NAME, CATEGORIZATION_TABLE_NAME]:
+            conn.execute(f"DROP TABLE IF EXISTS main.{table_name}")
+        conn.execute(
+            f"CREATE TABLE main.{SOURCE_TABLE_NAME} "
+            + COMDIRECT_SCHEMAS[SOURCE_TABLE_NAME]
+        )
+        conn.execute(
+            f"CREATE TABLE main.{CATEGORIZATION_TABLE_NAME} "
+            "(account_id TEXT, reference TEXT)"
+        )
+        _bulk_insert(
+            conn=conn, table_name=SOURCE_TABLE_NAME, columns=columns, rows=rows
+        )
+        conn.commit()
+
+
+def _categorize(conn, chunk: list) -> None:
+    conn.executemany(
+        f"INSERT INTO main.{CATEGORIZATION_TABLE_NAME} VALUES (?, ?)",
+        [(row[0], row[1]) for row in chunk],
+    )
+    conn.commit()
+
+
+def _drain_legacy(config: TursoConfig) -> int:
+    """Previous reader: sorts and anti-joins the whole table again for every chunk"""
+
+    select_sql = f"""
+        SELECT t1.account_id, t1.reference
+        FROM main.{SOURCE_TABLE_NAME} t1
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM main.{CATEGORIZATION_TABLE_NAME} t2
+            WHERE t1.account_id = t2.account_id
+                AND t1.reference = t2.reference
+        )
+        ORDER BY _inserted_at_ts DESC
+        LIMIT {CHUNK_SIZE}
+    """
+    row_count = 0
+    with TursoSession(config) as session:
+        while chunk := session.conn.execute(select_sql).fetchall():
+            _categorize(session.conn, chunk)
+            row_count += len(chunk)
+
+    return row_count
+
+
+def _drain_keyset(config: TursoConfig) -> int:
+    """Current reader: timestamp keyset chunks with an indexed categorization lookup"""
+
+    row_count = 0
+    with TursoSession(config) as session:
+        for chunk in iter_transactions_to_categorize(
+            config=config, chunk_size=CHUNK_SIZE, session=session
+        ):
+            _categorize(
+                session.conn, [(row["account_id"], row["reference"]) for row in chunk]
+            )
+            row_count += len(chunk)
+
+    return row_count
+
+
+def _time_drain(config: TursoConfig, drain, row_count: int) -> float:
+    _setup(config, row_count)
+    start = time.perf_counter()
+    assert drain(config) == row_count
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Compares draining a categorization backlog chunk by chunk"""
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = TursoConfig(db_path=Path(tmp_dir) / "bench.db")
+
+        print(f"{'rows':>8} {'re-sort s':>10} {'keyset s':>9} {'speedup':>8}")
+        for row_count in ROW_COUNTS:
+            before = _time_drain(config, _drain_legacy, row_count)
+            after = _time_drain(config, _drain_keyset, row_count)
+            print(
+                f"{row_count:>8} {before:>10.2f} {after:>9.2f} {before / after:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from _payloads import make_transaction_payload
+
+from plumbing_core.sources.comdirect import AccountTransaction, COMDIRECT_SCHEMAS
+from plumbing_core.destinations.turso import TursoConfig, get_turso_connection
+from plumbing_core.destinations.turso.writers import _bulk_insert, _serialize_rows
+
+TABLE_NAME = "staging_account_transactions__booked"
+ROW_COUNTS = [1_000, 10_000, 100_000]
+
+
+def _row_by_row(conn, transactions: list[AccountTransaction]) -> None:
+    """Previous staging load: one `model_dump` and one `execute` per row"""
+
+    columns = list(transactions[0].model_dump().keys())
+    placeholders = ", ".join(["?" for _ in columns])
+    insert_sql = (
+        f"INSERT INTO main.{TABLE_NAME} ({', '.join(columns)}) VALUES ({placeholders})"
+    )
+    for row in transactions:
+        conn.execute(insert_sql, list(row.model_dump(mode="json").values()))
+
+
+def _bulk(conn, transactions: list[AccountTransaction]) -> None:
+    """Current staging load: serialize once, load with `executemany`"""
+
+    columns, rows = _serialize_rows(transactions)
+    _bulk_insert(conn=conn, table_name=TABLE_NAME, columns=columns, rows=rows)
+
+
+def _time_load(config: TursoConfig, load, transactions) -> float:
+    with get_turso_connection(config) as conn:
+        conn.execute(f"DROP TABLE IF EXISTS main.{TABLE_NAME}")
+        conn.execute(
+            f"CREATE TABLE main.{TABLE_NAME} "
+            + COMDIRECT_SCHEMAS["account_transactions__booked"]
+        )
+        start = time.perf_counter()
+        load(conn, transactions)
+        conn.commit()
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    """Compares rows/sec of the row-by-row and the bulk staging load"""
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = TursoConfig(db_path=Path(tmp_dir) / "bench.db")
+
+        print(
+            f"{'rows':>8} {'row-by-row rows/s':>18} {'bulk rows/s':>12} {'speedup':>8}"
+        )
+        for row_count in ROW_COUNTS:
+            transactions = [
+                AccountTransaction(**make_transaction_payload(i)).model_copy(
+                    update={"account_id": "ACCOUNT"}
+                )
+                for i in range(row_count)
+            ]
+            before = _time_load(config, _row_by_row, transactions)
+            after = _time_load(config, _bulk, transactions)
+            print(
+                f"{row_count:>8} {row_count / before:>18,.0f} "
+                f"{row_count / after:>12,.0f} {before / after:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
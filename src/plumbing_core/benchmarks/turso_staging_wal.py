@@ -0,0 +1,95 @@
+import logging
+import tempfile
+from pathlib import Path
+
+from _payloads import make_transaction_payload
+
+from plumbing_core.sources.comdirect import AccountTransaction, COMDIRECT_SCHEMAS
+from plumbing_core.destinations.turso import TursoConfig, get_turso_connection
+from plumbing_core.destinations.turso import writers
+
+EXISTING_ROWS = 5_000
+PAGE_ROWS = 100
+NEW_ROWS = 10
+PENDING_ROWS = 20
+
+
+def _transactions(start: int, stop: int, booking_status: str = "BOOKED"):
+    return [
+        AccountTransaction(**make_transaction_payload(i, booking_status)).model_copy(
+            update={"account_id": "ACCOUNT"}
+        )
+        for i in range(start, stop)
+    ]
+
+
+def _wal_bytes_per_run(config: TursoConfig, staging_schema: str) -> int:
+    """WAL bytes written by one simulated hourly run of the booked and pending writes"""
+
+    writers.STAGING_SCHEMA = staging_schema
+    booked_table = "account_transactions__booked"
+    pending_table = "account_transactions__not_booked"
+
+    with get_turso_connection(config) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA wal_autocheckpoint=0")
+
+        for table_name in [booked_table, pending_table]:
+            conn.execute(f"DROP TABLE IF EXISTS main.{table_name}")
+            writers._ensure_table_exists(
+                conn=conn, table_name=table_name, ddl=COMDIRECT_SCHEMAS[table_name]
+            )
+        writers._insert_if_not_exists(
+            conn=conn,
+            data=_transactions(0, EXISTING_ROWS),
+            table_name=booked_table,
+            on_conflict_keys=["account_id", "reference"],
+            ddl=COMDIRECT_SCHEMAS[booked_table],
+        )
+        conn.commit()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        # Hourly run: one page of mostly known booked rows plus the pending refresh
+        writers._insert_if_not_exists(
+            conn=conn,
+            data=_transactions(
+                EXISTING_ROWS - PAGE_ROWS + NEW_ROWS, EXISTING_ROWS + NEW_ROWS
+            ),
+            table_name=booked_table,
+            on_conflict_keys=["account_id", "reference"],
+            ddl=COMDIRECT_SCHEMAS[booked_table],
+        )
+        conn.commit()
+        writers._delete_and_insert(
+            conn=conn,
+            data=_transactions(0, PENDING_ROWS, booking_status="NOTBOOKED"),
+            table_name=pending_table,
+            delete_keys=["account_id"],
+            ddl=COMDIRECT_SCHEMAS[pending_table],
+        )
+        conn.commit()
+
+        wal_frames = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()[1]
+
+    # Each WAL frame is a 24 byte header followed by one page
+    return wal_frames * (page_size + 24)
+
+
+def main() -> None:
+    """Compares WAL bytes of an hourly run with staging in 'main' and in 'temp'"""
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = TursoConfig(db_path=Path(tmp_dir) / "bench.db")
+
+        before = _wal_bytes_per_run(config, staging_schema="main")
+        after = _wal_bytes_per_run(config, staging_schema="temp")
+
+    print(f"WAL bytes per hourly run, staging in main: {before:>10,}")
+    print(f"WAL bytes per hourly run, staging in temp: {after:>10,}")
+    print(f"Reduction: {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -41,12 +41,12 @@ def main() -> None:
     # Use remote
     db_config = TursoConfig(db_path=db_path, _env_file=".env.turso")
 
-    record_count = write_account_balances(
+    write_result = write_account_balances(
         balances=account_balances,
         config=db_config,
         ddl=COMDIRECT_SCHEMAS["account_balances"],
     )
-    logging.info(f"Loaded {record_count} records")
+    logging.info(f"Loaded {write_result.written} records")
 
 
 if __name__ == "__main__":
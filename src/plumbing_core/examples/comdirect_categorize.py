@@ -45,12 +45,12 @@ def main() -> None:
     )
 
     # Save data step
-    inserted_count = write_account_transactions_categorized(
+    write_result = write_account_transactions_categorized(
         categorized_transactions=categorized_transactions,
         config=db_config,
         ddl=CATEGORIZED_BANK_TRANSACTION_DDL,
     )
-    logging.info(f"Inserted {inserted_count} records")
+    logging.info(f"Inserted {write_result.written} records")
 
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ from plumbing_core.sources.comdirect import (
     get_accounts_balances,
     get_session_id,
     get_transaction_data_paginated,
+    make_client,
     COMDIRECT_SCHEMAS,
 )
 from plumbing_core.destinations.turso import (
@@ -29,35 +30,42 @@ def main() -> None:
     cfg = APIConfig(_env_file=".env.comdirect")
     session_id = get_session_id()
 
-    access_token = authenticate_user_credentials(cfg=cfg, session_id=session_id)
-    if not access_token:
-        raise ValueError("No access token found")
-
-    account_balances: list[AccountBalance] = get_accounts_balances(
-        cfg=cfg, bearer_access_token=access_token.bearer_access_token
-    )
-
-    for account in account_balances:
-        account_id = account.account_id
+    # One pooled client, so all calls share their connection to the API
+    with make_client(cfg) as http_client:
+        access_token = authenticate_user_credentials(
+            cfg=cfg, session_id=session_id, http_client=http_client
+        )
+        if not access_token:
+            raise ValueError("No access token found")
 
-        transactions: list[AccountTransaction] = get_transaction_data_paginated(
+        account_balances: list[AccountBalance] = get_accounts_balances(
             cfg=cfg,
-            account_id=account_id,
             bearer_access_token=access_token.bearer_access_token,
-            last_transaction_date=Date(2026, 1, 1),
-            transaction_state="BOOKED",
+            http_client=http_client,
         )
 
-        logging.info("Loading to turso sqlite")
-        db_path = Path.cwd() / "comdirect.db"
-        db_config = TursoConfig(db_path=db_path)
-        record_count = write_account_transactions_booked(
-            transactions=transactions,
-            account_id=account_id,
-            config=db_config,
-            ddl=COMDIRECT_SCHEMAS["account_transactions__booked"],
-        )
-        logging.info(f"Loaded {record_count} records")
+        for account in account_balances:
+            account_id = account.account_id
+
+            transactions: list[AccountTransaction] = get_transaction_data_paginated(
+                cfg=cfg,
+                account_id=account_id,
+                bearer_access_token=access_token.bearer_access_token,
+                last_transaction_date=Date(2026, 1, 1),
+                transaction_state="BOOKED",
+                http_client=http_client,
+            )
+
+            logging.info("Loading to turso sqlite")
+            db_path = Path.cwd() / "comdirect.db"
+            db_config = TursoConfig(db_path=db_path)
+            write_result = write_account_transactions_booked(
+                transactions=transactions,
+                account_id=account_id,
+                config=db_config,
+                ddl=COMDIRECT_SCHEMAS["account_transactions__booked"],
+            )
+            logging.info(f"Loaded {write_result.written} records")
 
 
 if __name__ == "__main__":
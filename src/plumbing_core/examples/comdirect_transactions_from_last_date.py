@@ -67,13 +67,13 @@ def main() -> None:
             transaction_state="BOOKED",
         )
 
-        record_count = write_account_transactions_booked(
+        write_result = write_account_transactions_booked(
             transactions=transactions,
             account_id=account_id,
             config=db_config,
             ddl=COMDIRECT_SCHEMAS["account_transactions__booked"],
         )
-        logging.info(f"Loaded {record_count} records")
+        logging.info(f"Loaded {write_result.written} records")
 
     logging.info("All done")
 
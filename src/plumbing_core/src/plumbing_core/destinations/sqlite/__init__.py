@@ -1,17 +1,21 @@
 from .config import SQLiteConfig
-from .connection import get_duckdb_connection
+from .connection import close_duckdb_connections, get_duckdb_connection
 from .writers import (
     write_account_balances,
     write_account_transactions_booked,
     write_account_transactions_not_booked,
+    write_account_transactions_categorized,
 )
-from .readers import get_max_date_string
+from .readers import get_max_date_string, get_transactions_to_categorize
 
 __all__ = [
     "SQLiteConfig",
     "get_duckdb_connection",
+    "close_duckdb_connections",
     "write_account_balances",
     "write_account_transactions_booked",
     "write_account_transactions_not_booked",
+    "write_account_transactions_categorized",
     "get_max_date_string",
+    "get_transactions_to_categorize",
 ]
@@ -0,0 +1,80 @@
+import logging
+from typing import Dict, List, Optional, Type, get_args
+
+import pendulum
+import pyarrow as pa
+from pydantic import BaseModel, TypeAdapter
+
+from plumbing_core.shared.schemas import _is_optional_type
+
+logger = logging.getLogger(__name__)
+
+
+def get_arrow_schema_for_model(
+    model_class: Type[BaseModel],
+    extra_fields: Optional[Dict[str, pa.DataType]] = None,
+) -> pa.Schema:
+    """Generate an Arrow schema from Pydantic model with optional extra fields"""
+
+    fields = []
+
+    for field_name, field_info in model_class.model_fields.items():
+        is_nullable = not field_info.is_required() or _is_optional_type(
+            field_info.annotation
+        )
+        arrow_type = _map_field_to_arrow_type(field_info.annotation)
+        fields.append(pa.field(field_name, arrow_type, nullable=is_nullable))
+
+    if extra_fields:
+        for field_name, arrow_type in extra_fields.items():
+            fields.append(pa.field(field_name, arrow_type))
+
+    return pa.schema(fields)
+
+
+def models_to_arrow_table(
+    data: List[BaseModel], extra_columns: Optional[Dict[str, str]] = None
+) -> pa.Table:
+    """Loads models into an Arrow table typed by their schema
+
+    Values are serialized in JSON mode, so dates land as ISO strings like in the
+    Turso tables. `extra_columns` are constant string columns appended to all rows.
+    """
+
+    model_class = type(data[0])
+    rows = TypeAdapter(List[model_class]).dump_python(data, mode="json")
+    table = pa.Table.from_pylist(rows, schema=get_arrow_schema_for_model(model_class))
+
+    for column_name, value in (extra_columns or {}).items():
+        table = table.append_column(
+            column_name, pa.array([value] * len(rows), type=pa.string())
+        )
+
+    return table
+
+
+def _map_field_to_arrow_type(field_type) -> pa.DataType:
+    """Map Pydantic field type to Arrow type"""
+
+    # For Optional[T], get the T part
+    if _is_optional_type(field_type):
+        args = get_args(field_type)
+        field_type = args[0] if args[1] is type(None) else args[1]
+
+    # bool before its base int
+    if not isinstance(field_type, type):
+        logger.debug(f"Unknown field type {field_type}, defaulting to string")
+        return pa.string()
+    elif issubclass(field_type, bool):
+        return pa.bool_()
+    elif issubclass(field_type, int):
+        return pa.int64()
+    elif issubclass(field_type, float):
+        return pa.float64()
+    elif issubclass(field_type, str):
+        return pa.string()
+    elif issubclass(field_type, (pendulum.Date, pendulum.DateTime)):
+        return pa.string()  # ISO format strings, as serialized in JSON mode
+    else:
+        logger.debug(f"Unknown field type {field_type}, defaulting to string")
+        return pa.string()
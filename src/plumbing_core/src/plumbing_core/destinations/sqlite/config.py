@@ -1,3 +1,4 @@
+from typing import Optional
 from pathlib import Path
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -5,6 +6,9 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class SQLiteConfig(BaseSettings):
     db_path: Path
+    # DuckDB settings, 'None' keeps DuckDB's defaults
+    threads: Optional[int] = None
+    memory_limit: Optional[str] = None
 
     @field_validator("db_path")
     def validate_db_path(cls, v):
@@ -1,24 +1,84 @@
+import atexit
 import duckdb
+import threading
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 import logging
 
+from .config import SQLiteConfig
+
 logger = logging.getLogger(__name__)
 
+# One DuckDB instance with the SQLite database attached per db path, together
+# with the settings it was configured with
+_INSTANCES: Dict[str, Tuple[duckdb.DuckDBPyConnection, dict]] = {}
+_INSTANCES_LOCK = threading.Lock()
+
 
 @contextmanager
-def get_duckdb_connection(db_path: Path):
-    """DuckDB connection with SQLite attachment"""
+def get_duckdb_connection(db_path: Path, config: Optional[SQLiteConfig] = None):
+    """DuckDB cursor on the shared instance with the SQLite database attached
 
-    conn = None
+    The first call for a db path starts the instance and attaches the database,
+    later calls only open a cursor on it. DuckDB settings of the optional config
+    are applied to the instance.
+    """
+
+    cursor = None
     try:
-        conn = duckdb.connect()
-        conn.execute(f"ATTACH '{db_path}' AS sqlite_db (TYPE sqlite)")
-        logger.debug(f"Connected to SQLite database at '{db_path}'")
-        yield conn
+        cursor = _get_instance(db_path, config).cursor()
+        yield cursor
     except Exception as e:
         logger.error(f"Database connection error: {e}")
         raise
     finally:
-        if conn:
+        if cursor:
+            cursor.close()
+
+
+def close_duckdb_connections() -> None:
+    """Closes all shared DuckDB instances, the next call starts them again"""
+
+    with _INSTANCES_LOCK:
+        for db_path, (conn, _) in _INSTANCES.items():
             conn.close()
+            logger.debug(f"Closed DuckDB instance for '{db_path}'")
+        _INSTANCES.clear()
+
+
+atexit.register(close_duckdb_connections)
+
+
+def _duckdb_settings(config: Optional[SQLiteConfig]) -> dict:
+    if config is None:
+        return {}
+    settings = {"threads": config.threads, "memory_limit": config.memory_limit}
+    return {name: value for name, value in settings.items() if value is not None}
+
+
+def _get_instance(
+    db_path: Path, config: Optional[SQLiteConfig]
+) -> duckdb.DuckDBPyConnection:
+    db_path = str(Path(db_path).resolve())
+    settings = _duckdb_settings(config)
+
+    with _INSTANCES_LOCK:
+        if db_path not in _INSTANCES:
+            conn = duckdb.connect(config=settings)
+            try:
+                conn.execute(f"ATTACH '{db_path}' AS sqlite_db (TYPE sqlite)")
+            except Exception:
+                conn.close()
+                raise
+            logger.debug(f"Connected to SQLite database at '{db_path}'")
+            _INSTANCES[db_path] = (conn, settings)
+
+        conn, applied_settings = _INSTANCES[db_path]
+        # Settings are global to the instance, apply the ones that changed
+        for name, value in settings.items():
+            if applied_settings.get(name) != value:
+                conn.execute(f"SET {name} = '{value}'")
+                applied_settings[name] = value
+
+        return conn
@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from .config import SQLiteConfig
 from .connection import get_duckdb_connection
@@ -22,18 +22,8 @@ def get_max_date_string(
     if filter_condition:
         where_sql = "WHERE " + filter_condition
 
-    with get_duckdb_connection(config.db_path) as conn:
-        table_exists = (
-            conn.execute(
-                f"""
-                SELECT COUNT(*) FROM main.sqlite_master
-                WHERE type='table' AND name='{table_name}'
-                """
-            ).fetchone()[0]
-            > 0
-        )
-
-        if not table_exists:
+    with get_duckdb_connection(config.db_path, config) as conn:
+        if not _table_exists(conn, table_name):
             logging.info("Table does not exist. Returning 'None'")
 
             return result
@@ -48,3 +38,58 @@ def get_max_date_string(
         logging.info(f"Max value for '{date_field}' = '{result}'")
 
         return result
+
+
+def get_transactions_to_categorize(
+    config: SQLiteConfig,
+    source_table_name: str = "account_transactions__booked",
+    categorization_table_name: str = "account_transactions__categorized",
+    limit: Optional[int] = 100,
+) -> list[Dict[str, Any]]:
+    """Gets the newest transactions not categorized yet, none without source table
+
+    Categorized transactions are removed with an anti-join executed by DuckDB, so
+    the whole history can be scanned at once with 'limit=None'.
+    """
+
+    with get_duckdb_connection(config.db_path, config) as conn:
+        if not _table_exists(conn, source_table_name):
+            logger.info("Source table does not exist. Nothing to categorize")
+            return []
+
+        from_sql = f"sqlite_db.{source_table_name} t1"
+        if _table_exists(conn, categorization_table_name):
+            from_sql += f"""
+                ANTI JOIN sqlite_db.{categorization_table_name} t2
+                    ON t1.account_id = t2.account_id
+                    AND t1.reference = t2.reference
+            """
+        else:
+            logger.info("Categorization table does not exist, all are uncategorized")
+
+        limit_sql = f"LIMIT {int(limit)}" if limit is not None else ""
+        select_sql = f"""
+            SELECT t1.*
+            FROM {from_sql}
+            ORDER BY t1._inserted_at_ts DESC
+            {limit_sql}
+        """
+        logger.debug(f"Select SQL: {select_sql}")
+        cursor = conn.execute(select_sql)
+        columns = [column[0] for column in cursor.description]
+        result = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        logger.info(f"Returning {len(result)} transactions not yet categorized")
+
+        return result
+
+
+def _table_exists(conn, table_name: str) -> bool:
+    return (
+        conn.execute(
+            f"""
+            SELECT COUNT(*) FROM main.sqlite_master
+            WHERE type='table' AND name='{table_name}'
+            """
+        ).fetchone()[0]
+        > 0
+    )
@@ -1,11 +1,14 @@
 import duckdb
 import logging
 import pendulum
-import pandas as pd
+import pyarrow as pa
+from pydantic import BaseModel
 from typing import List
 
 
+from plumbing_core.processors.categorization.types import CategorizedBankTransaction
 from plumbing_core.sources.comdirect import AccountBalance, AccountTransaction
+from .arrow import models_to_arrow_table
 from .config import SQLiteConfig
 from .connection import get_duckdb_connection
 
@@ -15,7 +18,7 @@ logger = logging.getLogger(__name__)
 def _ensure_table_exists(
     conn: duckdb.DuckDBPyConnection,
     table_name: str,
-    df: pd.DataFrame,
+    data: pa.Table,
 ) -> bool:
     """Ensure table exists in SQLite database, create if needed"""
 
@@ -34,7 +37,7 @@ def _ensure_table_exists(
         conn.execute(
             f"""
             CREATE TABLE sqlite_db.{table_name} AS
-            FROM df
+            FROM data
             """
         )
         return True
@@ -45,85 +48,63 @@ def _ensure_table_exists(
 
 def _delete_and_insert(
     conn: duckdb.DuckDBPyConnection,
-    df: pd.DataFrame,
+    data: pa.Table,
     table_name: str,
     delete_keys: List[str],
 ) -> int:
     """Delete existing records and insert new data"""
 
     if delete_keys:
-        delete_conditions = []
-        for _, row in df.iterrows():
-            conditions = []
-            for key in delete_keys:
-                value = row[key]
-                if pd.isna(value):
-                    conditions.append(f"{key} IS NULL")
-                elif isinstance(value, str):
-                    escaped_value = str(value).replace("'", "''")
-                    conditions.append(f"{key} = '{escaped_value}'")
-                else:
-                    conditions.append(f"{key} = {value}")
-
-            if conditions:
-                delete_conditions.append(f"({' AND '.join(conditions)})")
-
-        if delete_conditions:
-            where_clause = " OR ".join(delete_conditions)
-            delete_sql = f"DELETE FROM sqlite_db.{table_name} WHERE {where_clause}"
-            logger.debug(f"Executing DELETE: {delete_sql}")
-            conn.execute(delete_sql)
-            logger.info(f"Executed DELETE for {len(df)} key combinations")
-
-    insert_sql = f"INSERT INTO sqlite_db.{table_name} FROM df"
-    conn.execute(insert_sql)
-    logger.info(f"Inserted {len(df)} new records")
-
-    return len(df)
+        # Semi-join against the scanned Arrow table, NULL keys match NULL keys
+        key_conditions = " AND ".join(
+            [f"t1.{key} IS NOT DISTINCT FROM t2.{key}" for key in delete_keys]
+        )
+        delete_sql = f"""
+            DELETE FROM sqlite_db.{table_name} AS t1
+            WHERE EXISTS (
+                SELECT 1 FROM data t2
+                WHERE {key_conditions}
+            )
+        """
+        logger.debug(f"Executing DELETE: {delete_sql}")
+        deleted_row_count = conn.execute(delete_sql).fetchone()[0]
+        logger.info(
+            f"Deleted {deleted_row_count} records matching {len(data)} key combinations"
+        )
+
+    insert_sql = f"INSERT INTO sqlite_db.{table_name} FROM data"
+    inserted_row_count = conn.execute(insert_sql).fetchone()[0]
+    logger.info(f"Inserted {inserted_row_count} new records")
+
+    return inserted_row_count
 
 
 def _insert_if_not_exists(
     conn: duckdb.DuckDBPyConnection,
-    df: pd.DataFrame,
+    data: pa.Table,
     table_name: str,
     on_conflict_keys: List[str],
 ) -> int:
     """Inserts new records if not exists"""
 
-    inserted_row_count = len(df)
-
     if not on_conflict_keys:
         raise ValueError("'on_conflict_keys' is required.")
 
-    # Filter incoming data to only new data
+    # Filter incoming data to only new data while inserting it
     where_condition = " AND ".join([f"t1.{key} = t2.{key}" for key in on_conflict_keys])
-    filter_df_sql = f"""
-        FROM df t1
+    insert_sql = f"""
+        INSERT INTO sqlite_db.{table_name}
+        FROM data t1
         WHERE NOT EXISTS (
             SELECT 1 FROM
             sqlite_db.{table_name} t2
             WHERE {where_condition}
         )
     """
-    try:
-        df = conn.sql(filter_df_sql).df()
-        inserted_row_count = len(df)
-    except Exception as e:
-        logger.error(f"Exception filtering incoming data with error: {e}")
-        raise
-    if inserted_row_count == 0:
-        logger.info("No new data, returning")
-        return 0
-
-    # 'INSERT INTO SELECT *'
-    insert_sql = f"""
-        INSERT INTO sqlite_db.{table_name}
-        FROM df
-    """
 
     logger.debug(f"Executing INSERT: {insert_sql}")
     try:
-        conn.execute(insert_sql)
+        inserted_row_count = conn.execute(insert_sql).fetchone()[0]
     except Exception as e:
         logger.error(
             f"Exception insert where not exists for query: {insert_sql} with error: {e}"
@@ -134,6 +115,18 @@ def _insert_if_not_exists(
     return inserted_row_count
 
 
+def _to_arrow_table(data: List[BaseModel]) -> pa.Table:
+    """Typed Arrow table of the models with the insertion timestamps appended"""
+
+    return models_to_arrow_table(
+        data,
+        extra_columns={
+            "_inserted_at_day": pendulum.now("CET").to_date_string(),
+            "_inserted_at_ts": pendulum.now("CET").to_datetime_string(),
+        },
+    )
+
+
 def write_account_balances(
     balances: List[AccountBalance],
     config: SQLiteConfig,
@@ -146,23 +139,21 @@ def write_account_balances(
         logger.info("No balances passed, returning early")
         return 0
 
-    df = pd.DataFrame([balance.model_dump() for balance in balances])
-    df["_inserted_at_day"] = pendulum.now("CET").to_date_string()
-    df["_inserted_at_ts"] = pendulum.now("CET").to_datetime_string()
+    data = _to_arrow_table(balances)
 
-    with get_duckdb_connection(config.db_path) as conn:
+    with get_duckdb_connection(config.db_path, config) as conn:
         logger.info("Beginning transaction")
         conn.execute("BEGIN TRANSACTION")
 
         try:
             table_created = _ensure_table_exists(
-                conn=conn, table_name=table_name, df=df
+                conn=conn, table_name=table_name, data=data
             )
             if table_created:
-                inserted_count = len(df)
+                inserted_count = len(data)
             else:
                 inserted_count = _delete_and_insert(
-                    conn=conn, df=df, table_name=table_name, delete_keys=delete_keys
+                    conn=conn, data=data, table_name=table_name, delete_keys=delete_keys
                 )
 
             conn.execute("COMMIT")
@@ -188,25 +179,28 @@ def write_account_transactions_booked(
         logger.info("No transactions passed, returning")
         return 0
 
-    df = pd.DataFrame([transaction.model_dump() for transaction in transactions])
-    df["account_id"] = account_id
-    df["_inserted_at_day"] = pendulum.now("CET").to_date_string()
-    df["_inserted_at_ts"] = pendulum.now("CET").to_datetime_string()
+    # Use model_copy to add account_id before the rows are typed
+    data = _to_arrow_table(
+        [
+            transaction.model_copy(update={"account_id": account_id})
+            for transaction in transactions
+        ]
+    )
 
-    with get_duckdb_connection(config.db_path) as conn:
+    with get_duckdb_connection(config.db_path, config) as conn:
         logger.info("Beginning transaction")
         conn.execute("BEGIN TRANSACTION")
 
         try:
             table_created = _ensure_table_exists(
-                conn=conn, table_name=table_name, df=df
+                conn=conn, table_name=table_name, data=data
             )
             if table_created:
-                inserted_count = len(df)
+                inserted_count = len(data)
             else:
                 inserted_count = _insert_if_not_exists(
                     conn=conn,
-                    df=df,
+                    data=data,
                     table_name=table_name,
                     on_conflict_keys=delete_keys,
                 )
@@ -234,24 +228,66 @@ def write_account_transactions_not_booked(
         logger.info("No transactions passed, returning")
         return 0
 
-    df = pd.DataFrame([transaction.model_dump() for transaction in transactions])
-    df["account_id"] = account_id
-    df["_inserted_at_day"] = pendulum.now("CET").to_date_string()
-    df["_inserted_at_ts"] = pendulum.now("CET").to_datetime_string()
+    # Use model_copy to add account_id before the rows are typed
+    data = _to_arrow_table(
+        [
+            transaction.model_copy(update={"account_id": account_id})
+            for transaction in transactions
+        ]
+    )
+
+    with get_duckdb_connection(config.db_path, config) as conn:
+        logger.info("Beginning transaction")
+        conn.execute("BEGIN TRANSACTION")
+
+        try:
+            table_created = _ensure_table_exists(
+                conn=conn, table_name=table_name, data=data
+            )
+            if table_created:
+                inserted_count = len(data)
+            else:
+                inserted_count = _delete_and_insert(
+                    conn=conn, data=data, table_name=table_name, delete_keys=delete_keys
+                )
+
+            conn.execute("COMMIT")
+            logger.info(f"Transaction commited: {inserted_count} records processesed")
+            return inserted_count
+
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Transaction rolled back due to error: {e}")
+            raise
+
+
+def write_account_transactions_categorized(
+    categorized_transactions: List[CategorizedBankTransaction],
+    config: SQLiteConfig,
+    table_name: str = "account_transactions__categorized",
+    delete_keys: List[str] = ["account_id", "reference"],
+) -> int:
+    """Write categorized transactions using transactional 'delete+insert'"""
+
+    if not categorized_transactions:
+        logger.info("No categorized transactions passed, returning")
+        return 0
+
+    data = _to_arrow_table(categorized_transactions)
 
-    with get_duckdb_connection(config.db_path) as conn:
+    with get_duckdb_connection(config.db_path, config) as conn:
         logger.info("Beginning transaction")
         conn.execute("BEGIN TRANSACTION")
 
         try:
             table_created = _ensure_table_exists(
-                conn=conn, table_name=table_name, df=df
+                conn=conn, table_name=table_name, data=data
             )
             if table_created:
-                inserted_count = len(df)
+                inserted_count = len(data)
             else:
                 inserted_count = _delete_and_insert(
-                    conn=conn, df=df, table_name=table_name, delete_keys=delete_keys
+                    conn=conn, data=data, table_name=table_name, delete_keys=delete_keys
                 )
 
             conn.execute("COMMIT")
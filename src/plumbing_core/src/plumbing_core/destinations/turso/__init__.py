@@ -1,21 +1,43 @@
 from .config import TursoConfig
 from .connection import get_turso_connection, is_embedded_replica
+from .session import TursoSession
+from .migrations import migrate_table
+from .schema_registry import SchemaRegistry, get_schema_registry
 from .writers import (
     write_account_balances,
+    write_account_balances_history,
     write_account_transactions_booked,
+    write_account_transactions_booked_batched,
     write_account_transactions_not_booked,
     write_account_transactions_categorized,
 )
-from .readers import get_max_date_string, get_transactions_to_categorize
+from .readers import (
+    get_balance_as_of,
+    get_changed_account_ids,
+    get_max_date_string,
+    get_transactions_to_categorize,
+    get_watermarks,
+    iter_transactions_to_categorize,
+)
 
 __all__ = [
     "TursoConfig",
     "get_turso_connection",
+    "TursoSession",
+    "migrate_table",
+    "SchemaRegistry",
+    "get_schema_registry",
     "write_account_balances",
+    "write_account_balances_history",
     "write_account_transactions_booked",
+    "write_account_transactions_booked_batched",
     "write_account_transactions_not_booked",
     "write_account_transactions_categorized",
+    "get_balance_as_of",
+    "get_changed_account_ids",
     "get_max_date_string",
     "get_transactions_to_categorize",
+    "get_watermarks",
+    "iter_transactions_to_categorize",
     "is_embedded_replica",
 ]
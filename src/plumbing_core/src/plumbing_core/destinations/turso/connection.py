@@ -3,6 +3,7 @@ import logging
 from contextlib import contextmanager
 
 from .config import TursoConfig
+from .schema_registry import register_connection, unregister_connection
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +22,13 @@ def get_turso_connection(config: TursoConfig):
                 auth_token=config.auth_token,
             )
             logger.debug(f"Connected to embedded SQLite database at '{config.db_path}'")
+            register_connection(conn)
             yield conn
 
         else:
             conn = libsql.connect(str(config.db_path))
             logger.debug(f"Connected to SQLite database at '{config.db_path}'")
+            register_connection(conn)
             yield conn
 
     except Exception as e:
@@ -34,6 +37,7 @@ def get_turso_connection(config: TursoConfig):
 
     finally:
         if conn:
+            unregister_connection(conn)
             conn.close()
 
 
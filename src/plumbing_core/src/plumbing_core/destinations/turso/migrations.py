@@ -0,0 +1,149 @@
+import logging
+from typing import List, Optional, Tuple
+
+from plumbing_core.shared import SQLiteIndex
+
+from .config import TursoConfig
+from .schema_registry import (
+    SCHEMA_MIGRATIONS_TABLE_NAME,
+    _ddl_hash,
+    get_schema_registry,
+    read_applied_ddl_hash,
+    read_ddl_shape,
+    read_table_shape,
+)
+from .session import TursoSession, get_session_connection
+from .writers import _ensure_unique_index
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_table(
+    config: TursoConfig,
+    table_name: str,
+    ddl: str,
+    indexes: Optional[List[SQLiteIndex]] = None,
+    session: Optional[TursoSession] = None,
+) -> bool:
+    """Brings a table to its DDL and creates its declared indexes
+
+    Missing tables are created. Tables whose columns, types, primary key or
+    strictness differ from the DDL are rebuilt, rows keep their values for all
+    columns in both versions and are converted to the new column types. Rows
+    that collide on a new primary key keep the first written, like the unique
+    indexes and upserts of the writers. Returns whether the table was rebuilt.
+    Unlike the additive migrations of the writers this rewrites the table, so
+    run it deliberately, e.g. once per pipeline run.
+    """
+
+    with get_session_connection(config, session=session, write=True) as conn:
+        try:
+            rebuilt = False
+            registry = get_schema_registry(conn)
+
+            if not registry.table_exists(conn, table_name):
+                registry.ensure_table(conn, table_name=table_name, ddl=ddl)
+            elif not _matches_ddl(conn, table_name=table_name, ddl=ddl):
+                statements = _rebuild_table(conn, table_name=table_name, ddl=ddl)
+                registry.record_migration(
+                    conn, table_name=table_name, ddl=ddl, statements=statements
+                )
+                rebuilt = True
+            else:
+                logger.debug(f"Table {table_name} matches its DDL")
+
+            for index in indexes or []:
+                if index.unique:
+                    # Deduplicates rows an earlier schema allowed
+                    _ensure_unique_index(
+                        conn=conn,
+                        table_name=table_name,
+                        unique_keys=list(index.columns),
+                        keep="first",
+                    )
+                else:
+                    conn.execute(index.ddl(table_name))
+
+            conn.commit()
+
+            return rebuilt
+
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Migration of {table_name} rolled back due to error: {e}")
+            raise
+
+
+def _matches_ddl(conn, table_name: str, ddl: str) -> bool:
+    """Whether a table has the shape of a table created from `ddl`
+
+    Additive migrations append columns and leave out the constraints SQLite can not
+    add, so tables they brought to `ddl` only need the same column names, types and
+    primary key.
+    """
+
+    table_shape = read_table_shape(conn, "main", table_name)
+    ddl_shape = read_ddl_shape(conn, table_name=table_name, ddl=ddl)
+    if table_shape == ddl_shape:
+        return True
+
+    registry = get_schema_registry(conn)
+    if not registry.table_exists(conn, SCHEMA_MIGRATIONS_TABLE_NAME):
+        return False
+    if read_applied_ddl_hash(conn, table_name) != _ddl_hash(ddl):
+        return False
+
+    return _column_set(table_shape) == _column_set(ddl_shape)
+
+
+def _column_set(shape: Tuple[tuple, bool]) -> Tuple[frozenset, bool]:
+    """Shape without column order, NOT NULL constraints and defaults"""
+
+    columns, strict = shape
+    return frozenset((name, type_, pk) for name, type_, _, _, pk in columns), strict
+
+
+def _rebuild_table(conn, table_name: str, ddl: str) -> List[str]:
+    """Recreates a table from `ddl` and copies its rows over, without committing
+
+    Returns the statements that changed the table.
+    """
+
+    new_table_name = f"{table_name}__migration"
+    old_columns = [
+        row[1]
+        for row in conn.execute(f"PRAGMA main.table_info('{table_name}')").fetchall()
+    ]
+
+    create_sql = f"CREATE TABLE main.{new_table_name} {ddl}"
+    conn.execute(f"DROP TABLE IF EXISTS main.{new_table_name}")
+    conn.execute(create_sql)
+    new_columns = [
+        row[1]
+        for row in conn.execute(
+            f"PRAGMA main.table_info('{new_table_name}')"
+        ).fetchall()
+    ]
+
+    common_columns = [column for column in new_columns if column in old_columns]
+    dropped_columns = [column for column in old_columns if column not in new_columns]
+    if dropped_columns:
+        logger.warning(f"Dropping columns {dropped_columns} from {table_name}")
+
+    # Column affinities convert the values, STRICT tables raise on lossy ones.
+    # Only key collisions are skipped, 'WHERE true' disambiguates the upsert
+    columns_str = ", ".join(common_columns)
+    statements = [
+        create_sql,
+        f"INSERT INTO main.{new_table_name} ({columns_str}) "
+        f"SELECT {columns_str} FROM main.{table_name} WHERE true ORDER BY rowid "
+        "ON CONFLICT DO NOTHING",
+        f"DROP TABLE main.{table_name}",
+        f"ALTER TABLE main.{new_table_name} RENAME TO {table_name}",
+    ]
+    copied_row_count = conn.execute(statements[1]).rowcount
+    for statement in statements[2:]:
+        conn.execute(statement)
+    logger.info(f"Rebuilt table {table_name}, copied {copied_row_count} rows")
+
+    return statements
@@ -1,8 +1,13 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
+
+import pendulum
+from plumbing_core.sources.comdirect import AccountBalance
 
 from .config import TursoConfig
-from .connection import get_turso_connection, is_embedded_replica
+from .schema_registry import get_schema_registry
+from .session import TursoSession, get_session_connection
+from .sync_state import backfill_watermarks, ensure_sync_state_table, read_watermarks
 
 
 logger = logging.getLogger(__name__)
@@ -13,6 +18,7 @@ def get_max_date_string(
     table_name: str,
     date_field: str,
     filter_condition: Optional[str],
+    session: Optional[TursoSession] = None,
 ) -> Optional[str]:
     """Gets the max date (string) from table name"""
 
@@ -22,19 +28,8 @@ def get_max_date_string(
     if filter_condition:
         where_sql = "WHERE " + filter_condition
 
-    with get_turso_connection(config) as conn:
-        if is_embedded_replica(config):
-            conn.sync()
-
-        table_exists = (
-            conn.execute(
-                f"""
-                SELECT COUNT(*) FROM main.sqlite_master
-                WHERE type='table' AND name='{table_name}'
-                """
-            ).fetchone()[0]
-            > 0
-        )
+    with get_session_connection(config, session=session) as conn:
+        table_exists = get_schema_registry(conn).table_exists(conn, table_name)
 
         if not table_exists:
             logger.info("Table does not exist. Returning 'None'")
@@ -53,90 +48,257 @@ def get_max_date_string(
         return result
 
 
-def get_transactions_to_categorize(
+def get_watermarks(
     config: TursoConfig,
-    source_table_name: str = "account_transactions__booked",
-    categorization_table_name: str = "account_transactions__categorized",
-    limit: Optional[int] = 100,
-) -> Optional[list[Dict[str, Any]]]:
-    """Gets the max date (string) from table name"""
+    account_ids: List[str],
+    table_name: str = "account_transactions__booked",
+    date_field: str = "booking_date",
+    source: str = "comdirect",
+    session: Optional[TursoSession] = None,
+) -> Dict[str, Optional[str]]:
+    """Gets the watermark (string) of every passed account from the sync state table
 
-    result = None
+    Accounts without a state row are seeded once from 'MAX(date_field)'.
+    """
 
-    with get_turso_connection(config) as conn:
-        # Does the source table exist
-        source_table_exists = (
-            conn.execute(
-                f"""
-                SELECT COUNT(*) FROM main.sqlite_master
-                WHERE type='table' AND name='{source_table_name}'
-                """
-            ).fetchone()[0]
-            > 0
-        )
+    result = {account_id: None for account_id in account_ids}
 
-        # No transactions to categorize - return
-        if not source_table_exists:
-            logging.info("Source table does not exist. Returning 'None'")
+    with get_session_connection(config, session=session) as conn:
+        table_exists = get_schema_registry(conn).table_exists(conn, table_name)
+
+        if not table_exists:
+            logger.info("Table does not exist. Returning 'None' for all accounts")
             return result
-        logger.info("Source table exists")
 
-        # Transactions table does exist, let's find the column names of the table
-        columns = conn.execute(
+        ensure_sync_state_table(conn)
+        stored = read_watermarks(
+            conn=conn, source=source, table_name=table_name, account_ids=account_ids
+        )
+        result.update(stored)
+
+        missing_account_ids = [
+            account_id for account_id in account_ids if account_id not in stored
+        ]
+        if missing_account_ids:
+            result.update(
+                backfill_watermarks(
+                    conn=conn,
+                    source=source,
+                    table_name=table_name,
+                    date_field=date_field,
+                    account_ids=missing_account_ids,
+                )
+            )
+            conn.commit()
+
+        logger.info(f"Watermarks for '{date_field}' = '{result}'")
+
+        return result
+
+
+def get_changed_account_ids(
+    config: TursoConfig,
+    balances: List[AccountBalance],
+    table_name: str = "account_balances",
+    session: Optional[TursoSession] = None,
+) -> List[str]:
+    """Gets the ids of accounts whose balance differs from their last stored snapshot
+
+    Accounts without a snapshot count as changed. Call before writing the balances.
+    """
+
+    account_ids = [balance.account_id for balance in balances]
+    if not account_ids:
+        return account_ids
+
+    with get_session_connection(config, session=session) as conn:
+        table_exists = get_schema_registry(conn).table_exists(conn, table_name)
+
+        if not table_exists:
+            logger.info("Table does not exist. Returning all accounts")
+            return account_ids
+
+        # Latest snapshot per account, cast for tables not yet migrated off TEXT
+        placeholders = ", ".join("?" for _ in account_ids)
+        rows = conn.execute(
             f"""
-            SELECT name
-            FROM PRAGMA_TABLE_INFO('{source_table_name}')
-            """
+            SELECT account_id, balance__value, available_cash_amount__value
+            FROM (
+                SELECT
+                    account_id,
+                    CAST(balance__value AS REAL) AS balance__value,
+                    CAST(available_cash_amount__value AS REAL)
+                        AS available_cash_amount__value,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY account_id
+                        ORDER BY _inserted_at_day DESC, _inserted_at_ts DESC, rowid DESC
+                    ) AS rn
+                FROM main.{table_name}
+                WHERE account_id IN ({placeholders})
+            )
+            WHERE rn = 1
+            """,
+            account_ids,
         ).fetchall()
-        columns = [elem[0] for elem in columns]
-        logger.info(f"Obtained columns: '{columns}' from table '{source_table_name}'")
-
-        # does the categorization table exist
-        categorization_table_exists = (
-            conn.execute(
-                f"""
-                SELECT COUNT(*) FROM main.sqlite_master
-                WHERE type='table' AND name='{categorization_table_name}'
-                """
-            ).fetchone()[0]
-            > 0
+
+    last_snapshots = {
+        account_id: (round(balance, 2), round(available_cash_amount, 2))
+        for account_id, balance, available_cash_amount in rows
+    }
+    changed_account_ids = [
+        balance.account_id
+        for balance in balances
+        if last_snapshots.get(balance.account_id)
+        != (
+            round(balance.balance__value, 2),
+            round(balance.available_cash_amount__value, 2),
         )
+    ]
+    logger.info(
+        f"{len(changed_account_ids)} of {len(account_ids)} accounts changed: "
+        f"'{changed_account_ids}'"
+    )
 
-        # No transactions were categorized yet
-        if not categorization_table_exists:
-            logger.info(
-                f"Categorization table does not exist. Returning earliest {limit} transactions"
-            )
-            result = conn.execute(
-                f"""
-                SELECT *
-                FROM main.{source_table_name}
-                ORDER BY _inserted_at_ts DESC
-                LIMIT 10
-                """
-            ).fetchall()
-        # Some transactions were already categorized
-        else:
-            select_sql = f"""
-                SELECT *
-                FROM main.{source_table_name} t1
-                WHERE NOT EXISTS (
+    return changed_account_ids
+
+
+def get_balance_as_of(
+    config: TursoConfig,
+    account_id: str,
+    ts: pendulum.DateTime,
+    table_name: str = "account_balances__history",
+    session: Optional[TursoSession] = None,
+) -> Optional[Dict[str, Any]]:
+    """Gets the balance row of an account that was valid at `ts` from the history table
+
+    Returns 'None' if the account had no balance recorded yet at that time.
+    """
+
+    ts_str = ts.in_timezone("UTC").to_datetime_string()
+
+    with get_session_connection(config, session=session) as conn:
+        table_exists = get_schema_registry(conn).table_exists(conn, table_name)
+
+        if not table_exists:
+            logger.info("Table does not exist. Returning 'None'")
+            return None
+
+        # Latest row opened at or before `ts`, found by a seek on the
+        # (account_id, valid_from) index
+        cursor = conn.execute(
+            f"""
+            SELECT *
+            FROM main.{table_name}
+            WHERE account_id = ? AND valid_from <= ?
+            ORDER BY valid_from DESC, rowid DESC
+            LIMIT 1
+            """,
+            (account_id, ts_str),
+        )
+        row = cursor.fetchone()
+        columns = [description[0] for description in cursor.description]
+
+    if row is None:
+        logger.info(f"No balance of '{account_id}' as of '{ts_str}'")
+        return None
+
+    result = dict(zip(columns, row))
+    if result["valid_to"] is not None and result["valid_to"] <= ts_str:
+        logger.info(f"No balance of '{account_id}' as of '{ts_str}'")
+        return None
+
+    return result
+
+
+def get_transactions_to_categorize(
+    config: TursoConfig,
+    source_table_name: str = "account_transactions__booked",
+    categorization_table_name: str = "account_transactions__categorized",
+    limit: Optional[int] = 100,
+    session: Optional[TursoSession] = None,
+) -> List[Dict[str, Any]]:
+    """Gets the newest transactions not categorized yet, all of them with 'limit=None'"""
+
+    chunks = iter_transactions_to_categorize(
+        config=config,
+        source_table_name=source_table_name,
+        categorization_table_name=categorization_table_name,
+        chunk_size=limit if limit is not None else 100,
+        session=session,
+    )
+    try:
+        if limit is None:
+            return [row for chunk in chunks for row in chunk]
+        return next(chunks, [])
+    finally:
+        chunks.close()
+
+
+def iter_transactions_to_categorize(
+    config: TursoConfig,
+    source_table_name: str = "account_transactions__booked",
+    categorization_table_name: str = "account_transactions__categorized",
+    chunk_size: int = 100,
+    session: Optional[TursoSession] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Streams transactions not categorized yet in chunks, newest first
+
+    Chunks are paginated on `(_inserted_at_ts, rowid)`, the rowid breaking ties
+    between rows of the same write. With the index `migrate_table` declares on the
+    timestamp every chunk is a seek rather than a sort of the whole backlog. Every
+    row is returned once as long as the source table is not rebuilt while the
+    chunks are consumed, a rebuild renumbers rowids and can repeat or skip rows
+    sharing the timestamp of the last chunk. Rows categorized while the chunks are
+    consumed are skipped by later chunks. Only reads, indexes are left to
+    `migrate_table`.
+    """
+
+    with get_session_connection(config, session=session) as conn:
+        registry = get_schema_registry(conn)
+
+        if not registry.table_exists(conn, source_table_name):
+            logger.info("Source table does not exist. Nothing to categorize")
+            return
+        columns = registry.columns(conn, source_table_name)
+
+        not_categorized_sql = ""
+        if registry.table_exists(conn, categorization_table_name):
+            not_categorized_sql = f"""
+                AND NOT EXISTS (
                     SELECT 1
                     FROM main.{categorization_table_name} t2
                     WHERE t1.account_id = t2.account_id
                         AND t1.reference = t2.reference
                 )
-                ORDER BY _inserted_at_ts DESC
-                LIMIT 10
             """
-            logger.info(f"Select SQL: {select_sql}")
-            result = conn.execute(select_sql).fetchall()
-            logger.info(
-                f"Categorization table exists. Returning {limit} transactions not yet categorized"
-            )
+        else:
+            logger.info("Categorization table does not exist, all are uncategorized")
+
+        # The timestamp is filled by its column default, it is never NULL
+        select_sql = f"""
+            SELECT t1._inserted_at_ts, t1.rowid, t1.*
+            FROM main.{source_table_name} t1
+            WHERE t1._inserted_at_ts <= ?
+                AND (t1._inserted_at_ts < ? OR t1.rowid < ?)
+                {not_categorized_sql}
+            ORDER BY t1._inserted_at_ts DESC, t1.rowid DESC
+            LIMIT ?
+        """
+        logger.debug(f"Select SQL: {select_sql}")
+
+        # Sorts after any timestamp and larger than any rowid, SQLite's rowids
+        # are signed 64-bit integers
+        last_ts, last_rowid = "9999", 2**63 - 1
+        row_count = 0
+        while True:
+            rows = conn.execute(
+                select_sql, (last_ts, last_ts, last_rowid, chunk_size)
+            ).fetchall()
+            if not rows:
+                break
 
-        if not result:
-            logger.error("Unexpected error. Raising error")
-            raise ValueError("Unexpected error obtaining transactions to categorize")
+            last_ts, last_rowid = rows[-1][:2]
+            row_count += len(rows)
+            yield [dict(zip(columns, row[2:])) for row in rows]
 
-        return [dict(zip(columns, value_list)) for value_list in result]
+        logger.info(f"Returned {row_count} transactions not yet categorized")
@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+import pendulum
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_MIGRATIONS_TABLE_NAME = "schema_migrations"
+SCHEMA_MIGRATIONS_DDL = """(
+    table_name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    ddl_hash TEXT NOT NULL,
+    statements TEXT NOT NULL,
+    applied_at TEXT NOT NULL,
+    PRIMARY KEY (table_name, version)
+)"""
+
+# Constant defaults SQLite accepts in 'ALTER TABLE ADD COLUMN': numbers, strings,
+# blobs, NULL, TRUE and FALSE
+_LITERAL_DEFAULT = re.compile(
+    r"[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?|0[xX][0-9a-fA-F]+|'(?:[^']|'')*'"
+    r"|[xX]'[0-9a-fA-F]*'|NULL|TRUE|FALSE",
+    re.IGNORECASE,
+)
+
+# Registries of the open connections, by connection id
+_REGISTRIES: Dict[int, "SchemaRegistry"] = {}
+
+
+class SchemaRegistry:
+    """Table layouts known to one connection
+
+    The first lookup of a table reads its columns from the database, later ones are
+    served from memory. Tables are brought to their DDL with additive migrations,
+    each recorded as a new version in the `schema_migrations` table.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, List[str]] = {}
+        self._applied_ddl_hashes: Dict[str, str] = {}
+        self._indexes: Set[str] = set()
+        self._migrations_table_exists = False
+
+    def columns(self, conn, table_name: str) -> Optional[List[str]]:
+        """Column names of a table, 'None' if it does not exist"""
+
+        if table_name not in self._columns:
+            columns = [
+                row[1]
+                for row in conn.execute(
+                    f"PRAGMA main.table_info('{table_name}')"
+                ).fetchall()
+            ]
+            # Missing tables are not cached, another writer may create them
+            if not columns:
+                return None
+            self._columns[table_name] = columns
+
+        return self._columns[table_name]
+
+    def table_exists(self, conn, table_name: str) -> bool:
+        return self.columns(conn, table_name) is not None
+
+    def forget(self, table_name: str) -> None:
+        """Drops the cached layout of a table, e.g. after a rebuild or a rollback"""
+        self._columns.pop(table_name, None)
+        self._applied_ddl_hashes.pop(table_name, None)
+        self._indexes = {
+            index_name
+            for index_name in self._indexes
+            if not index_name.split("_", 1)[1].startswith(f"{table_name}__")
+        }
+
+    def index_known(self, index_name: str) -> bool:
+        return index_name in self._indexes
+
+    def remember_index(self, index_name: str) -> None:
+        self._indexes.add(index_name)
+
+    def ensure_table(self, conn, table_name: str, ddl: str) -> List[str]:
+        """Creates a missing table or adds the columns its DDL gained, without committing
+
+        Returns the table's column names.
+        """
+
+        ddl_hash = _ddl_hash(ddl)
+        if self._applied_ddl_hashes.get(table_name) == ddl_hash:
+            return self._columns[table_name]
+
+        self._ensure_migrations_table(conn)
+
+        statements = None
+        if not self.table_exists(conn, table_name):
+            logger.info(f"Creating new table {table_name}")
+            statements = [f"CREATE TABLE IF NOT EXISTS main.{table_name} {ddl}"]
+        elif read_applied_ddl_hash(conn, table_name) != ddl_hash:
+            statements = _additive_statements(
+                conn,
+                table_name=table_name,
+                ddl=ddl,
+                columns=self.columns(conn, table_name),
+            )
+        else:
+            logger.debug(f"Table {table_name} is up to date")
+
+        if statements is not None:
+            for statement in statements:
+                logger.info(f"Migrating {table_name}: {statement}")
+                conn.execute(statement)
+            self.record_migration(
+                conn, table_name=table_name, ddl=ddl, statements=statements
+            )
+
+        columns = self.columns(conn, table_name)
+        self._applied_ddl_hashes[table_name] = ddl_hash
+
+        return columns
+
+    def record_migration(
+        self, conn, table_name: str, ddl: str, statements: List[str]
+    ) -> None:
+        """Stores a migration of a table as its next version, without committing"""
+
+        self._ensure_migrations_table(conn)
+        conn.execute(
+            f"""
+            INSERT INTO main.{SCHEMA_MIGRATIONS_TABLE_NAME}
+                (table_name, version, ddl_hash, statements, applied_at)
+            SELECT ?, COALESCE(MAX(version), 0) + 1, ?, ?, ?
+            FROM main.{SCHEMA_MIGRATIONS_TABLE_NAME}
+            WHERE table_name = ?
+            """,
+            (
+                table_name,
+                _ddl_hash(ddl),
+                ";\n".join(statements),
+                pendulum.now("UTC").to_datetime_string(),
+                table_name,
+            ),
+        )
+        self.forget(table_name)
+
+    def _ensure_migrations_table(self, conn) -> None:
+        if not self._migrations_table_exists:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS main.{SCHEMA_MIGRATIONS_TABLE_NAME} "
+                f"{SCHEMA_MIGRATIONS_DDL}"
+            )
+            self._migrations_table_exists = True
+
+
+def get_schema_registry(conn) -> SchemaRegistry:
+    """Registry of an open connection, a fresh one for connections opened elsewhere"""
+    return _REGISTRIES.get(id(conn)) or SchemaRegistry()
+
+
+def register_connection(conn) -> None:
+    _REGISTRIES[id(conn)] = SchemaRegistry()
+
+
+def unregister_connection(conn) -> None:
+    _REGISTRIES.pop(id(conn), None)
+
+
+def read_applied_ddl_hash(conn, table_name: str) -> Optional[str]:
+    """Hash of the DDL the latest migration of a table brought it to"""
+
+    row = conn.execute(
+        f"""
+        SELECT ddl_hash
+        FROM main.{SCHEMA_MIGRATIONS_TABLE_NAME}
+        WHERE table_name = ?
+        ORDER BY version DESC
+        LIMIT 1
+        """,
+        (table_name,),
+    ).fetchone()
+
+    return row[0] if row else None
+
+
+def read_table_shape(conn, schema: str, table_name: str) -> Tuple[tuple, bool]:
+    """Columns (name, type, not null, default, primary key position) and strictness"""
+
+    columns = tuple(
+        conn.execute(f"PRAGMA {schema}.table_info('{table_name}')").fetchall()
+    )
+    strict = bool(
+        conn.execute(f"PRAGMA {schema}.table_list('{table_name}')").fetchone()[5]
+    )
+
+    return tuple(column[1:] for column in columns), strict
+
+
+def read_ddl_shape(conn, table_name: str, ddl: str) -> Tuple[tuple, bool]:
+    """Shape of a table created from `ddl`, read from a scratch copy in 'temp'"""
+
+    scratch_table_name = f"migration_{table_name}"
+    conn.execute(f"DROP TABLE IF EXISTS temp.{scratch_table_name}")
+    conn.execute(f"CREATE TABLE temp.{scratch_table_name} {ddl}")
+    shape = read_table_shape(conn, "temp", scratch_table_name)
+    conn.execute(f"DROP TABLE temp.{scratch_table_name}")
+
+    return shape
+
+
+def _ddl_hash(ddl: str) -> str:
+    return hashlib.sha256(" ".join(ddl.split()).encode()).hexdigest()
+
+
+def _additive_statements(
+    conn, table_name: str, ddl: str, columns: List[str]
+) -> List[str]:
+    """`ALTER TABLE ADD COLUMN` statements for the columns `ddl` has and the table lacks
+
+    Anything beyond new columns needs a rebuild with `migrate_table` and is only
+    logged.
+    """
+
+    statements = []
+    target_columns, _ = read_ddl_shape(conn, table_name=table_name, ddl=ddl)
+
+    for name, column_type, not_null, default, pk in target_columns:
+        if name in columns:
+            continue
+
+        if pk:
+            raise ValueError(
+                f"Column '{name}' is part of the primary key of '{table_name}' "
+                "and can not be added, rebuild the table with 'migrate_table'"
+            )
+
+        column_def = f"{name} {column_type}"
+        # SQLite only adds columns with a constant default
+        if default is not None and _is_literal(default):
+            column_def += f" DEFAULT {default}"
+            if not_null:
+                column_def += " NOT NULL"
+        elif not_null or default is not None:
+            logger.warning(
+                f"Adding column '{name}' to '{table_name}' without its default and "
+                "NOT NULL constraint, they apply once the table is rebuilt for a "
+                "change of its columns, types or keys"
+            )
+
+        statements.append(f"ALTER TABLE main.{table_name} ADD COLUMN {column_def}")
+
+    target_names = [column[0] for column in target_columns]
+    removed_columns = [column for column in columns if column not in target_names]
+    if removed_columns:
+        logger.warning(
+            f"Columns {removed_columns} of '{table_name}' are not in its DDL anymore, "
+            "keeping them"
+        )
+
+    return statements
+
+
+def _is_literal(default: str) -> bool:
+    """Whether a default from `PRAGMA table_info` is a constant
+
+    Function defaults come back without their outer parentheses, e.g. `date('now')`,
+    so anything but a literal counts as an expression.
+    """
+    return _LITERAL_DEFAULT.fullmatch(default.strip()) is not None
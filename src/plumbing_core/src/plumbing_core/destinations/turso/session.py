@@ -0,0 +1,109 @@
+import time
+import logging
+from contextlib import ExitStack, contextmanager
+from typing import Optional
+
+from .config import TursoConfig
+from .connection import get_turso_connection, is_embedded_replica
+
+logger = logging.getLogger(__name__)
+
+
+class TursoSession:
+    """Turso connection shared by all readers and writers of a pipeline run
+
+    Syncs the embedded replica once when opened and once when closed. Optionally
+    syncs in between every `sync_every_n_writes` writes or once `sync_every_seconds`
+    have passed since the last sync.
+    """
+
+    def __init__(
+        self,
+        config: TursoConfig,
+        sync_every_n_writes: Optional[int] = None,
+        sync_every_seconds: Optional[float] = None,
+    ):
+        self.config = config
+        self.sync_every_n_writes = sync_every_n_writes
+        self.sync_every_seconds = sync_every_seconds
+        self.sync_count = 0
+        self._conn = None
+        self._exit_stack = ExitStack()
+        self._writes_since_sync = 0
+        self._last_sync_at = time.monotonic()
+
+    def __enter__(self) -> "TursoSession":
+        self._conn = self._exit_stack.enter_context(get_turso_connection(self.config))
+        self.sync()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is not None:
+                self._conn.rollback()
+                logger.error(f"Session rolled back due to error: {exc_value}")
+            self.sync()
+        finally:
+            self._conn = None
+            self._exit_stack.close()
+
+    @property
+    def conn(self):
+        """The session's open connection"""
+        if self._conn is None:
+            raise RuntimeError("TursoSession is not open, use it as a context manager")
+        return self._conn
+
+    def sync(self) -> None:
+        """Syncs the embedded replica with its remote, no-op for local databases"""
+        if is_embedded_replica(self.config):
+            self.conn.sync()
+            self.sync_count += 1
+            logger.debug(f"Synced embedded replica ({self.sync_count} syncs)")
+
+        self._writes_since_sync = 0
+        self._last_sync_at = time.monotonic()
+
+    def record_write(self) -> None:
+        """Registers a committed write and syncs if the sync policy is due"""
+        self._writes_since_sync += 1
+
+        writes_due = (
+            self.sync_every_n_writes is not None
+            and self._writes_since_sync >= self.sync_every_n_writes
+        )
+        time_due = (
+            self.sync_every_seconds is not None
+            and time.monotonic() - self._last_sync_at >= self.sync_every_seconds
+        )
+        if writes_due or time_due:
+            self.sync()
+
+
+@contextmanager
+def get_session_connection(
+    config: TursoConfig,
+    session: Optional[TursoSession] = None,
+    write: bool = False,
+):
+    """Connection of the passed session, else a connection synced before and after use
+
+    Without a session a write syncs afterwards even when it raised, so the replica
+    does not stay behind its remote after a failed run.
+    """
+
+    if session is not None:
+        yield session.conn
+        if write:
+            session.record_write()
+        return
+
+    with get_turso_connection(config) as conn:
+        if is_embedded_replica(config):
+            conn.sync()
+
+        try:
+            yield conn
+        finally:
+            if write and is_embedded_replica(config):
+                conn.sync()
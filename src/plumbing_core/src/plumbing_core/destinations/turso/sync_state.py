@@ -0,0 +1,233 @@
+import logging
+from typing import Dict, List, Optional
+
+import pendulum
+
+from plumbing_core.shared import WriteResult
+
+from .schema_registry import get_schema_registry
+
+logger = logging.getLogger(__name__)
+
+SYNC_STATE_TABLE_NAME = "sync_state"
+SYNC_STATE_DDL = """(
+    source TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    watermark TEXT,
+    last_run_at TEXT,
+    last_run_received INTEGER,
+    last_run_inserted INTEGER,
+    content_hash TEXT,
+    PRIMARY KEY (source, table_name, account_id)
+)"""
+
+
+def ensure_sync_state_table(conn) -> None:
+    """Ensure the sync state table exists and has all columns of its DDL"""
+
+    # Tables created before the content hash was tracked gain its column
+    get_schema_registry(conn).ensure_table(
+        conn, table_name=SYNC_STATE_TABLE_NAME, ddl=SYNC_STATE_DDL
+    )
+
+
+def read_watermarks(
+    conn,
+    source: str,
+    table_name: str,
+    account_ids: List[str],
+) -> Dict[str, Optional[str]]:
+    """Reads the stored watermarks of the passed accounts with one query"""
+
+    if not account_ids:
+        return {}
+
+    placeholders = ", ".join(["?" for _ in account_ids])
+    rows = conn.execute(
+        f"""
+        SELECT account_id, watermark
+        FROM main.{SYNC_STATE_TABLE_NAME}
+        WHERE source = ? AND table_name = ? AND account_id IN ({placeholders})
+        """,
+        (source, table_name, *account_ids),
+    ).fetchall()
+
+    return {account_id: watermark for account_id, watermark in rows}
+
+
+def backfill_watermarks(
+    conn,
+    source: str,
+    table_name: str,
+    date_field: str,
+    account_ids: List[str],
+) -> Dict[str, Optional[str]]:
+    """Seeds missing state rows from 'MAX(date_field)' of the data table, once"""
+
+    if not account_ids:
+        return {}
+
+    placeholders = ", ".join(["?" for _ in account_ids])
+    rows = conn.execute(
+        f"""
+        SELECT account_id, MAX({date_field})
+        FROM main.{table_name}
+        WHERE account_id IN ({placeholders})
+        GROUP BY account_id
+        """,
+        tuple(account_ids),
+    ).fetchall()
+    max_dates = {account_id: watermark for account_id, watermark in rows}
+    watermarks = {account_id: max_dates.get(account_id) for account_id in account_ids}
+
+    conn.executemany(
+        f"""
+        INSERT INTO main.{SYNC_STATE_TABLE_NAME} (source, table_name, account_id, watermark)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (source, table_name, account_id) DO NOTHING
+        """,
+        [
+            (source, table_name, account_id, watermark)
+            for account_id, watermark in watermarks.items()
+        ],
+    )
+    logger.info(f"Backfilled {len(watermarks)} watermarks from '{table_name}'")
+
+    return watermarks
+
+
+def ensure_watermark(
+    conn,
+    source: str,
+    table_name: str,
+    date_field: str,
+    account_id: str,
+) -> Optional[str]:
+    """Reads an account's watermark, seeding its state row first if missing"""
+
+    ensure_sync_state_table(conn)
+
+    stored = read_watermarks(
+        conn=conn, source=source, table_name=table_name, account_ids=[account_id]
+    )
+    if account_id in stored:
+        return stored[account_id]
+
+    return backfill_watermarks(
+        conn=conn,
+        source=source,
+        table_name=table_name,
+        date_field=date_field,
+        account_ids=[account_id],
+    ).get(account_id)
+
+
+def update_watermark(
+    conn,
+    source: str,
+    table_name: str,
+    date_field: str,
+    account_id: str,
+    batch_watermark: Optional[str],
+    write_result: WriteResult,
+    received_count: int,
+) -> Optional[str]:
+    """Advances an account's watermark and run stats, without committing"""
+
+    current_watermark = ensure_watermark(
+        conn=conn,
+        source=source,
+        table_name=table_name,
+        date_field=date_field,
+        account_id=account_id,
+    )
+
+    watermark = max(
+        [value for value in [current_watermark, batch_watermark] if value],
+        default=None,
+    )
+
+    conn.execute(
+        f"""
+        INSERT INTO main.{SYNC_STATE_TABLE_NAME} (
+            source, table_name, account_id, watermark,
+            last_run_at, last_run_received, last_run_inserted
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (source, table_name, account_id) DO UPDATE SET
+            watermark = excluded.watermark,
+            last_run_at = excluded.last_run_at,
+            last_run_received = excluded.last_run_received,
+            last_run_inserted = excluded.last_run_inserted
+        """,
+        (
+            source,
+            table_name,
+            account_id,
+            watermark,
+            pendulum.now("UTC").to_datetime_string(),
+            received_count,
+            write_result.inserted,
+        ),
+    )
+    logger.info(f"Watermark for '{account_id}' in '{table_name}' = '{watermark}'")
+
+    return watermark
+
+
+def read_content_hash(
+    conn,
+    source: str,
+    table_name: str,
+    account_id: str,
+) -> Optional[str]:
+    """Reads the hash of an account's rows as last written to a full refresh table"""
+
+    row = conn.execute(
+        f"""
+        SELECT content_hash
+        FROM main.{SYNC_STATE_TABLE_NAME}
+        WHERE source = ? AND table_name = ? AND account_id = ?
+        """,
+        (source, table_name, account_id),
+    ).fetchone()
+
+    return row[0] if row else None
+
+
+def update_content_hash(
+    conn,
+    source: str,
+    table_name: str,
+    account_id: str,
+    content_hash: str,
+    write_result: WriteResult,
+    received_count: int,
+) -> None:
+    """Stores an account's content hash and run stats, without committing"""
+
+    conn.execute(
+        f"""
+        INSERT INTO main.{SYNC_STATE_TABLE_NAME} (
+            source, table_name, account_id, content_hash,
+            last_run_at, last_run_received, last_run_inserted
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (source, table_name, account_id) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            last_run_at = excluded.last_run_at,
+            last_run_received = excluded.last_run_received,
+            last_run_inserted = excluded.last_run_inserted
+        """,
+        (
+            source,
+            table_name,
+            account_id,
+            content_hash,
+            pendulum.now("UTC").to_datetime_string(),
+            received_count,
+            write_result.inserted,
+        ),
+    )
+    logger.info(f"Content hash for '{account_id}' in '{table_name}' = '{content_hash}'")
@@ -1,49 +1,56 @@
+import hashlib
+import json
 import logging
-from typing import List
+from functools import lru_cache
+from itertools import batched
+from typing import Iterable, List, Literal, Optional, Tuple, Type
 
-from pydantic import BaseModel
+import pendulum
+from pydantic import BaseModel, TypeAdapter
 
 from plumbing_core.processors.categorization.types import CategorizedBankTransaction
+from plumbing_core.shared import WriteResult
 from plumbing_core.sources.comdirect import (
     AccountBalance,
     AccountTransaction,
 )
 from .config import TursoConfig
-from .connection import get_turso_connection, is_embedded_replica
+from .schema_registry import get_schema_registry
+from .session import TursoSession, get_session_connection
+from .sync_state import (
+    ensure_sync_state_table,
+    ensure_watermark,
+    read_content_hash,
+    update_content_hash,
+    update_watermark,
+)
 
 logger = logging.getLogger(__name__)
 
+# Staging tables live in the connection-local temp schema, so creating, filling and
+# dropping them never produces WAL frames that an embedded replica has to sync
+STAGING_SCHEMA = "temp"
+
+# Rows per committed batch of the streaming writers
+DEFAULT_BATCH_SIZE = 1_000
+
 
 def _ensure_table_exists(
     conn,
     table_name: str,
     ddl: str,
 ) -> None:
-    """Ensure table schema exists in Turso database, create if needed"""
-
-    table_exists = (
-        conn.execute(
-            f"""
-            SELECT COUNT(*) FROM main.sqlite_master
-            WHERE type='table' AND name='{table_name}'
-            """
-        ).fetchone()[0]
-        > 0
-    )
+    """Ensure table schema exists in Turso database, create or migrate if needed
 
-    is_staging_table = table_name.startswith("staging_")
+    Staging tables are recreated. Regular tables are looked up once per connection
+    in its schema registry, which also adds columns the DDL gained.
+    """
 
     # For staging tables, drop and recreate; for regular tables, only create if not exists
-    if is_staging_table or not table_exists:
-        if is_staging_table:
-            # Drop staging table if exists, then create new one
-            conn.execute(f"DROP TABLE IF EXISTS main.{table_name}")
-            create_table_str = f"CREATE TABLE main.{table_name}"
-            logger.info(f"Dropped staging table {table_name}")
-        else:
-            create_table_str = f"CREATE TABLE IF NOT EXISTS main.{table_name}"
-            logger.info(f"Creating new table {table_name}")
-
+    if table_name.startswith("staging_"):
+        # Drop staging table if exists, then create new one
+        conn.execute(f"DROP TABLE IF EXISTS {STAGING_SCHEMA}.{table_name}")
+        create_table_str = f"CREATE TABLE {STAGING_SCHEMA}.{table_name}"
         logger.debug(
             f"Creating table {table_name} with statement: {create_table_str} and definition: {ddl}"
         )
@@ -53,9 +60,46 @@ def _ensure_table_exists(
             {ddl}
             """
         )
-        logger.info(f"Created table {table_name}")
-    else:
-        logger.info(f"Table {table_name} already exists")
+        logger.debug(f"Created staging table {table_name}")
+        return
+
+    get_schema_registry(conn).ensure_table(conn, table_name=table_name, ddl=ddl)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model_class: Type[BaseModel]) -> TypeAdapter:
+    """Cached `TypeAdapter` to serialize a list of models in a single call"""
+    return TypeAdapter(List[model_class])
+
+
+def _serialize_rows(data: List[BaseModel]) -> Tuple[List[str], List[tuple]]:
+    """Serializes models once into column names and column-ordered row tuples"""
+
+    dumped = _list_adapter(type(data[0])).dump_python(data, mode="json")
+    columns = list(dumped[0].keys())
+    rows = [tuple(row.values()) for row in dumped]
+
+    return columns, rows
+
+
+def _bulk_insert(
+    conn,
+    table_name: str,
+    columns: List[str],
+    rows: List[tuple],
+    schema: str = "main",
+) -> None:
+    """Loads all rows into a table with a single `executemany` call"""
+
+    columns_str = ", ".join(columns)
+    placeholders = ", ".join(["?" for _ in columns])
+
+    insert_sql = (
+        f"INSERT INTO {schema}.{table_name} ({columns_str}) VALUES ({placeholders})"
+    )
+    logger.debug(f"Bulk loading {len(rows)} rows with SQL: {insert_sql}")
+
+    conn.executemany(insert_sql, rows)
 
 
 def _delete_and_insert(
@@ -64,13 +108,13 @@ def _delete_and_insert(
     table_name: str,
     delete_keys: List[str],
     ddl: str,
-) -> int:
+) -> WriteResult:
     """Delete existing records matching staging data and insert new data using staging table"""
 
     len_new_data = len(data)
     if len_new_data < 1:
         logger.info("No new data, returning")
-        return 0
+        return WriteResult()
 
     if not delete_keys:
         raise ValueError("'delete_keys' is required.")
@@ -82,66 +126,141 @@ def _delete_and_insert(
     _ensure_table_exists(conn=conn, table_name=staging_table_name, ddl=ddl)
 
     # Populate staging table with new data
-    row_data = data[0].model_dump()
-    columns = list(row_data.keys())
-    columns_str = ", ".join(columns)
-    placeholders = ", ".join(["?" for _ in columns])
-
-    insert_sql = (
-        f"INSERT INTO main.{staging_table_name} ({columns_str}) VALUES ({placeholders})"
+    columns, rows = _serialize_rows(data)
+    _bulk_insert(
+        conn=conn,
+        table_name=staging_table_name,
+        columns=columns,
+        rows=rows,
+        schema=STAGING_SCHEMA,
     )
-    logger.debug(f"Populating staging table with SQL: {insert_sql}")
-
-    for row in data:
-        row_values = list(row.model_dump(mode="json").values())
-        conn.execute(insert_sql, row_values)
-    logger.info(f"Populated staging table {staging_table_name} with {len(data)} rows")
-
-    row_count_before = conn.execute(
-        f"SELECT COUNT(*) FROM main.{table_name}"
-    ).fetchone()[0]
+    logger.info(f"Populated staging table {staging_table_name} with {len(rows)} rows")
 
     # Delete existing records that match staging data
     where_condition = " AND ".join(
         [
-            f"main.{table_name}.{key} = main.{staging_table_name}.{key}"
+            f"main.{table_name}.{key} = {STAGING_SCHEMA}.{staging_table_name}.{key}"
             for key in delete_keys
         ]
     )
     delete_sql = f"""
         DELETE FROM main.{table_name}
         WHERE EXISTS (
-            SELECT 1 FROM main.{staging_table_name}
+            SELECT 1 FROM {STAGING_SCHEMA}.{staging_table_name}
             WHERE {where_condition}
         )
     """
     logger.debug(f"Executing DELETE: {delete_sql}")
-    conn.execute(delete_sql)
-    logger.info(f"Executed DELETE for records matching {len_new_data} staged rows")
+    deleted_row_count = conn.execute(delete_sql).rowcount
+    logger.info(
+        f"Deleted {deleted_row_count} records matching {len_new_data} staged rows"
+    )
 
-    # Insert all records from staging table
+    # Insert all records from staging table, by name as migrated tables append
+    # new columns at the end
+    columns_str = ", ".join(columns)
     insert_sql = f"""
-        INSERT INTO main.{table_name}
-        SELECT * FROM main.{staging_table_name}
+        INSERT INTO main.{table_name} ({columns_str})
+        SELECT {columns_str} FROM {STAGING_SCHEMA}.{staging_table_name}
     """
     logger.debug(f"Executing INSERT: {insert_sql}")
-    conn.execute(insert_sql)
+    inserted_row_count = conn.execute(insert_sql).rowcount
 
     # Clean up staging table
     logger.debug("Dropping staging table")
-    conn.execute(f"DROP TABLE IF EXISTS main.{staging_table_name}")
+    conn.execute(f"DROP TABLE IF EXISTS {STAGING_SCHEMA}.{staging_table_name}")
 
-    row_count_after = conn.execute(
-        f"SELECT COUNT(*) FROM main.{table_name}"
-    ).fetchone()[0]
+    logger.info(
+        f"Inserted {inserted_row_count} new records "
+        f"(net change: {inserted_row_count - deleted_row_count})"
+    )
 
-    conn.commit()
-    logger.info("Completed transaction")
+    return WriteResult(
+        inserted=inserted_row_count,
+        deleted=deleted_row_count,
+        staged=len(rows),
+    )
+
+
+def _content_hash(columns: List[str], rows: List[tuple]) -> str:
+    """Order-independent hash of a set of serialized rows"""
+
+    digest = hashlib.sha256(json.dumps(columns).encode())
+    for row in sorted(json.dumps(row) for row in rows):
+        digest.update(b"\n" + row.encode())
+
+    return digest.hexdigest()
+
+
+def _apply_diff(
+    conn,
+    columns: List[str],
+    rows: List[tuple],
+    table_name: str,
+    scope_key: str,
+    scope_value: str,
+    ddl: str,
+) -> WriteResult:
+    """Replaces the rows of one scope with the passed rows, touching only the difference
+
+    Rows are matched on all passed columns, rows equal in both are left as they are.
+    Duplicates among the passed rows are written once.
+    """
+
+    staging_table_name = "staging_" + table_name
+
+    _ensure_table_exists(conn=conn, table_name=staging_table_name, ddl=ddl)
+    if rows:
+        _bulk_insert(
+            conn=conn,
+            table_name=staging_table_name,
+            columns=columns,
+            rows=rows,
+            schema=STAGING_SCHEMA,
+        )
+
+    # NULL-safe comparison, pending transactions often lack a reference
+    match_condition = " AND ".join(
+        [
+            f"main.{table_name}.{column} IS {STAGING_SCHEMA}.{staging_table_name}.{column}"
+            for column in columns
+        ]
+    )
+    columns_str = ", ".join(columns)
+
+    deleted_row_count = conn.execute(
+        f"""
+        DELETE FROM main.{table_name}
+        WHERE {scope_key} = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM {STAGING_SCHEMA}.{staging_table_name}
+                WHERE {match_condition}
+            )
+        """,
+        (scope_value,),
+    ).rowcount
+    inserted_row_count = conn.execute(
+        f"""
+        INSERT INTO main.{table_name} ({columns_str})
+        SELECT DISTINCT {columns_str} FROM {STAGING_SCHEMA}.{staging_table_name}
+        WHERE NOT EXISTS (
+            SELECT 1 FROM main.{table_name}
+            WHERE {match_condition}
+        )
+        """
+    ).rowcount
+
+    conn.execute(f"DROP TABLE IF EXISTS {STAGING_SCHEMA}.{staging_table_name}")
     logger.info(
-        f"Inserted {len_new_data} new records (net change: {row_count_after - row_count_before})"
+        f"Deleted {deleted_row_count} and inserted {inserted_row_count} records "
+        f"of {len(rows)} staged rows"
     )
 
-    return len_new_data
+    return WriteResult(
+        inserted=inserted_row_count,
+        deleted=deleted_row_count,
+        staged=len(rows),
+    )
 
 
 def _insert_if_not_exists(
@@ -150,7 +269,7 @@ def _insert_if_not_exists(
     table_name: str,
     on_conflict_keys: List[str],
     ddl: str,
-) -> int:
+) -> WriteResult:
     """Inserts new records if not exists"""
 
     staging_table_name = "staging_" + table_name
@@ -162,58 +281,176 @@ def _insert_if_not_exists(
     _ensure_table_exists(conn=conn, table_name=staging_table_name, ddl=ddl)
 
     # Populate staging table with new data
-    row_data = data[0].model_dump()
-    columns = list(row_data.keys())
-    columns_str = ", ".join(columns)
-    placeholders = ", ".join(["?" for _ in columns])
-
-    insert_sql = (
-        f"INSERT INTO main.{staging_table_name} ({columns_str}) VALUES ({placeholders})"
+    columns, rows = _serialize_rows(data)
+    _bulk_insert(
+        conn=conn,
+        table_name=staging_table_name,
+        columns=columns,
+        rows=rows,
+        schema=STAGING_SCHEMA,
     )
-    logger.debug(f"Populating staging table with SQL: {insert_sql}")
-
-    for row in data:
-        row_values = list(row.model_dump(mode="json").values())
-        conn.execute(insert_sql, row_values)
-    logger.info(f"Populated staging table {staging_table_name} with {len(data)} rows")
-
-    row_count_before = conn.execute(
-        f"SELECT COUNT(*) FROM main.{table_name}"
-    ).fetchone()[0]
+    logger.info(f"Populated staging table {staging_table_name} with {len(rows)} rows")
 
     # Filter incoming data to only new data
     where_condition = " AND ".join(
         [
-            f"main.{table_name}.{key} = main.{staging_table_name}.{key}"
+            f"main.{table_name}.{key} = {STAGING_SCHEMA}.{staging_table_name}.{key}"
             for key in on_conflict_keys
         ]
     )
 
-    # 'INSERT INTO SELECT *'
+    columns_str = ", ".join(columns)
     insert_sql = f"""
-        INSERT INTO main.{table_name}
-        SELECT * FROM main.{staging_table_name}
+        INSERT INTO main.{table_name} ({columns_str})
+        SELECT {columns_str} FROM {STAGING_SCHEMA}.{staging_table_name}
         WHERE NOT EXISTS (
             SELECT 1 FROM main.{table_name}
             WHERE {where_condition}
         )
     """
     logger.debug(f"Executing INSERT: {insert_sql}")
-    conn.execute(insert_sql)
+    inserted_row_count = conn.execute(insert_sql).rowcount
 
     logger.debug("Dropping staging table")
-    conn.execute(f"DROP TABLE IF EXISTS main.{staging_table_name}")
+    conn.execute(f"DROP TABLE IF EXISTS {STAGING_SCHEMA}.{staging_table_name}")
 
-    row_count_after = conn.execute(
-        f"SELECT COUNT(*) FROM main.{table_name}"
-    ).fetchone()[0]
-    inserted_row_count = row_count_after - row_count_before
     logger.info(f"INSERTED {inserted_row_count} new records")
 
-    conn.commit()
-    logger.info("Completed transaction")
+    return WriteResult(inserted=inserted_row_count, staged=len(rows))
+
+
+def _ensure_unique_index(
+    conn,
+    table_name: str,
+    unique_keys: List[str],
+    keep: Literal["first", "last"],
+) -> str:
+    """Ensure a unique index on `unique_keys` exists, dedup the table before creating it
+
+    Does not commit, the calling writer commits the index with its rows.
+    """
+
+    index_name = f"ux_{table_name}__{'__'.join(unique_keys)}"
+    registry = get_schema_registry(conn)
+    if registry.index_known(index_name):
+        return index_name
+
+    # A primary key on the same columns already enforces uniqueness
+    primary_key = [
+        row[0]
+        for row in conn.execute(
+            f"SELECT name FROM PRAGMA_TABLE_INFO('{table_name}') WHERE pk > 0 ORDER BY pk"
+        ).fetchall()
+    ]
+    if primary_key == list(unique_keys):
+        logger.debug(f"Primary key of {table_name} covers {unique_keys}")
+        registry.remember_index(index_name)
+        return index_name
+
+    index_exists = (
+        conn.execute(
+            f"""
+            SELECT COUNT(*) FROM main.sqlite_master
+            WHERE type='index' AND name='{index_name}'
+            """
+        ).fetchone()[0]
+        > 0
+    )
+    if index_exists:
+        logger.debug(f"Index {index_name} already exists")
+        registry.remember_index(index_name)
+        return index_name
+
+    # Rows with a NULL key never conflict in a unique index, so leave them alone
+    keys_str = ", ".join(unique_keys)
+    keys_not_null = " AND ".join([f"{key} IS NOT NULL" for key in unique_keys])
+    keep_rowid = "MIN(rowid)" if keep == "first" else "MAX(rowid)"
+    dedup_sql = f"""
+        DELETE FROM main.{table_name}
+        WHERE {keys_not_null}
+            AND rowid NOT IN (
+                SELECT {keep_rowid} FROM main.{table_name}
+                WHERE {keys_not_null}
+                GROUP BY {keys_str}
+            )
+    """
+    logger.debug(f"Executing DEDUP: {dedup_sql}")
+    removed_count = conn.execute(dedup_sql).rowcount
+    logger.info(f"Removed {removed_count} duplicate rows from {table_name}")
+
+    conn.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS main.{index_name} ON {table_name} ({keys_str})"
+    )
+    registry.remember_index(index_name)
+    logger.info(f"Created unique index {index_name}")
+
+    return index_name
+
+
+def _upsert(
+    conn,
+    data: List[BaseModel],
+    table_name: str,
+    conflict_keys: List[str],
+    on_conflict: Literal["nothing", "update"],
+) -> WriteResult:
+    """Writes directly to the target table with 'INSERT ... ON CONFLICT'"""
+
+    if not conflict_keys:
+        raise ValueError("'conflict_keys' is required.")
+
+    _ensure_unique_index(
+        conn=conn,
+        table_name=table_name,
+        unique_keys=conflict_keys,
+        keep="first" if on_conflict == "nothing" else "last",
+    )
+
+    columns, rows = _serialize_rows(data)
+    columns_str = ", ".join(columns)
+    placeholders = ", ".join(["?" for _ in columns])
+    conflict_keys_str = ", ".join(conflict_keys)
+
+    if on_conflict == "nothing":
+        conflict_sql = "DO NOTHING"
+    else:
+        # Refresh every non-key column, defaults included, like a delete+insert would
+        table_columns = get_schema_registry(conn).columns(conn, table_name)
+        update_str = ", ".join(
+            [
+                f"{column} = excluded.{column}"
+                for column in table_columns
+                if column not in conflict_keys
+            ]
+        )
+        conflict_sql = f"DO UPDATE SET {update_str}"
+
+    upsert_sql = f"""
+        INSERT INTO main.{table_name} ({columns_str}) VALUES ({placeholders})
+        ON CONFLICT ({conflict_keys_str}) {conflict_sql}
+    """
+    logger.debug(f"Executing UPSERT: {upsert_sql}")
+
+    # Updated rows keep their rowid, so new rows are the ones above the previous max
+    max_rowid_before = conn.execute(
+        f"SELECT COALESCE(MAX(rowid), 0) FROM main.{table_name}"
+    ).fetchone()[0]
+    written_row_count = conn.executemany(upsert_sql, rows).rowcount
+
+    if on_conflict == "nothing":
+        inserted_row_count = written_row_count
+    else:
+        inserted_row_count = conn.execute(
+            f"SELECT COUNT(*) FROM main.{table_name} WHERE rowid > ?",
+            (max_rowid_before,),
+        ).fetchone()[0]
+
+    logger.info(f"Upserted {written_row_count} records ({inserted_row_count} inserted)")
 
-    return inserted_row_count
+    return WriteResult(
+        inserted=inserted_row_count,
+        updated=written_row_count - inserted_row_count,
+    )
 
 
 def write_account_balances(
@@ -222,41 +459,171 @@ def write_account_balances(
     ddl: str,
     table_name: str = "account_balances",
     delete_keys: List[str] = ["account_id", "_inserted_at_day"],
-) -> int:
-    """Write account balances using transactional delete+insert"""
+    write_strategy: Literal["staging", "upsert"] = "staging",
+    session: Optional[TursoSession] = None,
+) -> WriteResult:
+    """Write account balances using transactional delete+insert or upsert"""
 
     if not balances:
         logger.info("No balances passed, returning early")
-        return 0
-
-    with get_turso_connection(config) as conn:
-        if is_embedded_replica(config):
-            conn.sync()
+        return WriteResult()
 
+    with get_session_connection(config, session=session, write=True) as conn:
         try:
             # Ensure table schema exists
             _ensure_table_exists(conn=conn, table_name=table_name, ddl=ddl)
 
-            # Always use delete and insert strategy
-            inserted_count = _delete_and_insert(
+            if write_strategy == "upsert":
+                write_result = _upsert(
+                    conn=conn,
+                    data=balances,
+                    table_name=table_name,
+                    conflict_keys=delete_keys,
+                    on_conflict="update",
+                )
+            else:
+                write_result = _delete_and_insert(
+                    conn=conn,
+                    data=balances,
+                    table_name=table_name,
+                    delete_keys=delete_keys,
+                    ddl=ddl,
+                )
+
+            conn.commit()
+            logger.info(f"Transaction committed: {write_result}")
+
+            return write_result
+
+        except Exception as e:
+            conn.rollback()
+            get_schema_registry(conn).forget(table_name)
+            logger.error(f"Transaction rolled back due to error: {e}")
+            raise
+
+
+def _ensure_history_indexes(conn, table_name: str) -> None:
+    """Ensure the indexes of a history table exist
+
+    A partial unique index allows one current row per account, a second one on
+    (account_id, valid_from) serves as-of lookups.
+    """
+
+    conn.execute(
+        f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS main.ux_{table_name}__account_id__current
+        ON {table_name} (account_id) WHERE valid_to IS NULL
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS main.ix_{table_name}__account_id__valid_from
+        ON {table_name} (account_id, valid_from)
+        """
+    )
+
+
+def write_account_balances_history(
+    balances: List[AccountBalance],
+    config: TursoConfig,
+    ddl: str,
+    table_name: str = "account_balances__history",
+    valid_from: Optional[pendulum.DateTime] = None,
+    session: Optional[TursoSession] = None,
+) -> WriteResult:
+    """Write account balances as change events with valid_from/valid_to intervals
+
+    An account gets a new row only when any of its fields differ from its current
+    row, which is closed at `valid_from` (default: now). Unchanged accounts are
+    not written at all. An account passed more than once keeps its last balance.
+    """
+
+    if not balances:
+        logger.info("No balances passed, returning early")
+        return WriteResult()
+
+    # One current row per account, the latest balance of a batch wins
+    balances = list({balance.account_id: balance for balance in balances}.values())
+
+    valid_from_str = (
+        (valid_from or pendulum.now("UTC")).in_timezone("UTC").to_datetime_string()
+    )
+    staging_table_name = "staging_" + table_name
+
+    with get_session_connection(config, session=session, write=True) as conn:
+        try:
+            # Ensure table schema and indexes exist
+            _ensure_table_exists(conn=conn, table_name=table_name, ddl=ddl)
+            _ensure_history_indexes(conn=conn, table_name=table_name)
+
+            columns, rows = _serialize_rows(balances)
+            _ensure_table_exists(conn=conn, table_name=staging_table_name, ddl=ddl)
+            _bulk_insert(
                 conn=conn,
-                data=balances,
-                table_name=table_name,
-                delete_keys=delete_keys,
-                ddl=ddl,
+                table_name=staging_table_name,
+                columns=columns + ["valid_from"],
+                rows=[row + (valid_from_str,) for row in rows],
+                schema=STAGING_SCHEMA,
             )
 
-            if is_embedded_replica(config):
-                conn.sync()
+            # NULL-safe comparison of every balance field with the current row
+            unchanged_condition = " AND ".join(
+                [
+                    f"main.{table_name}.{column} IS {STAGING_SCHEMA}.{staging_table_name}.{column}"
+                    for column in columns
+                ]
+            )
+            columns_str = ", ".join(columns)
+
+            # Close the current rows of changed accounts
+            updated_row_count = conn.execute(
+                f"""
+                UPDATE main.{table_name}
+                SET valid_to = ?
+                WHERE valid_to IS NULL
+                    AND EXISTS (
+                        SELECT 1 FROM {STAGING_SCHEMA}.{staging_table_name}
+                        WHERE {STAGING_SCHEMA}.{staging_table_name}.account_id
+                            = main.{table_name}.account_id
+                    )
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {STAGING_SCHEMA}.{staging_table_name}
+                        WHERE {unchanged_condition}
+                    )
+                """,
+                (valid_from_str,),
+            ).rowcount
+
+            # Open a row for every account without a current one
+            inserted_row_count = conn.execute(
+                f"""
+                INSERT INTO main.{table_name} ({columns_str}, valid_from)
+                SELECT {columns_str}, valid_from
+                FROM {STAGING_SCHEMA}.{staging_table_name}
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM main.{table_name}
+                    WHERE main.{table_name}.account_id
+                        = {STAGING_SCHEMA}.{staging_table_name}.account_id
+                        AND main.{table_name}.valid_to IS NULL
+                )
+                """
+            ).rowcount
+
+            conn.execute(f"DROP TABLE IF EXISTS {STAGING_SCHEMA}.{staging_table_name}")
+
+            write_result = WriteResult(
+                inserted=inserted_row_count,
+                updated=updated_row_count,
+                staged=len(rows),
+            )
+            conn.commit()
+            logger.info(f"Transaction committed: {write_result}")
 
-            return inserted_count
+            return write_result
 
         except Exception as e:
             conn.rollback()
-
-            if is_embedded_replica(config):
-                conn.sync()
-
+            get_schema_registry(conn).forget(table_name)
             logger.error(f"Transaction rolled back due to error: {e}")
             raise
 
@@ -268,93 +635,264 @@ def write_account_transactions_booked(
     ddl: str,
     table_name: str = "account_transactions__booked",
     delete_keys: List[str] = ["account_id", "reference"],
-) -> int:
-    """Write account transactions using transactional 'insert if not exists'"""
+    write_strategy: Literal["staging", "upsert"] = "staging",
+    session: Optional[TursoSession] = None,
+    source: str = "comdirect",
+) -> WriteResult:
+    """Write account transactions using transactional 'insert if not exists' or upsert
+
+    Advances the account's `booking_date` watermark in the sync state table within
+    the same transaction.
+    """
 
     if not transactions:
         logger.info("No transactions passed, returning")
-        return 0
+        return WriteResult()
 
-    # Use model_copy to add account_id without pandas
-    enhanced_transactions = [
-        transaction.model_copy(update={"account_id": account_id})
-        for transaction in transactions
-    ]
-
-    with get_turso_connection(config) as conn:
+    with get_session_connection(config, session=session, write=True) as conn:
         try:
-            if is_embedded_replica(config):
-                conn.sync()
-
-            # Ensure table schema exists
-            _ensure_table_exists(conn=conn, table_name=table_name, ddl=ddl)
-
-            # Always use insert if not exists strategy
-            inserted_count = _insert_if_not_exists(
+            write_result = _write_booked_batch(
                 conn=conn,
-                data=enhanced_transactions,
+                transactions=transactions,
+                account_id=account_id,
                 table_name=table_name,
                 ddl=ddl,
-                on_conflict_keys=delete_keys,
+                delete_keys=delete_keys,
+                write_strategy=write_strategy,
             )
 
-            logger.info(f"Transaction commited: {inserted_count} records processesed")
-            if is_embedded_replica(config):
-                conn.sync()
+            update_watermark(
+                conn=conn,
+                source=source,
+                table_name=table_name,
+                date_field="booking_date",
+                account_id=account_id,
+                batch_watermark=_max_booking_date(transactions),
+                write_result=write_result,
+                received_count=len(transactions),
+            )
 
-            return inserted_count
+            conn.commit()
+            logger.info(f"Transaction committed: {write_result}")
+
+            return write_result
 
         except Exception as e:
             conn.rollback()
+            get_schema_registry(conn).forget(table_name)
             logger.error(f"Transaction rolled back due to error: {e}")
             raise
 
 
+def write_account_transactions_booked_batched(
+    transactions: Iterable[AccountTransaction],
+    account_id: str,
+    config: TursoConfig,
+    ddl: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    table_name: str = "account_transactions__booked",
+    delete_keys: List[str] = ["account_id", "reference"],
+    write_strategy: Literal["staging", "upsert"] = "staging",
+    session: Optional[TursoSession] = None,
+    source: str = "comdirect",
+) -> WriteResult:
+    """Write a stream of booked transactions, committing every `batch_size` rows
+
+    Holds at most one batch in memory and keeps committed batches if the stream
+    fails. The watermark only advances once the stream is exhausted: pages arrive
+    newest first, so an earlier watermark would skip the unfetched older rows.
+    """
+
+    write_result = WriteResult()
+    received_count = 0
+    batch_watermark: Optional[str] = None
+
+    with get_session_connection(config, session=session, write=True) as conn:
+        try:
+            # Pin the current watermark before the first batch, otherwise a failed
+            # run would backfill it from the newest rows of the committed batches
+            _ensure_table_exists(conn=conn, table_name=table_name, ddl=ddl)
+            ensure_watermark(
+                conn=conn,
+                source=source,
+                table_name=table_name,
+                date_field="booking_date",
+                account_id=account_id,
+            )
+            conn.commit()
+
+            for batch in batched(transactions, batch_size):
+                batch_result = _write_booked_batch(
+                    conn=conn,
+                    transactions=list(batch),
+                    account_id=account_id,
+                    table_name=table_name,
+                    ddl=ddl,
+                    delete_keys=delete_keys,
+                    write_strategy=write_strategy,
+                )
+                conn.commit()
+                logger.info(f"Batch committed: {batch_result}")
+
+                write_result += batch_result
+                received_count += len(batch)
+                batch_watermark = max(
+                    [
+                        value
+                        for value in [batch_watermark, _max_booking_date(batch)]
+                        if value
+                    ],
+                    default=None,
+                )
+
+            if received_count == 0:
+                logger.info("No transactions passed, returning")
+                return write_result
+
+            update_watermark(
+                conn=conn,
+                source=source,
+                table_name=table_name,
+                date_field="booking_date",
+                account_id=account_id,
+                batch_watermark=batch_watermark,
+                write_result=write_result,
+                received_count=received_count,
+            )
+            conn.commit()
+            logger.info(f"Transaction committed: {write_result}")
+
+            return write_result
+
+        except Exception as e:
+            conn.rollback()
+            get_schema_registry(conn).forget(table_name)
+            logger.error(
+                f"Transaction rolled back due to error: {e}, "
+                f"keeping {write_result.written} rows of committed batches"
+            )
+            raise
+
+
+def _write_booked_batch(
+    conn,
+    transactions: List[AccountTransaction],
+    account_id: str,
+    table_name: str,
+    ddl: str,
+    delete_keys: List[str],
+    write_strategy: Literal["staging", "upsert"],
+) -> WriteResult:
+    """Writes one batch of booked transactions, without committing"""
+
+    # Use model_copy to add account_id without pandas
+    enhanced_transactions = [
+        transaction.model_copy(update={"account_id": account_id})
+        for transaction in transactions
+    ]
+
+    # Ensure table schema exists
+    _ensure_table_exists(conn=conn, table_name=table_name, ddl=ddl)
+
+    if write_strategy == "upsert":
+        return _upsert(
+            conn=conn,
+            data=enhanced_transactions,
+            table_name=table_name,
+            conflict_keys=delete_keys,
+            on_conflict="nothing",
+        )
+
+    return _insert_if_not_exists(
+        conn=conn,
+        data=enhanced_transactions,
+        table_name=table_name,
+        ddl=ddl,
+        on_conflict_keys=delete_keys,
+    )
+
+
+def _max_booking_date(transactions: Iterable[AccountTransaction]) -> Optional[str]:
+    return max(
+        [
+            transaction.booking_date.isoformat()
+            for transaction in transactions
+            if transaction.booking_date
+        ],
+        default=None,
+    )
+
+
 def write_account_transactions_not_booked(
     transactions: List[AccountTransaction],
     account_id: str,
     config: TursoConfig,
     ddl: str,
     table_name: str = "account_transactions__not_booked",
-    delete_keys: List[str] = ["account_id"],
-) -> int:
-    """Write not-booked account transactions using transactional 'delete+insert'"""
-
-    if not transactions:
-        logger.info("No transactions passed, returning")
-        return 0
+    session: Optional[TursoSession] = None,
+    source: str = "comdirect",
+) -> WriteResult:
+    """Refresh an account's not-booked transactions, writing only what changed
+
+    A hash of the account's pending set is kept in the sync state table. An
+    unchanged set is skipped without a write, otherwise only the rows that
+    disappeared or appeared are deleted or inserted. An empty set removes the
+    account's pending rows.
+    """
 
     # Use model_copy to add account_id without pandas
     enhanced_transactions = [
         transaction.model_copy(update={"account_id": account_id})
         for transaction in transactions
     ]
+    columns = list(AccountTransaction.model_fields)
+    rows = _serialize_rows(enhanced_transactions)[1] if enhanced_transactions else []
+    content_hash = _content_hash(columns, rows)
 
-    with get_turso_connection(config) as conn:
+    # The hash is checked on the connection that applies the diff, so nothing
+    # synced in between can make it stale
+    with get_session_connection(config, session=session, write=True) as conn:
         try:
-            if is_embedded_replica(config):
-                conn.sync()
+            ensure_sync_state_table(conn)
+            stored_hash = read_content_hash(
+                conn=conn, source=source, table_name=table_name, account_id=account_id
+            )
+            if stored_hash == content_hash:
+                logger.info(
+                    f"Pending transactions of '{account_id}' unchanged, skipping"
+                )
+                return WriteResult()
 
             # Ensure table schema exists
             _ensure_table_exists(conn=conn, table_name=table_name, ddl=ddl)
 
-            # Always use delete and insert strategy
-            inserted_count = _delete_and_insert(
+            write_result = _apply_diff(
                 conn=conn,
-                data=enhanced_transactions,
+                columns=columns,
+                rows=rows,
                 table_name=table_name,
-                delete_keys=delete_keys,
+                scope_key="account_id",
+                scope_value=account_id,
                 ddl=ddl,
             )
+            update_content_hash(
+                conn=conn,
+                source=source,
+                table_name=table_name,
+                account_id=account_id,
+                content_hash=content_hash,
+                write_result=write_result,
+                received_count=len(rows),
+            )
 
-            logger.info(f"Transaction committed: {inserted_count} records processesed")
-            if is_embedded_replica(config):
-                conn.sync()
+            conn.commit()
+            logger.info(f"Transaction committed: {write_result}")
 
-            return inserted_count
+            return write_result
 
         except Exception as e:
             conn.rollback()
+            get_schema_registry(conn).forget(table_name)
             logger.error(f"Transaction rolled back due to error: {e}")
             raise
 
@@ -365,33 +903,42 @@ def write_account_transactions_categorized(
     ddl: str,
     table_name: str = "account_transactions__categorized",
     delete_keys: List[str] = ["account_id", "reference"],
-) -> int:
+    write_strategy: Literal["staging", "upsert"] = "staging",
+    session: Optional[TursoSession] = None,
+) -> WriteResult:
+    """Write categorized transactions using transactional 'delete+insert' or upsert"""
+
     if not categorized_transactions:
         logger.info("No categorized transactions passed, returning")
-        return 0
+        return WriteResult()
 
-    with get_turso_connection(config) as conn:
+    with get_session_connection(config, session=session, write=True) as conn:
         try:
-            if is_embedded_replica(config):
-                conn.sync()
-
             _ensure_table_exists(conn=conn, table_name=table_name, ddl=ddl)
 
-            inserted_count = _delete_and_insert(
-                conn=conn,
-                data=categorized_transactions,
-                table_name=table_name,
-                delete_keys=delete_keys,
-                ddl=ddl,
-            )
-            logger.info(f"Transaction committed: {inserted_count} records processesed")
-
-            if is_embedded_replica(config):
-                conn.sync()
-
-            return inserted_count
+            if write_strategy == "upsert":
+                write_result = _upsert(
+                    conn=conn,
+                    data=categorized_transactions,
+                    table_name=table_name,
+                    conflict_keys=delete_keys,
+                    on_conflict="update",
+                )
+            else:
+                write_result = _delete_and_insert(
+                    conn=conn,
+                    data=categorized_transactions,
+                    table_name=table_name,
+                    delete_keys=delete_keys,
+                    ddl=ddl,
+                )
+            conn.commit()
+            logger.info(f"Transaction committed: {write_result}")
+
+            return write_result
 
         except Exception as e:
             conn.rollback()
+            get_schema_registry(conn).forget(table_name)
             logger.error(f"Transaction rolled back due to error: {e}")
             raise
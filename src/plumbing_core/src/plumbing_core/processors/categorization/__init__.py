@@ -1,10 +1,15 @@
-from .types import CategorizedBankTransaction, CATEGORIZED_BANK_TRANSACTION_DDL
+from .types import (
+    CategorizedBankTransaction,
+    CATEGORIZED_BANK_TRANSACTION_DDL,
+    CATEGORIZED_BANK_TRANSACTION_INDEXES,
+)
 from .config import PydanticAIConfig, get_comdirect_transaction_categorization_agent
 from .categorize_transactions import categorize_transaction
 
 __all__ = [
     "CategorizedBankTransaction",
     "CATEGORIZED_BANK_TRANSACTION_DDL",
+    "CATEGORIZED_BANK_TRANSACTION_INDEXES",
     "PydanticAIConfig",
     "get_comdirect_transaction_categorization_agent",
     "categorize_transaction",
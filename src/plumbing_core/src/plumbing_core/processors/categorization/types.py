@@ -1,7 +1,7 @@
 from typing import Literal
 from pydantic import Field, BaseModel
 
-from plumbing_core.shared import get_sqlite_ddl_for_model, TIMESTAMP_FIELDS
+from plumbing_core.shared import SQLiteIndex, get_sqlite_ddl_for_model, TIMESTAMP_FIELDS
 
 
 class CategorizedBankTransaction(BaseModel):
@@ -35,3 +35,7 @@ class CategorizedBankTransaction(BaseModel):
 CATEGORIZED_BANK_TRANSACTION_DDL = get_sqlite_ddl_for_model(
     CategorizedBankTransaction, extra_fields=TIMESTAMP_FIELDS
 )
+# Serves the upsert conflicts and the lookup of transactions already categorized
+CATEGORIZED_BANK_TRANSACTION_INDEXES = [
+    SQLiteIndex(columns=("account_id", "reference"), unique=True),
+]
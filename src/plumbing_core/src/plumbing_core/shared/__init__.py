@@ -1,3 +1,4 @@
-from .schemas import get_sqlite_ddl_for_model, TIMESTAMP_FIELDS
+from .schemas import get_sqlite_ddl_for_model, SQLiteIndex, TIMESTAMP_FIELDS
+from .types import WriteResult
 
-__all__ = ["get_sqlite_ddl_for_model", "TIMESTAMP_FIELDS"]
+__all__ = ["get_sqlite_ddl_for_model", "SQLiteIndex", "TIMESTAMP_FIELDS", "WriteResult"]
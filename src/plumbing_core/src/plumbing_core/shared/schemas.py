@@ -1,15 +1,42 @@
 import logging
-from typing import Dict, Type, get_origin, get_args, Union, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Type, get_origin, get_args, Union, Optional
 from pydantic import BaseModel
 import pendulum
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class SQLiteIndex:
+    """Secondary index of a table, declared next to the table's DDL"""
+
+    columns: Tuple[str, ...]
+    unique: bool = False
+
+    def name(self, table_name: str) -> str:
+        prefix = "ux" if self.unique else "ix"
+        return f"{prefix}_{table_name}__{'__'.join(self.columns)}"
+
+    def ddl(self, table_name: str) -> str:
+        unique = "UNIQUE " if self.unique else ""
+        return (
+            f"CREATE {unique}INDEX IF NOT EXISTS main.{self.name(table_name)} "
+            f"ON {table_name} ({', '.join(self.columns)})"
+        )
+
+
 def get_sqlite_ddl_for_model(
-    model_class: Type[BaseModel], extra_fields: Optional[Dict[str, str]] = None
+    model_class: Type[BaseModel],
+    extra_fields: Optional[Dict[str, str]] = None,
+    primary_key: Optional[List[str]] = None,
+    strict: bool = False,
 ) -> str:
-    """Generate SQLite CREATE TABLE DDL from Pydantic model with optional extra fields"""
+    """Generate SQLite CREATE TABLE DDL from Pydantic model with optional extra fields
+
+    Optionally adds a composite PRIMARY KEY and makes the table STRICT, which
+    rejects values that do not match a column's type.
+    """
 
     columns = []
 
@@ -32,7 +59,12 @@ def get_sqlite_ddl_for_model(
         for field_name, field_type in extra_fields.items():
             columns.append(f"{field_name} {field_type}")
 
+    if primary_key:
+        columns.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+
     ddl = "(\n    " + ",\n    ".join(columns) + "\n)"
+    if strict:
+        ddl += " STRICT"
     logger.debug(f"Generated DDL for {model_class.__name__}: {ddl}")
 
     return ddl
@@ -48,19 +80,21 @@ def _map_field_to_sqlite_type(field_type) -> str:
         if args:
             field_type = args[0] if args[1] is type(None) else args[1]
 
-    # Core type mappings - check against type objects, not instances
-    if isinstance(field_type, str):
+    # Core type mappings - check against type objects, bool before its base int
+    if not isinstance(field_type, type):
+        # Literal, nested generics and the like
+        logger.debug(f"Unknown field type {field_type}, defaulting to TEXT")
         return "TEXT"
-    elif isinstance(field_type, int):
+    elif issubclass(field_type, bool):
+        return "INTEGER"  # SQLite stores booleans as 0/1
+    elif issubclass(field_type, int):
         return "INTEGER"
-    elif isinstance(field_type, float):
+    elif issubclass(field_type, float):
         return "REAL"
-    elif isinstance(field_type, bool):
-        return "INTEGER"  # SQLite stores booleans as 0/1
-    elif isinstance(field_type, pendulum.Date):
-        return "TEXT"  # Store dates as ISO format strings
-    elif isinstance(field_type, pendulum.DateTime):
-        return "TEXT"  # Store datetimes as ISO format strings
+    elif issubclass(field_type, str):
+        return "TEXT"
+    elif issubclass(field_type, (pendulum.Date, pendulum.DateTime)):
+        return "TEXT"  # Store dates and datetimes as ISO format strings
     else:
         # Default fallback for complex types (store as JSON)
         logger.debug(f"Unknown field type {field_type}, defaulting to TEXT")
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class WriteResult:
+    """Row counts reported by the database for a single write"""
+
+    inserted: int = 0
+    deleted: int = 0
+    updated: int = 0
+    staged: int = 0
+
+    @property
+    def written(self) -> int:
+        """Rows inserted or updated in the target table"""
+        return self.inserted + self.updated
+
+    def __add__(self, other: "WriteResult") -> "WriteResult":
+        """Sums the counts of two writes, e.g. the batches of one load"""
+        return WriteResult(
+            inserted=self.inserted + other.inserted,
+            deleted=self.deleted + other.deleted,
+            updated=self.updated + other.updated,
+            staged=self.staged + other.staged,
+        )
@@ -1,8 +1,17 @@
 from .auth import authenticate_user_credentials, refresh_token
 from .types import AccessToken, APIConfig, AccountBalance, AccountTransaction
-from .helpers import get_session_id
-from .data import get_transaction_data_paginated, get_accounts_balances
-from .schemas import COMDIRECT_SCHEMAS, get_sqlite_ddl_for_model
+from .helpers import get_session_id, make_client, make_async_client
+from .data import (
+    get_transaction_data_paginated,
+    iter_transaction_pages,
+    iter_booked_transactions,
+    get_accounts_balances,
+    split_transactions_by_booking_status,
+    validate_transactions,
+)
+from .client import AsyncComdirectClient, get_transactions_for_accounts
+from .throttle import TokenBucket, RetryTransport, AsyncRetryTransport
+from .schemas import COMDIRECT_INDEXES, COMDIRECT_SCHEMAS, get_sqlite_ddl_for_model
 
 __all__ = [
     "APIConfig",
@@ -10,10 +19,22 @@ __all__ = [
     "refresh_token",
     "AccessToken",
     "get_session_id",
+    "make_client",
+    "make_async_client",
     "get_accounts_balances",
     "get_transaction_data_paginated",
+    "iter_transaction_pages",
+    "iter_booked_transactions",
+    "split_transactions_by_booking_status",
+    "validate_transactions",
+    "AsyncComdirectClient",
+    "get_transactions_for_accounts",
+    "TokenBucket",
+    "RetryTransport",
+    "AsyncRetryTransport",
     "AccountBalance",
     "AccountTransaction",
+    "COMDIRECT_INDEXES",
     "COMDIRECT_SCHEMAS",
     "get_sqlite_ddl_for_model",
 ]
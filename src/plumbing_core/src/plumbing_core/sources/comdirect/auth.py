@@ -5,20 +5,22 @@ from typing import Optional
 from httpx import Client
 
 from .types import AccessToken, OAuthResponse, APIConfig
-from .helpers import get_request_url, get_client_request_id, make_client
+from .helpers import get_request_url, get_client_request_id, get_http_client
 
 
 logger = logging.getLogger(__name__)
 
 
 def authenticate_user_credentials(
-    cfg: APIConfig, session_id: str, wait_for_challenge_seconds: int = 20
+    cfg: APIConfig,
+    session_id: str,
+    wait_for_challenge_seconds: int = 20,
+    http_client: Optional[Client] = None,
 ) -> Optional[AccessToken]:
     """Completes the comdirect OAuth flow and returns an `AccessToken`."""
 
-    http_client = make_client(cfg=cfg)
     logger.info("Starting user credentials flow")
-    try:
+    with get_http_client(cfg=cfg, http_client=http_client) as http_client:
         o_auth_response = _generate_oauth_token(cfg=cfg, http_client=http_client)
         session_tan_id = _get_session_object(
             session_id=session_id,
@@ -54,15 +56,14 @@ def authenticate_user_credentials(
         )
         logger.info("Successfully authenticated user, returning token")
         return access_token
-    finally:
-        http_client.close()
 
 
-def refresh_token(cfg: APIConfig, token: AccessToken) -> Optional[AccessToken]:
+def refresh_token(
+    cfg: APIConfig, token: AccessToken, http_client: Optional[Client] = None
+) -> Optional[AccessToken]:
     """Refreshes an existing access token"""
 
-    http_client = make_client(cfg=cfg)
-    try:
+    with get_http_client(cfg=cfg, http_client=http_client) as http_client:
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         data = {
             "client_id": cfg.client_id,
@@ -76,9 +77,6 @@ def refresh_token(cfg: APIConfig, token: AccessToken) -> Optional[AccessToken]:
         response.raise_for_status()
         return AccessToken(**response.json())
 
-    finally:
-        http_client.close()
-
 
 def _generate_oauth_token(cfg: APIConfig, http_client: Client) -> OAuthResponse:
     """First step of the OAuth flow: generate an OAuth token."""
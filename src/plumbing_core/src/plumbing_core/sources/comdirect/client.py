@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from typing import Dict, Literal, Optional
+
+from httpx import AsyncClient
+from pendulum import Date
+from pydantic import ValidationError
+
+from .constants import TRANSACTION_PAGE_SIZE
+from .data import (
+    BALANCES_ENDPOINT,
+    _parse_balances,
+    _parse_transactions_page,
+    _request_headers,
+    _transactions_endpoint,
+    _transactions_params,
+    _validate_bearer_access_token,
+    _validate_transaction_state,
+)
+from .helpers import decode_json, get_request_url, get_session_id, make_async_client
+from .types import APIConfig, AccountBalance, AccountTransaction
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncComdirectClient:
+    """Async Comdirect banking API client that fetches accounts concurrently
+
+    At most `max_concurrency` requests are in flight at any time. Use it as an async
+    context manager, it closes the underlying `httpx.AsyncClient` on exit unless
+    the client was passed in.
+    """
+
+    def __init__(
+        self,
+        cfg: APIConfig,
+        bearer_access_token: str,
+        max_concurrency: int = 4,
+        http_client: Optional[AsyncClient] = None,
+    ):
+        _validate_bearer_access_token(bearer_access_token)
+
+        self.cfg = cfg
+        self.bearer_access_token = bearer_access_token
+        self.session_id = get_session_id()
+        self._owns_http_client = http_client is None
+        self._http_client = http_client or make_async_client(cfg=cfg)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self) -> "AsyncComdirectClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_http_client:
+            await self._http_client.aclose()
+
+    async def _get(self, endpoint: str, params: Optional[dict] = None) -> dict:
+        """Single GET request, bounded by the concurrency cap"""
+
+        url = get_request_url(base_url=self._http_client.base_url, endpoint=endpoint)
+        headers = _request_headers(self.bearer_access_token, session_id=self.session_id)
+
+        async with self._semaphore:
+            response = await self._http_client.get(
+                url=url, params=params, headers=headers
+            )
+        response.raise_for_status()
+
+        return decode_json(response.content)
+
+    async def get_accounts_balances(self) -> list[AccountBalance]:
+        """Gets the current balance for all accounts of the authenticated user"""
+        logger.info("Starting to get account balances")
+
+        return _parse_balances(await self._get(BALANCES_ENDPOINT))
+
+    async def get_transaction_data_paginated(
+        self,
+        account_id: str,
+        last_transaction_date: Date,
+        transaction_state: Literal["BOOKED", "NOTBOOKED", "BOTH"],
+        until_transaction_date: Optional[Date] = None,
+        page_size: int = TRANSACTION_PAGE_SIZE,
+    ) -> list[AccountTransaction]:
+        """Gets all transactions for a given account until a passed date"""
+        _validate_transaction_state(transaction_state)
+
+        pagination_index = 0
+        result: list[AccountTransaction] = list()
+
+        try:
+            while True:
+                params = _transactions_params(
+                    transaction_state=transaction_state,
+                    pagination_index=pagination_index,
+                    page_size=page_size,
+                    last_transaction_date=last_transaction_date,
+                    until_transaction_date=until_transaction_date,
+                )
+                logger.debug(f"Params for account '{account_id}': '{params}'")
+
+                payload = await self._get(
+                    _transactions_endpoint(account_id), params=params
+                )
+                res, pagination_index, finished = _parse_transactions_page(
+                    payload=payload,
+                    last_transaction_date=last_transaction_date,
+                    pagination_index=pagination_index,
+                    page_size=page_size,
+                    transaction_state=transaction_state,
+                )
+                result.extend(res)
+
+                if finished:
+                    break
+
+        except ValidationError as e:
+            logger.error(f"Pydantic caught unexpected data from the API: '{e}'")
+            raise e
+
+        logger.info(f"Returning {len(result)} transactions for account '{account_id}'")
+        return result
+
+    async def get_transactions_for_accounts(
+        self,
+        last_transaction_dates: Dict[str, Date],
+        transaction_state: Literal["BOOKED", "NOTBOOKED", "BOTH"],
+        page_size: int = TRANSACTION_PAGE_SIZE,
+    ) -> Dict[str, list[AccountTransaction]]:
+        """Gets transactions of all passed accounts concurrently, keyed by account id"""
+
+        account_ids = list(last_transaction_dates)
+        results = await asyncio.gather(
+            *[
+                self.get_transaction_data_paginated(
+                    account_id=account_id,
+                    last_transaction_date=last_transaction_dates[account_id],
+                    transaction_state=transaction_state,
+                    page_size=page_size,
+                )
+                for account_id in account_ids
+            ]
+        )
+
+        return dict(zip(account_ids, results))
+
+
+def get_transactions_for_accounts(
+    cfg: APIConfig,
+    bearer_access_token: str,
+    last_transaction_dates: Dict[str, Date],
+    transaction_state: Literal["BOOKED", "NOTBOOKED", "BOTH"],
+    max_concurrency: int = 4,
+) -> Dict[str, list[AccountTransaction]]:
+    """Blocking wrapper around `AsyncComdirectClient.get_transactions_for_accounts`"""
+
+    async def _fetch() -> Dict[str, list[AccountTransaction]]:
+        async with AsyncComdirectClient(
+            cfg=cfg,
+            bearer_access_token=bearer_access_token,
+            max_concurrency=max_concurrency,
+        ) as client:
+            return await client.get_transactions_for_accounts(
+                last_transaction_dates, transaction_state=transaction_state
+            )
+
+    return asyncio.run(_fetch())
@@ -1,3 +1,6 @@
+# Number of transactions requested per page ('paging-count')
+TRANSACTION_PAGE_SIZE = 500
+
 ACCOUNT_BALANCE_FIELD_PATHS = {
     "account_id": ["account", "accountId"],
     "account_display_id": ["account", "accountDisplayId"],
@@ -1,141 +1,309 @@
 import logging
 import json
-from typing import Literal
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Tuple
+from httpx import Client
 from pendulum import Date
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
+from .constants import TRANSACTION_PAGE_SIZE
 from .types import APIConfig, AccountBalance, AccountTransaction
-from .helpers import make_client, get_client_request_id, get_session_id, get_request_url
+from .helpers import (
+    decode_json,
+    get_http_client,
+    get_client_request_id,
+    get_session_id,
+    get_request_url,
+)
 
 
 logger = logging.getLogger(__name__)
 
+BALANCES_ENDPOINT = "api/banking/clients/user/v2/accounts/balances"
+TRANSACTION_STATES = ["BOOKED", "NOTBOOKED", "BOTH"]
+
+# Validate whole pages in one call instead of one model at a time
+_BALANCES_ADAPTER = TypeAdapter(List[AccountBalance])
+_TRANSACTIONS_ADAPTER = TypeAdapter(List[AccountTransaction])
+
 
 def get_accounts_balances(
-    cfg: APIConfig, bearer_access_token: str
+    cfg: APIConfig, bearer_access_token: str, http_client: Optional[Client] = None
 ) -> list[AccountBalance]:
     """Gets the current balance for all accounts of the authenticated user"""
     logger.info("Starting to get account balances")
 
-    if not bearer_access_token.startswith("Bearer "):
-        logger.error("Invalid bearer access token")
-        raise ValueError("`bearer_access_token` needs to start with 'Bearer '")
+    _validate_bearer_access_token(bearer_access_token)
 
     # session id does not need to be the same as during auth process
-    headers = {
-        "Authorization": bearer_access_token,
-        "x-http-request-info": json.dumps(
-            {"clientRequestId": get_client_request_id(session_id=get_session_id())}
-        ),
-    }
-    http_client = make_client(cfg=cfg)
-    try:
+    headers = _request_headers(bearer_access_token, session_id=get_session_id())
+    with get_http_client(cfg=cfg, http_client=http_client) as http_client:
         url = get_request_url(
             base_url=http_client.base_url,
-            endpoint="api/banking/clients/user/v2/accounts/balances",
+            endpoint=BALANCES_ENDPOINT,
         )
 
         response = http_client.get(url=url, headers=headers)
         response.raise_for_status()
 
-        logger.info(f"Obtained {len(response.json()['values'])} records from API")
+    return _parse_balances(decode_json(response.content))
 
-    finally:
-        http_client.close()
 
-    result = [AccountBalance(**account) for account in response.json()["values"]]
-    logger.info(f"Serialized {len(result)} records into `AccountBalance` objects")
+def get_transaction_data_paginated(
+    cfg: APIConfig,
+    account_id: str,
+    bearer_access_token: str,
+    last_transaction_date: Date,
+    transaction_state: Literal["BOOKED", "NOTBOOKED", "BOTH"],
+    until_transaction_date: Optional[Date] = None,
+    page_size: int = TRANSACTION_PAGE_SIZE,
+    http_client: Optional[Client] = None,
+) -> list[AccountTransaction]:
+    """Gets all transactions for a given account until a passed date"""
+
+    result: list[AccountTransaction] = list()
+    for page in iter_transaction_pages(
+        cfg=cfg,
+        account_id=account_id,
+        bearer_access_token=bearer_access_token,
+        last_transaction_date=last_transaction_date,
+        transaction_state=transaction_state,
+        until_transaction_date=until_transaction_date,
+        page_size=page_size,
+        http_client=http_client,
+    ):
+        result.extend(page)
 
+    logger.info(f"Returning {len(result)} transactions.")
     return result
 
 
-def get_transaction_data_paginated(
+def iter_transaction_pages(
     cfg: APIConfig,
     account_id: str,
     bearer_access_token: str,
     last_transaction_date: Date,
     transaction_state: Literal["BOOKED", "NOTBOOKED", "BOTH"],
-) -> list[AccountTransaction]:
-    """Gets all transactions for a given account until a passed date"""
-    accepted_states = ["BOOKED", "NOTBOOKED", "BOTH"]
-    if transaction_state not in accepted_states:
-        raise ValueError(f"`transaction_state` must be one of: '{accepted_states}'")
+    until_transaction_date: Optional[Date] = None,
+    page_size: int = TRANSACTION_PAGE_SIZE,
+    http_client: Optional[Client] = None,
+) -> Iterator[list[AccountTransaction]]:
+    """Yields the transactions of a given account page by page, newest first
+
+    Only the current page is held in memory, the next one is requested when the
+    consumer asks for it.
+    """
+    _validate_transaction_state(transaction_state)
 
     pagination_index = 0
     logger.info("starting loop")
-    result: list[AccountTransaction] = list()
 
-    http_client = make_client(cfg=cfg)
-    try:
+    with get_http_client(cfg=cfg, http_client=http_client) as http_client:
         session_id = get_session_id()
         url = get_request_url(
             base_url=http_client.base_url,
-            endpoint=f"api/banking/v1/accounts/{account_id}/transactions",
+            endpoint=_transactions_endpoint(account_id),
         )
 
         while True:
-            headers = {
-                "Authorization": bearer_access_token,
-                "x-http-request-info": json.dumps(
-                    {"clientRequestId": get_client_request_id(session_id=session_id)}
-                ),
-            }
-
-            params = {
-                "transactionState": transaction_state,
-                "paging-first": pagination_index,
-            }
-
+            params = _transactions_params(
+                transaction_state=transaction_state,
+                pagination_index=pagination_index,
+                page_size=page_size,
+                last_transaction_date=last_transaction_date,
+                until_transaction_date=until_transaction_date,
+            )
             logger.debug(f"Params: '{params}'")
 
             response = http_client.get(
                 url=url,
                 params=params,
-                headers=headers,
+                headers=_request_headers(bearer_access_token, session_id=session_id),
             )
             response.raise_for_status()
 
-            logger.info(f"Obtained {len(response.json()['values'])} records from API")
+            try:
+                res, pagination_index, finished = _parse_transactions_page(
+                    payload=decode_json(response.content),
+                    last_transaction_date=last_transaction_date,
+                    pagination_index=pagination_index,
+                    page_size=page_size,
+                    transaction_state=transaction_state,
+                )
+            except ValidationError as e:
+                logging.error(f"Pydantic caught unexpected data from the API: '{e}'")
+                raise e
 
-            if not response.json()["values"]:
-                logger.info("No more records available from API, finishing pagination")
-                break
+            if res:
+                yield res
 
-            res = [
-                AccountTransaction(**transaction)
-                for transaction in response.json()["values"]
-            ]
-            logger.info(
-                f"Serialized '{len(res)}' records into `AccountTransaction` objects"
-            )
-            result.extend(res)
-
-            booking_dates = [
-                transaction.booking_date
-                for transaction in res
-                if transaction.booking_date
-            ]
-            if not booking_dates:
-                logger.info("No transactions with valid booking dates found")
+            if finished:
                 break
 
-            max_date = max(booking_dates)
-            pagination_index += len(res)
 
-            if max_date < last_transaction_date:
-                logger.info("Finished")
-                break
+def validate_transactions(
+    values: List[Dict[str, Any]], trusted: bool = False
+) -> list[AccountTransaction]:
+    """Validates raw transaction payloads of a page in one pass
 
-            logger.info(
-                f"Last transaction date: {max_date} is not smaller than last transaction date: {last_transaction_date}. Continuing"
-            )
+    Use `trusted` for replays of payloads we archived ourselves, which skips
+    validation and builds the models with `model_construct`.
+    """
+    if trusted:
+        return [AccountTransaction.from_trusted_payload(value) for value in values]
+
+    return _TRANSACTIONS_ADAPTER.validate_python(values)
+
+
+def split_transactions_by_booking_status(
+    transactions: Iterable[AccountTransaction],
+) -> Tuple[list[AccountTransaction], list[AccountTransaction]]:
+    """Splits the transactions of a 'BOTH' fetch into booked and not-booked ones"""
+
+    booked: list[AccountTransaction] = list()
+    not_booked: list[AccountTransaction] = list()
+    for transaction in transactions:
+        if transaction.booking_status == "BOOKED":
+            booked.append(transaction)
+        else:
+            not_booked.append(transaction)
+
+    return booked, not_booked
+
+
+def iter_booked_transactions(
+    pages: Iterable[list[AccountTransaction]],
+    not_booked: list[AccountTransaction],
+) -> Iterator[AccountTransaction]:
+    """Yields the booked transactions of streamed 'BOTH' pages
 
-        logger.info(f"Returning {len(result)} transactions.")
-        return result
+    Not-booked transactions are appended to the passed `not_booked` list, which is
+    complete once the generator is exhausted.
+    """
+
+    for page in pages:
+        booked, not_booked_page = split_transactions_by_booking_status(page)
+        not_booked.extend(not_booked_page)
+        yield from booked
+
+
+def _validate_bearer_access_token(bearer_access_token: str) -> None:
+    if not bearer_access_token.startswith("Bearer "):
+        logger.error("Invalid bearer access token")
+        raise ValueError("`bearer_access_token` needs to start with 'Bearer '")
+
+
+def _validate_transaction_state(transaction_state: str) -> None:
+    if transaction_state not in TRANSACTION_STATES:
+        raise ValueError(f"`transaction_state` must be one of: '{TRANSACTION_STATES}'")
+
+
+def _transactions_endpoint(account_id: str) -> str:
+    return f"api/banking/v1/accounts/{account_id}/transactions"
+
+
+def _request_headers(bearer_access_token: str, session_id: str) -> Dict[str, str]:
+    """Headers for a data request, each with a fresh request id"""
+    return {
+        "Authorization": bearer_access_token,
+        "x-http-request-info": json.dumps(
+            {"clientRequestId": get_client_request_id(session_id=session_id)}
+        ),
+    }
+
+
+def _transactions_params(
+    transaction_state: str,
+    pagination_index: int,
+    page_size: int,
+    last_transaction_date: Date,
+    until_transaction_date: Optional[Date],
+) -> Dict[str, Any]:
+    """Query params for one page of transactions"""
+
+    params = {
+        "transactionState": transaction_state,
+        "paging-first": pagination_index,
+        "paging-count": page_size,
+    }
+    # Pending transactions carry no booking date, window fetches of booked ones
+    if transaction_state != "NOTBOOKED":
+        params["min-bookingDate"] = last_transaction_date.isoformat()
+        if until_transaction_date:
+            params["max-bookingDate"] = until_transaction_date.isoformat()
+
+    return params
+
+
+def _parse_balances(payload: Dict[str, Any]) -> list[AccountBalance]:
+    """Validates a balances response body into `AccountBalance` objects"""
+
+    logger.info(f"Obtained {len(payload['values'])} records from API")
+    result = _BALANCES_ADAPTER.validate_python(payload["values"])
+    logger.info(f"Serialized {len(result)} records into `AccountBalance` objects")
+
+    return result
+
+
+def _parse_transactions_page(
+    payload: Dict[str, Any],
+    last_transaction_date: Date,
+    pagination_index: int,
+    page_size: int,
+    transaction_state: str,
+) -> Tuple[list[AccountTransaction], int, bool]:
+    """Validates one page of transactions
+
+    Returns the transactions within the window, the next pagination index and
+    whether pagination is finished. Pending transactions come first in 'BOTH'
+    fetches, so a full page of them does not finish pagination.
+    """
+
+    min_booking_date = last_transaction_date.isoformat()
+    values = payload["values"]
+    logger.info(f"Obtained {len(values)} records from API")
+
+    if not values:
+        logger.info("No more records available from API, finishing pagination")
+        return [], pagination_index, True
+
+    # Dates are ISO strings, so comparing them as strings orders them correctly
+    booking_dates = [
+        transaction["bookingDate"]
+        for transaction in values
+        if transaction.get("bookingDate")
+    ]
+    in_window = [
+        transaction
+        for transaction in values
+        if not transaction.get("bookingDate")
+        or transaction["bookingDate"] >= min_booking_date
+    ]
+
+    res = validate_transactions(in_window)
+    logger.info(
+        f"Serialized '{len(res)}' of '{len(values)}' records into "
+        "`AccountTransaction` objects"
+    )
+    pagination_index += len(values)
+
+    if not booking_dates and transaction_state == "BOOKED":
+        logger.info("No transactions with valid booking dates found")
+        return res, pagination_index, True
+
+    min_date = min(booking_dates, default=None)
+    if min_date is not None and min_date < min_booking_date:
+        logger.info(
+            f"Oldest transaction date: {min_date} crossed last transaction "
+            f"date: {min_booking_date}. Finished"
+        )
+        return res, pagination_index, True
 
-    except ValidationError as e:
-        logging.error(f"Pydantic caught unexpected data from the API: '{e}'")
-        raise e
+    matches = payload.get("paging", {}).get("matches")
+    if len(values) < page_size or (matches and pagination_index >= matches):
+        logger.info("Reached last page. Finished")
+        return res, pagination_index, True
 
-    finally:
-        http_client.close()
+    logger.info(
+        f"Oldest transaction date: {min_date} is not smaller than last transaction date: {min_booking_date}. Continuing"
+    )
+    return res, pagination_index, False
@@ -1,13 +1,37 @@
+import json
 import uuid
 import random
 import logging
-from httpx import URL, Client
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from httpx import (
+    URL,
+    AsyncClient,
+    AsyncHTTPTransport,
+    Client,
+    HTTPTransport,
+    Limits,
+    Timeout,
+)
 
 from .types import APIConfig
+from .throttle import AsyncRetryTransport, RetryTransport, get_rate_limiter
+
+try:
+    import orjson
+except ImportError:  # optional, decodes large pages faster
+    orjson = None
 
 
 logger = logging.getLogger(__name__)
 
+# Keep idle connections to the API open between calls of a run
+HTTP_LIMITS = Limits(
+    max_connections=10, max_keepalive_connections=10, keepalive_expiry=60.0
+)
+HTTP_TIMEOUT = Timeout(30.0, connect=10.0)
+HTTP_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+
 
 def get_session_id() -> str:
     return str(uuid.uuid4())
@@ -24,12 +48,65 @@ def get_client_request_id(session_id: str) -> dict[str, str]:
 
 
 def make_client(cfg: APIConfig) -> Client:
+    """Pooled, keep-alive HTTP client, pass it to the API functions to reuse it
+
+    Requests are rate limited by the process-wide token bucket and idempotent ones
+    are retried with backoff.
+    """
+    transport = RetryTransport(
+        HTTPTransport(limits=HTTP_LIMITS, http2=cfg.http2),
+        rate_limiter=get_rate_limiter(cfg),
+        max_retries=cfg.max_retries,
+        backoff_seconds=cfg.retry_backoff_seconds,
+    )
     return Client(
         base_url=str(cfg.base_url),
-        headers={"Accept": "application/json", "Content-Type": "application/json"},
+        headers=HTTP_HEADERS,
+        timeout=HTTP_TIMEOUT,
+        transport=transport,
     )
 
 
+def make_async_client(cfg: APIConfig) -> AsyncClient:
+    """Async counterpart of `make_client`"""
+    transport = AsyncRetryTransport(
+        AsyncHTTPTransport(limits=HTTP_LIMITS, http2=cfg.http2),
+        rate_limiter=get_rate_limiter(cfg),
+        max_retries=cfg.max_retries,
+        backoff_seconds=cfg.retry_backoff_seconds,
+    )
+    return AsyncClient(
+        base_url=str(cfg.base_url),
+        headers=HTTP_HEADERS,
+        timeout=HTTP_TIMEOUT,
+        transport=transport,
+    )
+
+
+@contextmanager
+def get_http_client(
+    cfg: APIConfig, http_client: Optional[Client] = None
+) -> Iterator[Client]:
+    """The passed client, else a new client that is closed after use"""
+
+    if http_client is not None:
+        yield http_client
+        return
+
+    http_client = make_client(cfg=cfg)
+    try:
+        yield http_client
+    finally:
+        http_client.close()
+
+
+def decode_json(content: bytes) -> Any:
+    """Decodes a response body, with orjson if it is installed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
 def get_request_url(base_url: URL | str, endpoint: str) -> str:
     url = str(base_url) + endpoint
     logger.debug(f"Returning request url: '{url}'")
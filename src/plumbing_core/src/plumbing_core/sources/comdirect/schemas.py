@@ -1,20 +1,46 @@
-from typing import Dict
+from typing import Dict, List
 
 from .types import AccountBalance, AccountTransaction
-from plumbing_core.shared import TIMESTAMP_FIELDS, get_sqlite_ddl_for_model
+from plumbing_core.shared import SQLiteIndex, TIMESTAMP_FIELDS, get_sqlite_ddl_for_model
 
 
 # Pre-computed DDL constants for the three main tables with timestamp fields
 ACCOUNT_BALANCES_DDL = get_sqlite_ddl_for_model(
-    AccountBalance, extra_fields=TIMESTAMP_FIELDS
+    AccountBalance,
+    extra_fields=TIMESTAMP_FIELDS,
+    primary_key=["account_id", "_inserted_at_day"],
+    strict=True,
 )
+# No primary key, pending transactions can lack a reference
 ACCOUNT_TRANSACTIONS_DDL = get_sqlite_ddl_for_model(
-    AccountTransaction, extra_fields=TIMESTAMP_FIELDS
+    AccountTransaction, extra_fields=TIMESTAMP_FIELDS, strict=True
+)
+
+# Validity interval of a balance history row, 'valid_to' stays NULL while current
+BALANCE_HISTORY_FIELDS = {"valid_from": "TEXT NOT NULL", "valid_to": "TEXT"}
+ACCOUNT_BALANCES_HISTORY_DDL = get_sqlite_ddl_for_model(
+    AccountBalance,
+    extra_fields={**BALANCE_HISTORY_FIELDS, **TIMESTAMP_FIELDS},
+    strict=True,
 )
 
 # Schema registry for easy lookup by table name
 COMDIRECT_SCHEMAS: Dict[str, str] = {
     "account_balances": ACCOUNT_BALANCES_DDL,
+    "account_balances__history": ACCOUNT_BALANCES_HISTORY_DDL,
     "account_transactions__booked": ACCOUNT_TRANSACTIONS_DDL,
     "account_transactions__not_booked": ACCOUNT_TRANSACTIONS_DDL,
 }
+
+# Secondary indexes by table name, serving the upsert conflicts, watermark
+# lookups, per-account refreshes and the newest-first categorization chunks
+COMDIRECT_INDEXES: Dict[str, List[SQLiteIndex]] = {
+    "account_transactions__booked": [
+        SQLiteIndex(columns=("account_id", "reference"), unique=True),
+        SQLiteIndex(columns=("account_id", "booking_date")),
+        SQLiteIndex(columns=("_inserted_at_ts",)),
+    ],
+    "account_transactions__not_booked": [
+        SQLiteIndex(columns=("account_id", "reference")),
+    ],
+}
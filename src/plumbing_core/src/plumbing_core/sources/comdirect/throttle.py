@@ -0,0 +1,232 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import pendulum
+from httpx import (
+    AsyncBaseTransport,
+    BaseTransport,
+    Request,
+    Response,
+    TransportError,
+)
+
+from .types import APIConfig
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Only idempotent requests are sent again
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+MAX_BACKOFF_SECONDS = 60.0
+
+_rate_limiters: Dict[Tuple[str, float, int], "TokenBucket"] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket, shared by sync and async clients
+
+    Holds up to `burst` tokens and refills `rate` tokens per second. Every request
+    takes one token and waits if none is left.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0 or burst < 1:
+            raise ValueError("`rate` must be positive and `burst` at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token and returns the seconds to wait until it may be used"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+
+            return max(-self._tokens / self.rate, self._blocked_until - now, 0.0)
+
+    def acquire(self) -> None:
+        time.sleep(self._reserve())
+
+    async def aacquire(self) -> None:
+        await asyncio.sleep(self._reserve())
+
+    def block(self, seconds: float) -> None:
+        """Holds back all requests for `seconds`, e.g. after the API answered 429"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def get_rate_limiter(cfg: APIConfig) -> Optional[TokenBucket]:
+    """The process-wide token bucket for the configured API, None if disabled"""
+
+    if not cfg.requests_per_second:
+        return None
+
+    key = (str(cfg.base_url), cfg.requests_per_second, cfg.burst)
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = TokenBucket(
+                rate=cfg.requests_per_second, burst=cfg.burst
+            )
+        return _rate_limiters[key]
+
+
+def _retry_after_seconds(response: Response) -> Optional[float]:
+    """Parses a 'Retry-After' header given in seconds or as an HTTP date"""
+
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = pendulum.instance(parsedate_to_datetime(value))
+    except (TypeError, ValueError):
+        logger.debug(f"Ignoring unparsable 'Retry-After' header: '{value}'")
+        return None
+
+    return max((retry_at - pendulum.now("UTC")).total_seconds(), 0.0)
+
+
+class _RetryPolicy:
+    """Decides whether and how long to wait before sending a request again"""
+
+    def __init__(
+        self,
+        rate_limiter: Optional[TokenBucket],
+        max_retries: int,
+        backoff_seconds: float,
+    ):
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def can_retry(self, request: Request, attempt: int) -> bool:
+        return request.method in RETRY_METHODS and attempt < self.max_retries
+
+    def should_retry(self, request: Request, response: Response, attempt: int) -> bool:
+        return response.status_code in RETRY_STATUS_CODES and self.can_retry(
+            request, attempt
+        )
+
+    def delay(self, attempt: int, response: Optional[Response] = None) -> float:
+        """'Retry-After' if the API sent one, else exponential backoff with full jitter"""
+
+        retry_after = _retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            delay = min(retry_after, MAX_BACKOFF_SECONDS)
+        else:
+            delay = random.uniform(
+                0, min(self.backoff_seconds * 2**attempt, MAX_BACKOFF_SECONDS)
+            )
+
+        # Hold back every client sharing the bucket, not just this request
+        if response is not None and response.status_code == 429 and self.rate_limiter:
+            self.rate_limiter.block(delay)
+
+        return delay
+
+    def log_retry(self, request: Request, attempt: int, reason: str, delay: float):
+        logger.warning(
+            f"{request.method} {request.url.path} failed with {reason}, "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+
+
+class RetryTransport(BaseTransport):
+    """Rate limits requests and retries idempotent ones on 429, 5xx and network errors"""
+
+    def __init__(
+        self,
+        transport: BaseTransport,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 5,
+        backoff_seconds: float = 0.5,
+    ):
+        self.transport = transport
+        self.policy = _RetryPolicy(rate_limiter, max_retries, backoff_seconds)
+
+    def handle_request(self, request: Request) -> Response:
+        attempt = 0
+        while True:
+            if self.policy.rate_limiter:
+                self.policy.rate_limiter.acquire()
+
+            try:
+                response = self.transport.handle_request(request)
+            except TransportError as e:
+                if not self.policy.can_retry(request, attempt):
+                    raise
+                delay = self.policy.delay(attempt)
+                self.policy.log_retry(request, attempt, type(e).__name__, delay)
+            else:
+                if not self.policy.should_retry(request, response, attempt):
+                    return response
+                response.close()
+                delay = self.policy.delay(attempt, response)
+                self.policy.log_retry(request, attempt, response.status_code, delay)
+
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRetryTransport(AsyncBaseTransport):
+    """Async counterpart of `RetryTransport`"""
+
+    def __init__(
+        self,
+        transport: AsyncBaseTransport,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 5,
+        backoff_seconds: float = 0.5,
+    ):
+        self.transport = transport
+        self.policy = _RetryPolicy(rate_limiter, max_retries, backoff_seconds)
+
+    async def handle_async_request(self, request: Request) -> Response:
+        attempt = 0
+        while True:
+            if self.policy.rate_limiter:
+                await self.policy.rate_limiter.aacquire()
+
+            try:
+                response = await self.transport.handle_async_request(request)
+            except TransportError as e:
+                if not self.policy.can_retry(request, attempt):
+                    raise
+                delay = self.policy.delay(attempt)
+                self.policy.log_retry(request, attempt, type(e).__name__, delay)
+            else:
+                if not self.policy.should_retry(request, response, attempt):
+                    return response
+                await response.aclose()
+                delay = self.policy.delay(attempt, response)
+                self.policy.log_retry(request, attempt, response.status_code, delay)
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
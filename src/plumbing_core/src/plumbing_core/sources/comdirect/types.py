@@ -1,9 +1,10 @@
 import logging
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pendulum import Date
 import pendulum
 from pendulum import DateTime
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Callable, Dict
 from pydantic import BaseModel, model_validator, field_validator, AnyHttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -83,6 +84,14 @@ class APIConfig(BaseSettings):
     client_secret: str
     username: str
     password: str
+    # Requires the optional 'h2' package, `pip install httpx[http2]`
+    http2: bool = False
+    # Client-side rate limit shared by all clients of a process, None disables it
+    requests_per_second: Optional[float] = 10.0
+    burst: int = 10
+    # Retries of idempotent requests on 429, 5xx and network errors
+    max_retries: int = 5
+    retry_backoff_seconds: float = 0.5
 
     model_config = SettingsConfigDict(env_prefix="COMDIRECT_")
 
@@ -113,7 +122,7 @@ class AccountBalance(BaseModel):
     @model_validator(mode="before")
     def _flatten(cls, values):
         """This runs before before pydantic maps values to fields"""
-        return _make_flat(values, ACCOUNT_BALANCE_FIELD_PATHS)
+        return _flatten_account_balance(values)
 
 
 class AccountTransaction(BaseModel):
@@ -147,14 +156,12 @@ class AccountTransaction(BaseModel):
     @field_validator("remittance_info", mode="after")
     def strip_whitespace(cls, v: str) -> str:
         """Remove whitespaces from field"""
-        return " ".join(v.split())
+        return _collapse_whitespace(v)
 
     @field_validator("reference", mode="after")
     def whitespace_to_none(cls, v: str) -> Optional[str]:
         """Remove whitespaces from field"""
-        if v and len(v.strip()) == 0:
-            return None
-        return v
+        return _blank_to_none(v)
 
     @field_validator("booking_date", mode="before")
     def parse_booking_date(cls, v) -> Optional[Date]:
@@ -162,7 +169,7 @@ class AccountTransaction(BaseModel):
         if v is None or v == "":
             return None
         if isinstance(v, str):
-            return pendulum.parse(v).date()
+            return _parse_date(v)
         return v
 
     @field_validator("valuta_date", mode="before")
@@ -171,42 +178,106 @@ class AccountTransaction(BaseModel):
         if v is None or v == "":
             return None
         if isinstance(v, str):
-            return pendulum.parse(v).date()
+            return _parse_date(v)
         return v
 
     @model_validator(mode="before")
     def _flatten(cls, values):
         """This runs before before pydantic maps values to fields"""
-        return _make_flat(values, ACCOUNT_TRANSACTION_FIELD_PATHS)
+        return _flatten_account_transaction(values)
 
+    @classmethod
+    def from_trusted_payload(cls, payload: dict[str, Any]) -> "AccountTransaction":
+        """Builds a transaction without validation, for payloads we archived ourselves
 
-def _make_flat(
-    acct: dict[str, Any], field_paths: dict[str, list[str]]
-) -> dict[str, Any]:
-    """Flattens a dictionary based on field paths to traverse"""
-
-    return {
-        field: _exctract_from_path(acct, path) for field, path in field_paths.items()
+        Applies the same clean-up as the validators, but trusts the field types and
+        expects ISO dates.
+        """
+        values = _flatten_account_transaction(payload)
+        values["reference"] = _blank_to_none(values["reference"])
+        values["remittance_info"] = _collapse_whitespace(values["remittance_info"])
+        values["booking_date"] = _parse_date(values["booking_date"] or None)
+        values["valuta_date"] = _parse_date(values["valuta_date"] or None)
+        values["amount__value"] = float(values["amount__value"])
+
+        return cls.model_construct(**values)
+
+
+def _collapse_whitespace(v: str) -> str:
+    return " ".join(v.split())
+
+
+def _blank_to_none(v: Optional[str]) -> Optional[str]:
+    if v and len(v.strip()) == 0:
+        return None
+    return v
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(v: Optional[str]) -> Optional[Date]:
+    """Parses a date string, cached since bank data repeats the same few dates
+
+    The API sends 'YYYY-MM-DD', which `Date.fromisoformat` decodes directly.
+    Anything else falls back to `pendulum.parse`.
+    """
+    if v is None:
+        return None
+
+    try:
+        return Date.fromisoformat(v)
+    except ValueError:
+        logger.debug(f"Date '{v}' is not ISO formatted, parsing with pendulum")
+        return pendulum.parse(v).date()
+
+
+def _compile_flattener(
+    name: str, field_paths: dict[str, list[str]]
+) -> Callable[[dict[str, Any]], dict[str, Any]]:
+    """Compiles field paths into one function that flattens a dictionary
+
+    Each field becomes a short chain of `.get` calls written out in the function
+    body, so flattening a record walks no paths and raises no exceptions for the
+    usual gaps. Missing keys, `None` or a non-dictionary along a path yield `None`.
+    """
+
+    lines = [
+        f"def {name}(data):",
+        "    debug = _logger.isEnabledFor(_DEBUG)",
+        "    result = {}",
+    ]
+    for field_name, path in field_paths.items():
+        first, *rest = path
+        lines += ["    try:", f"        value = data.get({first!r})"]
+        lines += [
+            f"        if value is not None: value = value.get({key!r})" for key in rest
+        ]
+        lines += [
+            "    except AttributeError:",
+            "        value = None",
+            f"    result[{field_name!r}] = value",
+            "    if debug and value is None:",
+            f"        _log_missing_path({field_name!r}, {path!r}, data)",
+        ]
+    lines.append("    return result")
+
+    namespace = {
+        "_logger": logger,
+        "_DEBUG": logging.DEBUG,
+        "_log_missing_path": _log_missing_path,
     }
+    exec("\n".join(lines), namespace)
+    return namespace[name]
 
 
-def _exctract_from_path(data: dict[str, Any], path: list[str]) -> Any:
-    """Walks a path"""
+def _log_missing_path(field_name: str, path: list[str], data: dict[str, Any]) -> None:
+    logger.debug(
+        f"Found no value at path '{path}' for field '{field_name}' in data: '{data}'"
+    )
 
-    err_value = None
-
-    for p in path:
-        try:
-            data = data[p]
-        except KeyError:
-            logger.debug(
-                f"Could not traverse path due to key error. Did not find '{p}' for '{path}' in data: '{data}'"
-            )
-            return err_value
-        except TypeError:
-            logger.debug(
-                f"Could not traverse path due to value error. Found 'None' at '{p}' for '{path}' in data: '{data}'"
-            )
-            return err_value
 
-    return data
+_flatten_account_balance = _compile_flattener(
+    "_flatten_account_balance", ACCOUNT_BALANCE_FIELD_PATHS
+)
+_flatten_account_transaction = _compile_flattener(
+    "_flatten_account_transaction", ACCOUNT_TRANSACTION_FIELD_PATHS
+)
@@ -0,0 +1,74 @@
+import duckdb
+import pytest
+
+from plumbing_core.destinations.sqlite import SQLiteConfig, close_duckdb_connections
+from plumbing_core.destinations.turso import TursoConfig
+from plumbing_core.sources.comdirect import AccountBalance, AccountTransaction
+
+
+@pytest.fixture
+def config(tmp_path) -> TursoConfig:
+    return TursoConfig(db_path=tmp_path / "test.db")
+
+
+@pytest.fixture
+def sqlite_config(tmp_path) -> SQLiteConfig:
+    """SQLite destination config, skips tests where DuckDB can not attach SQLite"""
+
+    try:
+        with duckdb.connect() as conn:
+            conn.execute("LOAD sqlite")
+    except duckdb.Error:
+        pytest.skip("DuckDB 'sqlite' extension unavailable")
+
+    yield SQLiteConfig(db_path=tmp_path / "test.db", threads=2, memory_limit="1GB")
+    close_duckdb_connections()
+
+
+@pytest.fixture
+def make_transaction():
+    """Factory for `AccountTransaction` objects built from API-shaped payloads"""
+
+    def _make_transaction(
+        reference: str,
+        amount: str = "-1.00",
+        booking_date: str = "2025-01-02",
+        booking_status: str = "BOOKED",
+    ) -> AccountTransaction:
+        return AccountTransaction(
+            reference=reference,
+            bookingStatus=booking_status,
+            bookingDate=booking_date,
+            amount={"value": amount, "unit": "EUR"},
+            valutaDate=booking_date,
+            newTransaction=False,
+            remittanceInfo="01Payment",
+            transactionType={"key": "DIRECT_DEBIT", "text": "Lastschrift"},
+        )
+
+    return _make_transaction
+
+
+@pytest.fixture
+def make_balance():
+    """Factory for `AccountBalance` objects built from API-shaped payloads"""
+
+    def _make_balance(account_id: str, value: str) -> AccountBalance:
+        return AccountBalance(
+            account={
+                "accountId": account_id,
+                "accountDisplayId": "1000",
+                "currency": "EUR",
+                "clientId": "CLIENT",
+                "accountType": {"key": "CA", "text": "Girokonto"},
+                "iban": "DE00",
+                "bic": "BIC",
+                "creditLimit": {"value": "0", "unit": "EUR"},
+            },
+            balance={"value": value, "unit": "EUR"},
+            balanceEUR={"value": value, "unit": "EUR"},
+            availableCashAmount={"value": value, "unit": "EUR"},
+            availableCashAmountEUR={"value": value, "unit": "EUR"},
+        )
+
+    return _make_balance
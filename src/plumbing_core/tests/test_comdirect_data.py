@@ -0,0 +1,316 @@
+import asyncio
+
+import httpx
+import pendulum
+import pytest
+
+from plumbing_core.sources.comdirect import (
+    APIConfig,
+    AsyncComdirectClient,
+    get_accounts_balances,
+    get_transaction_data_paginated,
+    iter_booked_transactions,
+    iter_transaction_pages,
+    split_transactions_by_booking_status,
+    validate_transactions,
+)
+from plumbing_core.sources.comdirect import helpers
+
+
+def _payload(reference: str, booking_date: str) -> dict:
+    return {
+        "reference": reference,
+        "bookingStatus": "BOOKED",
+        "bookingDate": booking_date,
+        "amount": {"value": "-1.00", "unit": "EUR"},
+        "valutaDate": booking_date,
+        "newTransaction": False,
+        "remittanceInfo": "01Payment",
+        "transactionType": {"key": "DIRECT_DEBIT", "text": "Lastschrift"},
+    }
+
+
+@pytest.fixture
+def api_config() -> APIConfig:
+    return APIConfig(client_id="id", client_secret="secret", username="u", password="p")
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Routes `make_client` to a handler and records the requests it receives"""
+
+    requests = []
+
+    def _serve(handler):
+        def record(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return handler(request)
+
+        monkeypatch.setattr(
+            helpers,
+            "make_client",
+            lambda cfg: httpx.Client(
+                base_url=str(cfg.base_url), transport=httpx.MockTransport(record)
+            ),
+        )
+        return requests
+
+    return _serve
+
+
+class TestTransactionPagination:
+    """Test suite for the incremental transaction fetcher"""
+
+    def test_sends_booking_date_window_and_page_size(self, api_config, serve):
+        """Test that booked fetches ask the API for the date window only"""
+
+        requests = serve(lambda request: httpx.Response(200, json={"values": []}))
+
+        get_transaction_data_paginated(
+            cfg=api_config,
+            account_id="A1",
+            bearer_access_token="Bearer x",
+            last_transaction_date=pendulum.date(2025, 3, 1),
+            transaction_state="BOOKED",
+            until_transaction_date=pendulum.date(2025, 3, 31),
+            page_size=50,
+        )
+
+        params = requests[0].url.params
+        assert params["min-bookingDate"] == "2025-03-01"
+        assert params["max-bookingDate"] == "2025-03-31"
+        assert params["paging-count"] == "50"
+
+    def test_stops_at_watermark_and_drops_older_rows(self, api_config, serve):
+        """Test that a page crossing the watermark ends pagination"""
+
+        pages = [
+            [_payload("R4", "2025-03-04"), _payload("R3", "2025-03-03")],
+            [_payload("R2", "2025-03-02"), _payload("R1", "2025-02-27")],
+            [_payload("R0", "2025-02-01")],
+        ]
+        requests = serve(
+            lambda request: httpx.Response(
+                200,
+                json={"values": pages[int(request.url.params["paging-first"]) // 2]},
+            )
+        )
+
+        transactions = get_transaction_data_paginated(
+            cfg=api_config,
+            account_id="A1",
+            bearer_access_token="Bearer x",
+            last_transaction_date=pendulum.date(2025, 3, 1),
+            transaction_state="BOOKED",
+            page_size=2,
+        )
+
+        assert len(requests) == 2
+        assert [t.reference for t in transactions] == ["R4", "R3", "R2"]
+
+    def test_iter_pages_requests_lazily(self, api_config, serve):
+        """Test that the page generator only fetches a page when asked for it"""
+
+        requests = serve(
+            lambda request: httpx.Response(
+                200, json={"values": [_payload("R1", "2025-03-02")] * 2}
+            )
+        )
+
+        pages = iter_transaction_pages(
+            cfg=api_config,
+            account_id="A1",
+            bearer_access_token="Bearer x",
+            last_transaction_date=pendulum.date(2025, 3, 1),
+            transaction_state="BOOKED",
+            page_size=2,
+        )
+        first_page = next(pages)
+        next(pages)
+        pages.close()
+
+        assert len(first_page) == 2
+        assert len(requests) == 2
+
+
+class TestBothTransactionStates:
+    """Test suite for fetching booked and not-booked transactions in one go"""
+
+    def _pending(self, reference: str) -> dict:
+        pending = _payload(reference, "")
+        pending.update(bookingStatus="NOTBOOKED", bookingDate=None)
+        return pending
+
+    def test_both_fetch_keeps_pending_and_stops_at_watermark(self, api_config, serve):
+        """Test that pending rows come along without widening the booked window"""
+
+        pages = [
+            [self._pending("P1"), _payload("R3", "2025-03-03")],
+            [_payload("R2", "2025-03-02"), _payload("R1", "2025-02-27")],
+            [_payload("R0", "2025-02-01")],
+        ]
+        requests = serve(
+            lambda request: httpx.Response(
+                200,
+                json={"values": pages[int(request.url.params["paging-first"]) // 2]},
+            )
+        )
+
+        transactions = get_transaction_data_paginated(
+            cfg=api_config,
+            account_id="A1",
+            bearer_access_token="Bearer x",
+            last_transaction_date=pendulum.date(2025, 3, 1),
+            transaction_state="BOTH",
+            page_size=2,
+        )
+        booked, not_booked = split_transactions_by_booking_status(transactions)
+
+        assert len(requests) == 2
+        assert requests[0].url.params["transactionState"] == "BOTH"
+        assert [t.reference for t in booked] == ["R3", "R2"]
+        assert [t.reference for t in not_booked] == ["P1"]
+
+    def test_full_page_of_pending_rows_does_not_finish(self, api_config, serve):
+        """Test that booked rows after a full page of pending rows are fetched"""
+
+        pages = [
+            [self._pending("P2"), self._pending("P1")],
+            [_payload("R2", "2025-03-02"), _payload("R1", "2025-03-01")],
+            [],
+        ]
+        requests = serve(
+            lambda request: httpx.Response(
+                200,
+                json={"values": pages[int(request.url.params["paging-first"]) // 2]},
+            )
+        )
+
+        transactions = get_transaction_data_paginated(
+            cfg=api_config,
+            account_id="A1",
+            bearer_access_token="Bearer x",
+            last_transaction_date=pendulum.date(2025, 3, 1),
+            transaction_state="BOTH",
+            page_size=2,
+        )
+        booked, not_booked = split_transactions_by_booking_status(transactions)
+
+        assert len(requests) == 3
+        assert requests[0].url.params["min-bookingDate"] == "2025-03-01"
+        assert [t.reference for t in booked] == ["R2", "R1"]
+        assert [t.reference for t in not_booked] == ["P2", "P1"]
+
+    def test_iter_booked_transactions_collects_not_booked(self):
+        """Test that streamed pages yield booked rows and set pending ones aside"""
+
+        pages = [
+            validate_transactions([self._pending("P1"), _payload("R2", "2025-03-02")]),
+            validate_transactions([_payload("R1", "2025-03-01")]),
+        ]
+        not_booked = []
+
+        booked = list(iter_booked_transactions(iter(pages), not_booked))
+
+        assert [t.reference for t in booked] == ["R2", "R1"]
+        assert [t.reference for t in not_booked] == ["P1"]
+
+
+class TestValidateTransactions:
+    """Test suite for page-level transaction validation"""
+
+    def test_trusted_matches_validated(self):
+        """Test that the trusted fast path builds the same transactions"""
+
+        pending = _payload(" ", "")
+        pending.update(bookingStatus="NOTBOOKED", bookingDate=None)
+        pending["remittanceInfo"] = "01Card   payment  "
+        values = [_payload("R1", "2025-03-02"), pending]
+
+        validated = validate_transactions(values)
+        trusted = validate_transactions(values, trusted=True)
+
+        assert [t.model_dump() for t in trusted] == [t.model_dump() for t in validated]
+        assert trusted[1].reference is None
+        assert trusted[1].remittance_info == "01Card payment"
+
+
+class TestSharedHttpClient:
+    """Test suite for reusing one HTTP client across API calls"""
+
+    def test_passed_client_is_reused_and_left_open(self, api_config, serve):
+        """Test that calls use a passed client and do not close it"""
+
+        serve(lambda request: pytest.fail("created a client of its own"))
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"values": []})
+
+        with httpx.Client(
+            base_url=str(api_config.base_url), transport=httpx.MockTransport(handler)
+        ) as http_client:
+            get_accounts_balances(
+                cfg=api_config, bearer_access_token="Bearer x", http_client=http_client
+            )
+            get_transaction_data_paginated(
+                cfg=api_config,
+                account_id="A1",
+                bearer_access_token="Bearer x",
+                last_transaction_date=pendulum.date(2025, 3, 1),
+                transaction_state="BOOKED",
+                http_client=http_client,
+            )
+
+            assert not http_client.is_closed
+
+        assert len(requests) == 2
+
+
+class TestAsyncComdirectClient:
+    """Test suite for the concurrent async client"""
+
+    def test_fetches_accounts_concurrently_within_cap(self, api_config):
+        """Test that accounts are fetched in parallel, never above the cap"""
+
+        in_flight = 0
+        max_in_flight = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+            account_id = request.url.path.split("/")[-2]
+            return httpx.Response(
+                200, json={"values": [_payload(f"{account_id}-R1", "2025-03-02")]}
+            )
+
+        async def fetch():
+            http_client = httpx.AsyncClient(
+                base_url=str(api_config.base_url),
+                transport=httpx.MockTransport(handler),
+            )
+            async with AsyncComdirectClient(
+                cfg=api_config,
+                bearer_access_token="Bearer x",
+                max_concurrency=2,
+                http_client=http_client,
+            ) as client:
+                result = await client.get_transactions_for_accounts(
+                    {f"A{i}": pendulum.date(2025, 3, 1) for i in range(5)},
+                    transaction_state="BOOKED",
+                )
+            await http_client.aclose()
+            return result
+
+        result = asyncio.run(fetch())
+
+        assert max_in_flight == 2
+        assert {
+            account_id: [t.reference for t in transactions]
+            for account_id, transactions in result.items()
+        } == {f"A{i}": [f"A{i}-R1"] for i in range(5)}
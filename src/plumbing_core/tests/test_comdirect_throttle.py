@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pendulum
+import pytest
+
+from plumbing_core.sources.comdirect import (
+    APIConfig,
+    AsyncComdirectClient,
+    AsyncRetryTransport,
+    RetryTransport,
+    TokenBucket,
+    get_transaction_data_paginated,
+)
+
+
+def _payload(reference: str) -> dict:
+    return {
+        "reference": reference,
+        "bookingStatus": "BOOKED",
+        "bookingDate": "2025-03-02",
+        "amount": {"value": "-1.00", "unit": "EUR"},
+        "valutaDate": "2025-03-02",
+        "newTransaction": False,
+        "remittanceInfo": "01Payment",
+        "transactionType": {"key": "DIRECT_DEBIT", "text": "Lastschrift"},
+    }
+
+
+@pytest.fixture
+def api_config() -> APIConfig:
+    return APIConfig(client_id="id", client_secret="secret", username="u", password="p")
+
+
+class FlakyAPI:
+    """Fake API that answers the first `failures` requests per path with `status`"""
+
+    def __init__(self, failures: int, status: int = 429, retry_after: str = "0"):
+        self.failures = failures
+        self.status = status
+        self.retry_after = retry_after
+        self.requests: dict[str, int] = {}
+
+    def respond(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests[path] = self.requests.get(path, 0) + 1
+        if self.requests[path] <= self.failures:
+            return httpx.Response(
+                self.status, headers={"Retry-After": self.retry_after}
+            )
+
+        account_id = path.split("/")[-2]
+        return httpx.Response(200, json={"values": [_payload(f"{account_id}-R1")]})
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        return self.respond(request)
+
+    async def ahandle(self, request: httpx.Request) -> httpx.Response:
+        return self.respond(request)
+
+
+def _client(api: FlakyAPI, cfg: APIConfig, **kwargs) -> httpx.Client:
+    transport = RetryTransport(
+        httpx.MockTransport(api.handle), backoff_seconds=0.0, **kwargs
+    )
+    return httpx.Client(base_url=str(cfg.base_url), transport=transport)
+
+
+class TestRetryTransport:
+    """Test suite for retrying throttled and failed requests"""
+
+    def test_retries_429_until_success(self, api_config):
+        """Test that a paginated fetch survives injected 429s"""
+
+        api = FlakyAPI(failures=2)
+
+        with _client(api, api_config) as http_client:
+            transactions = get_transaction_data_paginated(
+                cfg=api_config,
+                account_id="A1",
+                bearer_access_token="Bearer x",
+                last_transaction_date=pendulum.date(2025, 3, 1),
+                transaction_state="BOOKED",
+                http_client=http_client,
+            )
+
+        assert [t.reference for t in transactions] == ["A1-R1"]
+        assert sum(api.requests.values()) == 3
+
+    def test_gives_up_after_max_retries(self, api_config):
+        """Test that a persistent 5xx is raised once retries are exhausted"""
+
+        api = FlakyAPI(failures=10, status=503)
+
+        with _client(api, api_config, max_retries=2) as http_client:
+            with pytest.raises(httpx.HTTPStatusError):
+                get_transaction_data_paginated(
+                    cfg=api_config,
+                    account_id="A1",
+                    bearer_access_token="Bearer x",
+                    last_transaction_date=pendulum.date(2025, 3, 1),
+                    transaction_state="BOOKED",
+                    http_client=http_client,
+                )
+
+        assert sum(api.requests.values()) == 3
+
+    def test_does_not_retry_post(self, api_config):
+        """Test that non-idempotent requests are sent once"""
+
+        api = FlakyAPI(failures=1)
+
+        with _client(api, api_config) as http_client:
+            response = http_client.post("oauth/token")
+
+        assert response.status_code == 429
+        assert sum(api.requests.values()) == 1
+
+    def test_respects_retry_after(self, api_config):
+        """Test that the wait before a retry follows 'Retry-After'"""
+
+        api = FlakyAPI(failures=1, retry_after="0.2")
+
+        start = time.perf_counter()
+        with _client(api, api_config) as http_client:
+            http_client.get("api/banking/v1/accounts/A1/transactions")
+
+        assert time.perf_counter() - start >= 0.2
+
+    def test_async_client_retries_concurrent_fetches(self, api_config):
+        """Test that the async client recovers every account from 429s"""
+
+        api = FlakyAPI(failures=1)
+
+        async def fetch():
+            transport = AsyncRetryTransport(
+                httpx.MockTransport(api.ahandle), backoff_seconds=0.0
+            )
+            async with httpx.AsyncClient(
+                base_url=str(api_config.base_url), transport=transport
+            ) as http_client:
+                async with AsyncComdirectClient(
+                    cfg=api_config,
+                    bearer_access_token="Bearer x",
+                    http_client=http_client,
+                ) as client:
+                    return await client.get_transactions_for_accounts(
+                        {f"A{i}": pendulum.date(2025, 3, 1) for i in range(3)},
+                        transaction_state="BOOKED",
+                    )
+
+        result = asyncio.run(fetch())
+
+        assert {a: [t.reference for t in ts] for a, ts in result.items()} == {
+            f"A{i}": [f"A{i}-R1"] for i in range(3)
+        }
+        assert sum(api.requests.values()) == 6
+
+
+class TestTokenBucket:
+    """Test suite for the client-side rate limiter"""
+
+    def test_limits_requests_after_burst(self):
+        """Test that requests beyond the burst wait for refilled tokens"""
+
+        bucket = TokenBucket(rate=50, burst=2)
+
+        start = time.perf_counter()
+        for _ in range(7):
+            bucket.acquire()
+
+        # 2 requests pass at once, the other 5 wait 1/50s each
+        assert time.perf_counter() - start >= 0.09
+
+    def test_429_holds_back_shared_bucket(self, api_config):
+        """Test that a 429 delays the requests of every client on the bucket"""
+
+        bucket = TokenBucket(rate=1_000, burst=10)
+        api = FlakyAPI(failures=1, retry_after="0.3")
+
+        def throttled_request():
+            with _client(api, api_config, rate_limiter=bucket) as http_client:
+                http_client.get("api/banking/v1/accounts/A1/transactions")
+
+        thread = threading.Thread(target=throttled_request)
+        thread.start()
+        time.sleep(0.05)
+
+        # Another client on the same bucket waits out the 'Retry-After'
+        start = time.perf_counter()
+        bucket.acquire()
+        waited = time.perf_counter() - start
+        thread.join()
+
+        assert waited >= 0.15
+        assert sum(api.requests.values()) == 2
@@ -0,0 +1,77 @@
+import logging
+
+import pendulum
+
+from plumbing_core.sources.comdirect.types import (
+    _compile_flattener,
+    _flatten_account_transaction,
+    _parse_date,
+)
+
+
+class TestFlatteners:
+    """Test suite for the compiled payload flatteners"""
+
+    def test_extracts_nested_fields(self):
+        """Test that each field is read from the end of its path"""
+
+        flatten = _compile_flattener(
+            "flatten", {"id": ["account", "accountId"], "status": ["bookingStatus"]}
+        )
+
+        assert flatten({"account": {"accountId": "A1"}, "bookingStatus": "BOOKED"}) == {
+            "id": "A1",
+            "status": "BOOKED",
+        }
+
+    def test_missing_keys_and_none_yield_none(self):
+        """Test that gaps and non-dictionaries along a path give None"""
+
+        flattened = _flatten_account_transaction(
+            {
+                "reference": "R1",
+                "remitter": None,
+                "amount": {"value": "1.00"},
+                "transactionType": "DIRECT_DEBIT",
+            }
+        )
+
+        assert flattened["reference"] == "R1"
+        assert flattened["remitter__holder_name"] is None
+        assert flattened["amount__value"] == "1.00"
+        assert flattened["amount__unit"] is None
+        assert flattened["booking_date"] is None
+        assert flattened["transaction_type__key"] is None
+
+    def test_payload_is_not_formatted_without_debug_logging(self, caplog):
+        """Test that missing paths skip building the log message when not logged"""
+
+        class Unprintable(dict):
+            def __str__(self):
+                raise AssertionError("payload was formatted")
+
+            __repr__ = __format__ = __str__
+
+        caplog.set_level(logging.INFO)
+        flattened = _flatten_account_transaction(Unprintable(reference="R1"))
+
+        assert flattened["reference"] == "R1"
+        assert flattened["booking_status"] is None
+
+
+class TestParseDate:
+    """Test suite for the cached date parser of the transaction validators"""
+
+    def test_parses_iso_dates_to_pendulum(self):
+        """Test that API dates become pendulum dates and repeats hit the cache"""
+
+        parsed = _parse_date("2025-01-02")
+
+        assert parsed == pendulum.date(2025, 1, 2)
+        assert isinstance(parsed, pendulum.Date)
+        assert _parse_date("2025-01-02") is parsed
+
+    def test_falls_back_to_pendulum(self):
+        """Test that timestamps still parse to their date"""
+
+        assert _parse_date("2025-01-02T23:30:00+01:00") == pendulum.date(2025, 1, 2)
@@ -5,6 +5,7 @@ from plumbing_core.sources.comdirect.schemas import (
     TIMESTAMP_FIELDS,
 )
 from plumbing_core.sources.comdirect.types import AccountTransaction, AccountBalance
+from plumbing_core.shared import SQLiteIndex
 
 
 class TestComdirectSchemas:
@@ -68,8 +69,8 @@ class TestComdirectSchemas:
             "account_id should be present in AccountBalance model"
         )
 
-        # Count occurrences in the full DDL
-        account_id_count = ACCOUNT_BALANCES_DDL.count("account_id")
+        # Count column definitions in the full DDL, the primary key names it again
+        account_id_count = ACCOUNT_BALANCES_DDL.count("account_id TEXT")
 
         print(f"Full AccountBalance DDL:\n{ACCOUNT_BALANCES_DDL}")
         print(f"account_id appears {account_id_count} times in AccountBalance DDL")
@@ -116,3 +117,37 @@ class TestComdirectSchemas:
         assert account_id_count == 2, (
             "This demonstrates that duplicate fields can be created if not careful with extra_fields"
         )
+
+
+class TestSQLiteTypes:
+    """Test suite for the column types, keys and indexes of the generated DDL"""
+
+    def test_columns_get_their_type_affinity(self):
+        """Test that numbers and booleans are not stored as TEXT"""
+
+        assert "amount__value REAL NOT NULL" in ACCOUNT_TRANSACTIONS_DDL
+        assert "new_transaction INTEGER NOT NULL" in ACCOUNT_TRANSACTIONS_DDL
+        assert "booking_date TEXT," in ACCOUNT_TRANSACTIONS_DDL
+        assert "account_display_id INTEGER NOT NULL" in ACCOUNT_BALANCES_DDL
+        assert "balance__value REAL NOT NULL" in ACCOUNT_BALANCES_DDL
+
+    def test_primary_key_and_strict(self):
+        """Test that a declared primary key and STRICT end up in the DDL"""
+
+        ddl = get_sqlite_ddl_for_model(
+            AccountBalance, primary_key=["account_id"], strict=True
+        )
+
+        assert ddl.endswith("PRIMARY KEY (account_id)\n) STRICT")
+        assert not get_sqlite_ddl_for_model(AccountBalance).endswith("STRICT")
+
+    def test_index_ddl(self):
+        """Test that declared indexes get stable names matching the upsert indexes"""
+
+        index = SQLiteIndex(columns=("account_id", "reference"), unique=True)
+
+        assert index.ddl("t") == (
+            "CREATE UNIQUE INDEX IF NOT EXISTS main.ux_t__account_id__reference "
+            "ON t (account_id, reference)"
+        )
+        assert SQLiteIndex(columns=("account_id",)).name("t") == "ix_t__account_id"
@@ -0,0 +1,41 @@
+from plumbing_core.destinations.sqlite import get_duckdb_connection
+
+
+class TestDuckDBConnection:
+    """Test suite for the shared DuckDB instances of the SQLite destination"""
+
+    def test_cursors_share_one_attached_instance(self, sqlite_config):
+        """Test that tables written through one cursor are seen by the next"""
+
+        with get_duckdb_connection(sqlite_config.db_path, sqlite_config) as conn:
+            conn.execute("CREATE TABLE sqlite_db.t AS SELECT 1 AS a")
+
+        with get_duckdb_connection(sqlite_config.db_path, sqlite_config) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM sqlite_db.t").fetchone()[0]
+            threads = conn.execute("SELECT current_setting('threads')").fetchone()[0]
+
+        assert count == 1
+        assert threads == 2
+
+    def test_changed_settings_are_applied(self, sqlite_config):
+        """Test that settings of a later config reach the running instance"""
+
+        with get_duckdb_connection(sqlite_config.db_path, sqlite_config):
+            pass
+
+        config = sqlite_config.model_copy(update={"threads": 1})
+        with get_duckdb_connection(config.db_path, config) as conn:
+            threads = conn.execute("SELECT current_setting('threads')").fetchone()[0]
+
+        assert threads == 1
+
+    def test_connects_by_db_path_alone(self, sqlite_config):
+        """Test that a db path without a config reaches the same instance"""
+
+        with get_duckdb_connection(sqlite_config.db_path, sqlite_config) as conn:
+            conn.execute("CREATE TABLE sqlite_db.t AS SELECT 1 AS a")
+
+        with get_duckdb_connection(sqlite_config.db_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM sqlite_db.t").fetchone()[0]
+
+        assert count == 1
@@ -0,0 +1,40 @@
+from plumbing_core.destinations.sqlite import (
+    get_transactions_to_categorize,
+    write_account_transactions_booked,
+    write_account_transactions_categorized,
+)
+from plumbing_core.processors.categorization import CategorizedBankTransaction
+
+
+class TestTransactionsToCategorize:
+    """Test suite for the anti-join lookup of transactions to categorize"""
+
+    def _categorized(self, reference: str) -> CategorizedBankTransaction:
+        return CategorizedBankTransaction(
+            account_id="A1", reference=reference, category="Food", summary="Groceries"
+        )
+
+    def test_missing_source_table_returns_empty_list(self, sqlite_config):
+        """Test that nothing is returned before any transactions were written"""
+
+        assert get_transactions_to_categorize(config=sqlite_config) == []
+
+    def test_returns_only_uncategorized_transactions(
+        self, sqlite_config, make_transaction
+    ):
+        """Test that categorized transactions are left out and the limit applies"""
+
+        write_account_transactions_booked(
+            [make_transaction(f"R{i}") for i in range(3)],
+            account_id="A1",
+            config=sqlite_config,
+        )
+        assert len(get_transactions_to_categorize(config=sqlite_config)) == 3
+
+        write_account_transactions_categorized(
+            [self._categorized("R0"), self._categorized("R1")], config=sqlite_config
+        )
+        remaining = get_transactions_to_categorize(config=sqlite_config, limit=None)
+
+        assert [row["reference"] for row in remaining] == ["R2"]
+        assert get_transactions_to_categorize(config=sqlite_config, limit=0) == []
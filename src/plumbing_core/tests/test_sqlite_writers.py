@@ -0,0 +1,142 @@
+import duckdb
+import pyarrow as pa
+import pytest
+
+from plumbing_core.destinations.sqlite.arrow import models_to_arrow_table
+from plumbing_core.destinations.sqlite.writers import (
+    _delete_and_insert,
+    _ensure_table_exists,
+    _insert_if_not_exists,
+)
+
+
+@pytest.fixture
+def duckdb_conn():
+    """DuckDB connection with an in-memory database attached as 'sqlite_db'"""
+
+    with duckdb.connect() as conn:
+        conn.execute("ATTACH ':memory:' AS sqlite_db")
+        yield conn
+
+
+class TestDeleteAndInsert:
+    """Test suite for the 'delete+insert' write strategy of the DuckDB writers"""
+
+    table_name = "account_transactions__not_booked"
+
+    def test_replaces_rows_with_matching_keys(self, duckdb_conn):
+        """Test that quoted and NULL keys are matched and other rows kept"""
+
+        existing = pa.table(
+            {
+                "account_id": ["A1", "A1", "A1", "A2"],
+                "reference": ["R'1", None, "R2", "R'1"],
+                "amount": [1.0, 2.0, 3.0, 4.0],
+            }
+        )
+        duckdb_conn.execute(
+            f"CREATE TABLE sqlite_db.{self.table_name} AS FROM existing"
+        )
+        data = existing.slice(0, 2).set_column(2, "amount", pa.array([10.0, 20.0]))
+
+        inserted = _delete_and_insert(
+            conn=duckdb_conn,
+            data=data,
+            table_name=self.table_name,
+            delete_keys=["account_id", "reference"],
+        )
+
+        rows = duckdb_conn.execute(
+            f"SELECT account_id, reference, amount FROM sqlite_db.{self.table_name} "
+            "ORDER BY account_id, amount"
+        ).fetchall()
+        assert inserted == 2
+        assert rows == [
+            ("A1", "R2", 3.0),
+            ("A1", "R'1", 10.0),
+            ("A1", None, 20.0),
+            ("A2", "R'1", 4.0),
+        ]
+
+
+class TestInsertIfNotExists:
+    """Test suite for the 'insert if not exists' strategy of the DuckDB writers"""
+
+    table_name = "account_transactions__booked"
+
+    def test_inserts_only_new_keys_and_counts_them(self, duckdb_conn):
+        """Test that existing keys are skipped and only new rows are counted"""
+
+        duckdb_conn.execute(
+            f"CREATE TABLE sqlite_db.{self.table_name} AS "
+            "SELECT 'A1' AS account_id, 'R1' AS reference"
+        )
+        data = pa.table({"account_id": ["A1", "A1"], "reference": ["R1", "R2"]})
+
+        inserted = _insert_if_not_exists(
+            conn=duckdb_conn,
+            data=data,
+            table_name=self.table_name,
+            on_conflict_keys=["account_id", "reference"],
+        )
+
+        rows = duckdb_conn.execute(
+            f"SELECT reference FROM sqlite_db.{self.table_name} ORDER BY reference"
+        ).fetchall()
+        assert inserted == 1
+        assert rows == [("R1",), ("R2",)]
+
+
+class TestArrowTable:
+    """Test suite for loading models into typed Arrow tables"""
+
+    def test_columns_are_typed_from_the_model(self, make_transaction):
+        """Test that values keep their model types and extra columns are appended"""
+
+        table = models_to_arrow_table(
+            [make_transaction("R1"), make_transaction(None, amount="-2.50")],
+            extra_columns={"_inserted_at_day": "2025-01-02"},
+        )
+
+        assert table.schema.field("amount__value").type == pa.float64()
+        assert table.schema.field("new_transaction").type == pa.bool_()
+        assert table.schema.field("booking_date").type == pa.string()
+        assert not table.schema.field("booking_status").nullable
+        assert table.column("reference").to_pylist() == ["R1", None]
+        assert table.column("amount__value").to_pylist() == [-1.0, -2.5]
+        assert table.column("booking_date").to_pylist() == ["2025-01-02"] * 2
+        assert table.column("_inserted_at_day").to_pylist() == ["2025-01-02"] * 2
+
+    def test_created_table_keeps_date_float_and_null_columns(
+        self, duckdb_conn, make_transaction
+    ):
+        """Test that a table created from the Arrow table keeps types and nulls"""
+
+        table_name = "account_transactions__not_booked"
+        data = models_to_arrow_table(
+            [
+                make_transaction("R1", amount="-1.25"),
+                make_transaction(None, booking_date=None, booking_status="NOTBOOKED"),
+            ]
+        )
+
+        created = _ensure_table_exists(duckdb_conn, table_name, data)
+
+        column_types = dict(
+            duckdb_conn.execute(
+                "SELECT column_name, data_type FROM information_schema.columns "
+                f"WHERE table_name = '{table_name}'"
+            ).fetchall()
+        )
+        rows = duckdb_conn.execute(
+            "SELECT reference, booking_date, valuta_date, amount__value "
+            f"FROM sqlite_db.{table_name} ORDER BY reference NULLS LAST"
+        ).fetchall()
+        assert created
+        assert column_types["booking_date"] == "VARCHAR"
+        assert column_types["amount__value"] == "DOUBLE"
+        assert column_types["new_transaction"] == "BOOLEAN"
+        assert rows == [
+            ("R1", "2025-01-02", "2025-01-02", -1.25),
+            (None, None, None, -1.0),
+        ]
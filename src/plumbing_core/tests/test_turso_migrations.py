@@ -0,0 +1,132 @@
+from plumbing_core.destinations.turso import (
+    get_turso_connection,
+    migrate_table,
+    write_account_transactions_booked,
+)
+from plumbing_core.sources.comdirect import COMDIRECT_INDEXES, COMDIRECT_SCHEMAS
+
+
+class TestMigrateTable:
+    """Test suite for migrating existing tables to their typed DDL"""
+
+    table_name = "account_transactions__booked"
+
+    def _create_legacy_table(self, config):
+        """Booked table as created while every column was typed TEXT"""
+
+        columns = COMDIRECT_SCHEMAS[self.table_name]
+        for typed in [" REAL", " INTEGER"]:
+            columns = columns.replace(typed, " TEXT")
+        columns = columns.replace(" STRICT", "")
+
+        with get_turso_connection(config) as conn:
+            conn.execute(f"CREATE TABLE {self.table_name} {columns}")
+            conn.executemany(
+                f"INSERT INTO {self.table_name} (reference, booking_status, "
+                "booking_date, amount__value, amount__unit, new_transaction, "
+                "remittance_info, transaction_type__key, transaction_type__text, "
+                "account_id) VALUES (?, 'BOOKED', ?, ?, 'EUR', ?, 'x', 'k', 't', 'A1')",
+                [
+                    ("R1", "2025-01-01", "-1.5", True),
+                    ("R2", "2025-01-02", "-10", False),
+                    ("R2", "2025-01-02", "-10", False),
+                ],
+            )
+            conn.commit()
+
+    def _migrate(self, config) -> bool:
+        return migrate_table(
+            config=config,
+            table_name=self.table_name,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+            indexes=COMDIRECT_INDEXES[self.table_name],
+        )
+
+    def test_rebuilds_legacy_table_with_typed_values(self, config):
+        """Test that TEXT values are converted and duplicates removed"""
+
+        self._create_legacy_table(config)
+
+        assert self._migrate(config) is True
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT reference, amount__value, typeof(amount__value), "
+                f"new_transaction FROM {self.table_name} ORDER BY reference"
+            ).fetchall()
+            strict = conn.execute(
+                f"PRAGMA main.table_list('{self.table_name}')"
+            ).fetchone()[5]
+        assert rows == [("R1", -1.5, "real", 1), ("R2", -10.0, "real", 0)]
+        assert strict == 1
+
+    def test_rebuild_keeps_first_of_colliding_rows(self, config):
+        """Test that rows colliding on the new primary key keep the first written"""
+
+        self._create_legacy_table(config)
+        with get_turso_connection(config) as conn:
+            conn.execute(
+                f"UPDATE {self.table_name} SET amount__value = '-20' "
+                f"WHERE rowid = (SELECT MAX(rowid) FROM {self.table_name})"
+            )
+            conn.commit()
+
+        self._migrate(config)
+
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT amount__value FROM {self.table_name} WHERE reference = 'R2'"
+            ).fetchall()
+        assert rows == [(-10.0,)]
+
+    def test_creates_indexes_and_is_idempotent(self, config):
+        """Test that declared indexes serve lookups and a second run is a no-op"""
+
+        self._create_legacy_table(config)
+        self._migrate(config)
+
+        assert self._migrate(config) is False
+        with get_turso_connection(config) as conn:
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT MAX(booking_date) FROM {self.table_name} "
+                "WHERE account_id = ?",
+                ("A1",),
+            ).fetchall()
+        assert "ix_account_transactions__booked__account_id__booking_date" in str(plan)
+
+    def test_additive_migration_does_not_trigger_rebuilds(
+        self, config, make_transaction
+    ):
+        """Test that a column appended without its constraints is not rebuilt"""
+
+        self._migrate(config)
+        # Non-constant defaults are added without them and NOT NULL, at the end
+        extended_ddl = COMDIRECT_SCHEMAS[self.table_name].replace(
+            "account_id TEXT",
+            "added_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,\n    account_id TEXT",
+        )
+        write_account_transactions_booked(
+            [make_transaction("R1")],
+            account_id="A1",
+            config=config,
+            ddl=extended_ddl,
+        )
+        kwargs = dict(config=config, table_name=self.table_name, ddl=extended_ddl)
+
+        assert migrate_table(**kwargs) is False
+        assert migrate_table(**kwargs) is False
+        with get_turso_connection(config) as conn:
+            columns = [
+                row[1]
+                for row in conn.execute(
+                    f"PRAGMA main.table_info('{self.table_name}')"
+                ).fetchall()
+            ]
+        assert columns[-1] == "added_at"
+
+    def test_creates_missing_table(self, config):
+        """Test that a table which does not exist yet is created from its DDL"""
+
+        assert self._migrate(config) is False
+        with get_turso_connection(config) as conn:
+            count = conn.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()
+        assert count == (0,)
@@ -0,0 +1,242 @@
+import pendulum
+
+from plumbing_core.destinations.turso import (
+    TursoSession,
+    get_balance_as_of,
+    get_changed_account_ids,
+    get_transactions_to_categorize,
+    get_turso_connection,
+    iter_transactions_to_categorize,
+    write_account_balances,
+    write_account_balances_history,
+    write_account_transactions_booked,
+    write_account_transactions_categorized,
+)
+from plumbing_core.processors.categorization import (
+    CATEGORIZED_BANK_TRANSACTION_DDL,
+    CategorizedBankTransaction,
+)
+from plumbing_core.sources.comdirect import COMDIRECT_SCHEMAS
+
+
+class TestChangedAccountIds:
+    """Test suite for detecting accounts whose balance changed"""
+
+    table_name = "account_balances"
+
+    def _write(self, config, balances):
+        write_account_balances(
+            balances,
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+            write_strategy="upsert",
+        )
+
+    def test_all_accounts_changed_without_table(self, config, make_balance):
+        """Test that every account is synced before the first snapshot exists"""
+
+        balances = [make_balance("A1", "1.00"), make_balance("A2", "2.00")]
+
+        assert get_changed_account_ids(config=config, balances=balances) == [
+            "A1",
+            "A2",
+        ]
+
+    def test_skips_unchanged_accounts(self, config, make_balance):
+        """Test that only changed and new accounts are returned, in input order"""
+
+        self._write(config, [make_balance("A1", "1.00"), make_balance("A2", "2.00")])
+
+        changed = get_changed_account_ids(
+            config=config,
+            balances=[
+                make_balance("A3", "3.00"),
+                make_balance("A2", "2.50"),
+                make_balance("A1", "1.0"),
+            ],
+        )
+
+        assert changed == ["A3", "A2"]
+
+    def test_compares_against_latest_snapshot(self, config, make_balance):
+        """Test that the comparison uses the snapshot written last"""
+
+        self._write(config, [make_balance("A1", "1.00")])
+        self._write(config, [make_balance("A1", "5.00")])
+
+        assert (
+            get_changed_account_ids(
+                config=config, balances=[make_balance("A1", "5.00")]
+            )
+            == []
+        )
+
+
+class TestBalanceAsOf:
+    """Test suite for as-of lookups on the balance history"""
+
+    table_name = "account_balances__history"
+
+    def _write(self, config, balances, valid_from):
+        write_account_balances_history(
+            balances,
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+            valid_from=valid_from,
+        )
+
+    def test_returns_row_valid_at_timestamp(self, config, make_balance):
+        """Test that each point in time sees the balance valid then"""
+
+        t1 = pendulum.datetime(2025, 3, 1, 8)
+        t2 = pendulum.datetime(2025, 3, 1, 9)
+        self._write(config, [make_balance("A1", "1.00")], valid_from=t1)
+        self._write(config, [make_balance("A1", "2.00")], valid_from=t2)
+
+        def balance_at(ts):
+            row = get_balance_as_of(config=config, account_id="A1", ts=ts)
+            return row and float(row["balance__value"])
+
+        assert balance_at(t1.subtract(seconds=1)) is None
+        assert balance_at(t1) == 1.0
+        assert balance_at(t2.subtract(minutes=1)) == 1.0
+        assert balance_at(t2) == 2.0
+        assert balance_at(pendulum.datetime(2030, 1, 1)) == 2.0
+        assert balance_at(pendulum.datetime(2025, 3, 1, 10, tz="Europe/Berlin")) == 2.0
+
+    def test_lookup_seeks_the_history_index(self, config, make_balance):
+        """Test that the as-of query is served by the (account_id, valid_from) index"""
+
+        self._write(config, [make_balance("A1", "1.00")], valid_from=None)
+
+        with get_turso_connection(config) as conn:
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM {self.table_name} "
+                "WHERE account_id = ? AND valid_from <= ? "
+                "ORDER BY valid_from DESC, rowid DESC LIMIT 1",
+                ("A1", "2030-01-01 00:00:00"),
+            ).fetchall()
+
+        assert "ix_account_balances__history__account_id__valid_from" in str(plan)
+
+
+class TestTransactionsToCategorize:
+    """Test suite for streaming the transactions not categorized yet"""
+
+    table_name = "account_transactions__booked"
+
+    def _write_booked(self, config, make_transaction, count):
+        write_account_transactions_booked(
+            [make_transaction(f"R{i}") for i in range(count)],
+            account_id="A1",
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+        )
+
+    def _categorize(self, config, references, session=None):
+        write_account_transactions_categorized(
+            [
+                CategorizedBankTransaction(
+                    account_id="A1",
+                    reference=reference,
+                    category="Food",
+                    summary="Groceries",
+                )
+                for reference in references
+            ],
+            config=config,
+            ddl=CATEGORIZED_BANK_TRANSACTION_DDL,
+            write_strategy="upsert",
+            session=session,
+        )
+
+    def test_streams_uncategorized_in_chunks_newest_first(
+        self, config, make_transaction
+    ):
+        """Test that all uncategorized rows arrive once, in chunks of the given size"""
+
+        self._write_booked(config, make_transaction, 5)
+        self._categorize(config, ["R3"])
+
+        chunks = list(iter_transactions_to_categorize(config=config, chunk_size=2))
+
+        assert [[row["reference"] for row in chunk] for chunk in chunks] == [
+            ["R4", "R2"],
+            ["R1", "R0"],
+        ]
+        assert chunks[0][0]["account_id"] == "A1"
+
+    def test_rows_categorized_while_streaming_are_not_repeated(
+        self, config, make_transaction
+    ):
+        """Test that writing between chunks neither repeats nor skips rows"""
+
+        self._write_booked(config, make_transaction, 5)
+
+        references = []
+        with TursoSession(config) as session:
+            for chunk in iter_transactions_to_categorize(
+                config=config, chunk_size=2, session=session
+            ):
+                references += [row["reference"] for row in chunk]
+                self._categorize(config, [chunk[0]["reference"]], session=session)
+
+        assert references == ["R4", "R3", "R2", "R1", "R0"]
+        with get_turso_connection(config) as conn:
+            index_names = [
+                name
+                for (name,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type='index' "
+                    "AND tbl_name='account_transactions__categorized'"
+                ).fetchall()
+            ]
+        # The upsert's unique index serves the lookup, no second index is created
+        assert index_names == [
+            "ux_account_transactions__categorized__account_id__reference"
+        ]
+
+    def test_newer_timestamps_come_first_whatever_the_rowid(
+        self, config, make_transaction, monkeypatch
+    ):
+        """Test that the timestamp orders chunks and reading writes nothing"""
+
+        self._write_booked(config, make_transaction, 4)
+        # A rebuild can renumber rowids, the timestamp decides the order
+        with get_turso_connection(config) as conn:
+            conn.execute(
+                f"UPDATE {self.table_name} SET _inserted_at_ts = '2999-01-01 00:00:00' "
+                "WHERE reference IN ('R0', 'R1')"
+            )
+            conn.commit()
+
+        index_count_sql = "SELECT COUNT(*) FROM sqlite_master WHERE type='index'"
+        with get_turso_connection(config) as conn:
+            index_count = conn.execute(index_count_sql).fetchone()[0]
+
+        writes = []
+        with TursoSession(config) as session:
+            monkeypatch.setattr(session, "record_write", lambda: writes.append(1))
+            chunks = list(
+                iter_transactions_to_categorize(
+                    config=config, chunk_size=3, session=session
+                )
+            )
+            assert session.conn.execute(index_count_sql).fetchone()[0] == index_count
+
+        assert [[row["reference"] for row in chunk] for chunk in chunks] == [
+            ["R1", "R0", "R3"],
+            ["R2"],
+        ]
+        assert writes == []
+
+    def test_empty_backlog_returns_empty_list(self, config, make_transaction):
+        """Test that nothing to categorize is no error and the limit is honoured"""
+
+        assert get_transactions_to_categorize(config=config) == []
+
+        self._write_booked(config, make_transaction, 3)
+        assert len(get_transactions_to_categorize(config=config, limit=2)) == 2
+        assert len(get_transactions_to_categorize(config=config, limit=None)) == 3
+
+        self._categorize(config, ["R0", "R1", "R2"])
+        assert get_transactions_to_categorize(config=config) == []
@@ -0,0 +1,127 @@
+import pytest
+
+from plumbing_core.destinations.turso import (
+    SchemaRegistry,
+    TursoSession,
+    get_schema_registry,
+    get_turso_connection,
+    write_account_transactions_booked,
+)
+from plumbing_core.processors.categorization import (
+    CATEGORIZED_BANK_TRANSACTION_DDL,
+    CategorizedBankTransaction,
+)
+from plumbing_core.shared import get_sqlite_ddl_for_model
+from plumbing_core.sources.comdirect import COMDIRECT_SCHEMAS
+
+
+class CountingConnection:
+    """Connection wrapper counting the statements sent to the database"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = list()
+
+    def execute(self, sql, *args):
+        self.statements.append(sql)
+        return self.conn.execute(sql, *args)
+
+
+class TestSchemaRegistry:
+    """Test suite for the per-connection schema registry"""
+
+    table_name = "account_transactions__booked"
+
+    def _versions(self, config):
+        with get_turso_connection(config) as conn:
+            return conn.execute(
+                "SELECT version, statements FROM schema_migrations "
+                "WHERE table_name = ? ORDER BY version",
+                (self.table_name,),
+            ).fetchall()
+
+    def test_adds_new_columns_and_writes_by_name(self, config, make_transaction):
+        """Test that a column added to the DDL is appended and rows still land"""
+
+        ddl = COMDIRECT_SCHEMAS[self.table_name]
+        kwargs = dict(account_id="A1", config=config, table_name=self.table_name)
+        write_account_transactions_booked([make_transaction("R1")], ddl=ddl, **kwargs)
+
+        extended_ddl = ddl.replace(
+            "account_id TEXT", "category TEXT DEFAULT 'none',\n    account_id TEXT"
+        )
+        result = write_account_transactions_booked(
+            [make_transaction("R2")], ddl=extended_ddl, **kwargs
+        )
+
+        assert result.inserted == 1
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT reference, account_id, category FROM {self.table_name} "
+                "ORDER BY reference"
+            ).fetchall()
+        assert rows == [("R1", "A1", "none"), ("R2", "A1", "none")]
+        versions = self._versions(config)
+        assert [version for version, _ in versions] == [1, 2]
+        assert "ADD COLUMN category TEXT DEFAULT 'none'" in versions[1][1]
+
+    def test_unchanged_ddl_records_no_new_version(self, config, make_transaction):
+        """Test that writing with the same DDL again leaves the schema alone"""
+
+        kwargs = dict(
+            account_id="A1", config=config, ddl=COMDIRECT_SCHEMAS[self.table_name]
+        )
+        write_account_transactions_booked([make_transaction("R1")], **kwargs)
+        write_account_transactions_booked([make_transaction("R2")], **kwargs)
+
+        assert [version for version, _ in self._versions(config)] == [1]
+
+    def test_adds_timestamp_fields_without_function_defaults(self, config):
+        """Test that columns with function defaults are added without them"""
+
+        table_name = "account_transactions__categorized"
+        with get_turso_connection(config) as conn:
+            registry = SchemaRegistry()
+            registry.ensure_table(
+                conn, table_name, get_sqlite_ddl_for_model(CategorizedBankTransaction)
+            )
+
+            columns = registry.ensure_table(
+                conn, table_name, CATEGORIZED_BANK_TRANSACTION_DDL
+            )
+            defaults = {
+                row[1]: row[4]
+                for row in conn.execute(
+                    f"PRAGMA main.table_info('{table_name}')"
+                ).fetchall()
+            }
+
+        assert columns[-2:] == ["_inserted_at_day", "_inserted_at_ts"]
+        assert defaults["_inserted_at_day"] is None
+        assert defaults["_inserted_at_ts"] is None
+
+    def test_new_primary_key_column_is_refused(self, config):
+        """Test that changes beyond new columns are left to 'migrate_table'"""
+
+        with get_turso_connection(config) as conn:
+            registry = SchemaRegistry()
+            registry.ensure_table(conn, "t", "(a TEXT PRIMARY KEY)")
+            with pytest.raises(ValueError, match="primary key"):
+                registry.ensure_table(conn, "t", "(a TEXT, b TEXT, PRIMARY KEY (a, b))")
+
+    def test_repeated_lookups_are_served_from_memory(self, config):
+        """Test that a known table layout is not read from the database again"""
+
+        ddl = COMDIRECT_SCHEMAS[self.table_name]
+        with TursoSession(config) as session:
+            conn = CountingConnection(session.conn)
+            registry = get_schema_registry(session.conn)
+            registry.ensure_table(conn, self.table_name, ddl)
+            statement_count = len(conn.statements)
+
+            registry.ensure_table(conn, self.table_name, ddl)
+            registry.columns(conn, self.table_name)
+
+            assert statement_count > 0
+            assert len(conn.statements) == statement_count
+            assert get_schema_registry(session.conn) is registry
@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+
+import pytest
+
+from plumbing_core.destinations.turso import (
+    TursoSession,
+    get_max_date_string,
+    write_account_transactions_booked,
+)
+from plumbing_core.destinations.turso import session as session_module
+from plumbing_core.sources.comdirect import COMDIRECT_SCHEMAS
+
+
+class _FakeReplicaConnection:
+    """Stands in for an embedded replica connection and counts syncs"""
+
+    def __init__(self):
+        self.syncs = 0
+        self.rollbacks = 0
+
+    def sync(self):
+        self.syncs += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def fake_replica(monkeypatch) -> _FakeReplicaConnection:
+    conn = _FakeReplicaConnection()
+
+    @contextmanager
+    def fake_get_turso_connection(config):
+        yield conn
+
+    monkeypatch.setattr(
+        session_module, "get_turso_connection", fake_get_turso_connection
+    )
+    monkeypatch.setattr(session_module, "is_embedded_replica", lambda config: True)
+    return conn
+
+
+class TestTursoSession:
+    """Test suite for the session-scoped Turso connection"""
+
+    def test_readers_and_writers_share_the_session(self, config, make_transaction):
+        """Test that a write through the session is visible to a read through it"""
+
+        transaction = make_transaction("R1")
+
+        with TursoSession(config) as session:
+            write_account_transactions_booked(
+                [transaction],
+                account_id="A1",
+                config=config,
+                ddl=COMDIRECT_SCHEMAS["account_transactions__booked"],
+                session=session,
+            )
+            max_date = get_max_date_string(
+                config=config,
+                table_name="account_transactions__booked",
+                date_field="booking_date",
+                filter_condition="account_id = 'A1'",
+                session=session,
+            )
+
+        assert max_date == "2025-01-02"
+
+    def test_syncs_on_open_and_close_only_by_default(self, config, fake_replica):
+        """Test that writes do not sync unless a sync policy asks for it"""
+
+        with TursoSession(config) as session:
+            for _ in range(5):
+                session.record_write()
+
+        assert fake_replica.syncs == 2
+
+    def test_syncs_every_n_writes(self, config, fake_replica):
+        """Test the write-count sync policy"""
+
+        with TursoSession(config, sync_every_n_writes=2) as session:
+            for _ in range(5):
+                session.record_write()
+
+        assert fake_replica.syncs == 4
+
+    def test_rolls_back_and_syncs_on_error(self, config, fake_replica):
+        """Test that a failing run rolls back and still syncs on close"""
+
+        with pytest.raises(RuntimeError):
+            with TursoSession(config):
+                raise RuntimeError("boom")
+
+        assert fake_replica.rollbacks == 1
+        assert fake_replica.syncs == 2
+
+    def test_syncs_a_failed_write_without_session(self, config, fake_replica):
+        """Test that a write outside a session syncs on close even when it fails"""
+
+        with pytest.raises(RuntimeError):
+            with session_module.get_session_connection(config, write=True):
+                raise RuntimeError("boom")
+
+        assert fake_replica.syncs == 2
@@ -0,0 +1,419 @@
+import pendulum
+import pytest
+
+from plumbing_core.destinations.turso import (
+    TursoSession,
+    get_turso_connection,
+    get_watermarks,
+    write_account_balances,
+    write_account_balances_history,
+    write_account_transactions_booked,
+    write_account_transactions_booked_batched,
+    write_account_transactions_not_booked,
+)
+from plumbing_core.sources.comdirect import AccountBalance, COMDIRECT_SCHEMAS
+from plumbing_core.destinations.turso import writers
+from plumbing_core.shared import TIMESTAMP_FIELDS, WriteResult, get_sqlite_ddl_for_model
+
+
+class TestUpsertWriteStrategy:
+    """Test suite for the 'upsert' write strategy of the Turso writers"""
+
+    def test_booked_upsert_skips_existing_references(self, config, make_transaction):
+        """Test that existing (account_id, reference) pairs are not inserted again"""
+
+        table_name = "account_transactions__booked"
+        kwargs = dict(
+            account_id="A1",
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[table_name],
+            write_strategy="upsert",
+        )
+
+        first = write_account_transactions_booked([make_transaction("R1")], **kwargs)
+        second = write_account_transactions_booked(
+            [make_transaction("R1", amount="-5.00"), make_transaction("R2")], **kwargs
+        )
+
+        assert first == WriteResult(inserted=1)
+        assert second == WriteResult(inserted=1)
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT reference, amount__value FROM {table_name} ORDER BY reference"
+            ).fetchall()
+        assert rows == [("R1", -1.0), ("R2", -1.0)]
+
+    def test_upsert_dedups_existing_table_before_creating_index(
+        self, config, make_balance
+    ):
+        """Test that a table written with the staging strategy is migrated"""
+
+        table_name = "account_balances"
+        # Balances DDL from before the primary key was declared
+        ddl = get_sqlite_ddl_for_model(AccountBalance, extra_fields=TIMESTAMP_FIELDS)
+
+        write_account_balances([make_balance("A1", "1.00")], config=config, ddl=ddl)
+        with get_turso_connection(config) as conn:
+            # Simulate a duplicate left behind by an earlier run
+            conn.execute(f"INSERT INTO {table_name} SELECT * FROM {table_name}")
+            conn.commit()
+
+        result = write_account_balances(
+            [make_balance("A1", "2.00"), make_balance("A2", "3.00")],
+            config=config,
+            ddl=ddl,
+            write_strategy="upsert",
+        )
+
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT account_id, balance__value FROM {table_name}"
+            ).fetchall()
+            index_count = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master "
+                f"WHERE type='index' AND tbl_name='{table_name}'"
+            ).fetchone()[0]
+        assert result == WriteResult(inserted=1, updated=1)
+        assert rows == [("A1", 2.0), ("A2", 3.0)]
+        assert index_count == 1
+
+    def test_failed_upsert_rolls_back_dedup_and_index(
+        self, config, make_balance, monkeypatch
+    ):
+        """Test that the dedup and index of a failing upsert are not committed"""
+
+        table_name = "account_balances"
+        ddl = get_sqlite_ddl_for_model(AccountBalance, extra_fields=TIMESTAMP_FIELDS)
+        write_account_balances([make_balance("A1", "1.00")], config=config, ddl=ddl)
+        with get_turso_connection(config) as conn:
+            conn.execute(f"INSERT INTO {table_name} SELECT * FROM {table_name}")
+            conn.commit()
+
+        def fail(data):
+            raise RuntimeError("boom")
+
+        with TursoSession(config) as session:
+            with monkeypatch.context() as patch:
+                patch.setattr(writers, "_serialize_rows", fail)
+                with pytest.raises(RuntimeError):
+                    write_account_balances(
+                        [make_balance("A1", "2.00")],
+                        config=config,
+                        ddl=ddl,
+                        write_strategy="upsert",
+                        session=session,
+                    )
+            row_count = session.conn.execute(
+                f"SELECT COUNT(*) FROM {table_name}"
+            ).fetchone()[0]
+
+            # The session recreates the index the rollback removed
+            result = write_account_balances(
+                [make_balance("A1", "2.00")],
+                config=config,
+                ddl=ddl,
+                write_strategy="upsert",
+                session=session,
+            )
+
+        assert row_count == 2
+        assert result == WriteResult(updated=1)
+
+
+class TestStagingWriteStrategy:
+    """Test suite for the row counts reported by the staging write strategies"""
+
+    def test_insert_if_not_exists_counts(self, config, make_transaction):
+        """Test that only rows missing from the target are reported as inserted"""
+
+        kwargs = dict(
+            account_id="A1",
+            config=config,
+            ddl=COMDIRECT_SCHEMAS["account_transactions__booked"],
+        )
+
+        write_account_transactions_booked([make_transaction("R1")], **kwargs)
+        result = write_account_transactions_booked(
+            [make_transaction("R1"), make_transaction("R2")], **kwargs
+        )
+
+        assert result == WriteResult(inserted=1, staged=2)
+
+    def test_delete_and_insert_counts(self, config, make_transaction):
+        """Test that replaced rows are reported as deleted and inserted"""
+
+        kwargs = dict(
+            account_id="A1",
+            config=config,
+            ddl=COMDIRECT_SCHEMAS["account_transactions__not_booked"],
+        )
+
+        write_account_transactions_not_booked(
+            [make_transaction("R1"), make_transaction("R2")], **kwargs
+        )
+        result = write_account_transactions_not_booked(
+            [make_transaction("R3")], **kwargs
+        )
+
+        assert result == WriteResult(inserted=1, deleted=2, staged=1)
+
+
+class TestWatermarks:
+    """Test suite for the sync state watermarks maintained by the booked writer"""
+
+    table_name = "account_transactions__booked"
+
+    def test_booked_writer_advances_watermark(self, config, make_transaction):
+        """Test that the watermark follows the latest written booking date"""
+
+        kwargs = dict(
+            account_id="A1", config=config, ddl=COMDIRECT_SCHEMAS[self.table_name]
+        )
+        write_account_transactions_booked(
+            [make_transaction("R1", booking_date="2025-01-05")], **kwargs
+        )
+        write_account_transactions_booked(
+            [make_transaction("R0", booking_date="2025-01-01")], **kwargs
+        )
+
+        watermarks = get_watermarks(config=config, account_ids=["A1", "A2"])
+
+        assert watermarks == {"A1": "2025-01-05", "A2": None}
+
+    def test_watermarks_are_backfilled_from_existing_data(
+        self, config, make_transaction
+    ):
+        """Test that accounts without a state row are seeded from MAX() once"""
+
+        write_account_transactions_booked(
+            [make_transaction("R1", booking_date="2025-02-01")],
+            account_id="A1",
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+        )
+        with get_turso_connection(config) as conn:
+            # Simulate a table written before the sync state table existed
+            conn.execute("DROP TABLE sync_state")
+            conn.commit()
+
+        assert get_watermarks(config=config, account_ids=["A1"]) == {"A1": "2025-02-01"}
+        with get_turso_connection(config) as conn:
+            state_rows = conn.execute(
+                "SELECT account_id, watermark FROM sync_state"
+            ).fetchall()
+        assert state_rows == [("A1", "2025-02-01")]
+
+
+class TestBatchedWriter:
+    """Test suite for the streaming booked transactions writer"""
+
+    table_name = "account_transactions__booked"
+
+    def test_commits_batches_and_advances_watermark_at_end(
+        self, config, make_transaction
+    ):
+        """Test that all batches are written and the watermark covers all of them"""
+
+        transactions = (
+            make_transaction(f"R{day}", booking_date=f"2025-01-{day:02d}")
+            for day in range(9, 0, -1)
+        )
+
+        result = write_account_transactions_booked_batched(
+            transactions,
+            account_id="A1",
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+            batch_size=4,
+        )
+
+        assert result == WriteResult(inserted=9, staged=9)
+        assert get_watermarks(config=config, account_ids=["A1"]) == {"A1": "2025-01-09"}
+
+    def test_failed_stream_keeps_batches_but_not_watermark(
+        self, config, make_transaction
+    ):
+        """Test that a crash mid-backfill keeps committed rows and the old watermark"""
+
+        def newest_first_then_crash():
+            yield make_transaction("R3", booking_date="2025-01-03")
+            yield make_transaction("R2", booking_date="2025-01-02")
+            yield make_transaction("R1", booking_date="2025-01-01")
+            raise ConnectionError("API went away")
+
+        with pytest.raises(ConnectionError):
+            write_account_transactions_booked_batched(
+                newest_first_then_crash(),
+                account_id="A1",
+                config=config,
+                ddl=COMDIRECT_SCHEMAS[self.table_name],
+                batch_size=2,
+            )
+
+        with get_turso_connection(config) as conn:
+            references = conn.execute(
+                f"SELECT reference FROM {self.table_name} ORDER BY reference"
+            ).fetchall()
+        assert references == [("R2",), ("R3",)]
+        # The next run starts over from before the backfill, not from 'R3'
+        assert get_watermarks(config=config, account_ids=["A1"]) == {"A1": None}
+
+
+class TestNotBookedRefresh:
+    """Test suite for the hash-guarded refresh of not-booked transactions"""
+
+    table_name = "account_transactions__not_booked"
+
+    def _write(self, config, transactions):
+        return write_account_transactions_not_booked(
+            transactions,
+            account_id="A1",
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+        )
+
+    def _references(self, config):
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT reference FROM {self.table_name} ORDER BY reference"
+            ).fetchall()
+        return [reference for (reference,) in rows]
+
+    def test_unchanged_set_writes_nothing(self, config, make_transaction):
+        """Test that the same pending set in another order is skipped"""
+
+        first = [make_transaction("R1"), make_transaction("R2")]
+        self._write(config, first)
+
+        result = self._write(config, first[::-1])
+
+        assert result == WriteResult()
+        assert self._references(config) == ["R1", "R2"]
+
+    def test_changed_set_writes_only_the_difference(self, config, make_transaction):
+        """Test that rows in both sets are kept and only the others are written"""
+
+        self._write(config, [make_transaction("R1"), make_transaction("R2")])
+
+        result = self._write(
+            config,
+            [make_transaction("R2"), make_transaction("R3", amount="-3.00")],
+        )
+
+        assert result == WriteResult(inserted=1, deleted=1, staged=2)
+        assert self._references(config) == ["R2", "R3"]
+
+    def test_rows_without_reference_are_matched(self, config, make_transaction):
+        """Test that NULL columns do not make identical rows look changed"""
+
+        self._write(config, [make_transaction(None)])
+        self._write(config, [make_transaction(None), make_transaction("R1")])
+
+        assert self._references(config) == [None, "R1"]
+
+    def test_duplicate_pending_rows_are_written_once(self, config, make_transaction):
+        """Test that identical pending rows in one set land as a single row"""
+
+        result = self._write(config, [make_transaction(None), make_transaction(None)])
+        changed = self._write(
+            config,
+            [make_transaction(None), make_transaction(None), make_transaction("R1")],
+        )
+
+        assert result == WriteResult(inserted=1, staged=2)
+        assert changed == WriteResult(inserted=1, staged=3)
+        assert self._references(config) == [None, "R1"]
+
+    def test_empty_set_clears_pending_rows(self, config, make_transaction):
+        """Test that pending rows are removed once none are reported anymore"""
+
+        self._write(config, [make_transaction("R1")])
+
+        result = self._write(config, [])
+
+        assert result == WriteResult(deleted=1)
+        assert self._references(config) == []
+
+    def test_adds_hash_column_to_existing_sync_state(self, config, make_transaction):
+        """Test that a sync state table without the hash column is migrated"""
+
+        with get_turso_connection(config) as conn:
+            conn.execute(
+                "CREATE TABLE sync_state (source TEXT, table_name TEXT, "
+                "account_id TEXT, watermark TEXT, last_run_at TEXT, "
+                "last_run_received INTEGER, last_run_inserted INTEGER, "
+                "PRIMARY KEY (source, table_name, account_id))"
+            )
+            conn.commit()
+
+        self._write(config, [make_transaction("R1")])
+
+        assert self._write(config, [make_transaction("R1")]) == WriteResult()
+
+
+class TestBalanceHistory:
+    """Test suite for the change-event balance history writer"""
+
+    table_name = "account_balances__history"
+
+    def _write(self, config, balances, valid_from):
+        return write_account_balances_history(
+            balances,
+            config=config,
+            ddl=COMDIRECT_SCHEMAS[self.table_name],
+            valid_from=valid_from,
+        )
+
+    def test_appends_only_changed_accounts(self, config, make_balance):
+        """Test that unchanged accounts are not written and changed ones get a new row"""
+
+        t1 = pendulum.datetime(2025, 3, 1, 8)
+        t2 = pendulum.datetime(2025, 3, 1, 9)
+        t3 = pendulum.datetime(2025, 3, 1, 10)
+
+        first = self._write(
+            config, [make_balance("A1", "1.00"), make_balance("A2", "2.00")], t1
+        )
+        unchanged = self._write(
+            config, [make_balance("A1", "1.00"), make_balance("A2", "2.00")], t2
+        )
+        changed = self._write(
+            config, [make_balance("A1", "1.50"), make_balance("A2", "2.00")], t3
+        )
+
+        assert first == WriteResult(inserted=2, staged=2)
+        assert unchanged == WriteResult(staged=2)
+        assert changed == WriteResult(inserted=1, updated=1, staged=2)
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT account_id, balance__value, valid_from, valid_to "
+                f"FROM {self.table_name} ORDER BY account_id, valid_from"
+            ).fetchall()
+        assert rows == [
+            ("A1", 1.0, "2025-03-01 08:00:00", "2025-03-01 10:00:00"),
+            ("A1", 1.5, "2025-03-01 10:00:00", None),
+            ("A2", 2.0, "2025-03-01 08:00:00", None),
+        ]
+
+    def test_keeps_latest_balance_of_an_account_passed_twice(
+        self, config, make_balance
+    ):
+        """Test that duplicates of an account in one batch open a single row"""
+
+        result = self._write(
+            config,
+            [
+                make_balance("A1", "1.00"),
+                make_balance("A2", "2.00"),
+                make_balance("A1", "1.50"),
+            ],
+            pendulum.datetime(2025, 3, 1, 8),
+        )
+
+        assert result == WriteResult(inserted=2, staged=2)
+        with get_turso_connection(config) as conn:
+            rows = conn.execute(
+                f"SELECT account_id, balance__value, valid_to "
+                f"FROM {self.table_name} ORDER BY account_id"
+            ).fetchall()
+        assert rows == [("A1", 1.5, None), ("A2", 2.0, None)]